@@ -0,0 +1,244 @@
+"""批量导入网站
+
+支持三种格式，都以流的方式逐条读取，不会一次把整个文件读进内存：
+
+- 浏览器导出的书签 HTML（Netscape Bookmark File），书签所在的文件夹对应分类；
+- CSV，列名可以是 name/url/category/description 或 网站名称/网站URL/分类/网站描述；
+- websites_export.txt 的格式（网站名称: / 网站URL: 块，用一行减号分隔）。
+
+另外也能读取 exporter 导出的 JSON Lines 和 data.json 结构的文件。
+
+导入时按规范化后的 URL 与已有网站去重，所有修改直接写入数据和 DataIndex，
+由调用方统一保存一次、刷新一次界面。本模块不依赖 Qt。
+"""
+import csv
+import json
+import os
+from html.parser import HTMLParser
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_CATEGORY = "导入的网站"
+EXPORT_SEPARATOR = "-" * 50
+
+# CSV 中可以使用的列名 -> 字段
+CSV_COLUMNS = {
+    "name": "name", "title": "name", "网站名称": "name", "名称": "name",
+    "url": "url", "href": "url", "网站url": "url", "链接": "url",
+    "category": "category", "folder": "category", "分类": "category", "所属分类": "category",
+    "description": "description", "网站描述": "description", "描述": "description",
+}
+
+# 去重时忽略的跟踪参数
+TRACKING_PARAMS = ("utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
+                   "spm", "from")
+
+
+def normalize_url(url):
+    """用于去重的 URL：协议和域名小写，去掉 www.、默认端口、结尾的 / 和跟踪参数"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/")
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                       if k.lower() not in TRACKING_PARAMS])
+    fragment = parts.fragment if parts.fragment not in ("", "/") else ""
+    # http 和 https 视为同一个网站
+    return urlunsplit(("https" if scheme == "http" else scheme, host, path, query, fragment))
+
+
+def is_importable(url):
+    return isinstance(url, str) and url.startswith(('http://', 'https://'))
+
+
+def _record(category, name, url, description=""):
+    return {"category": category, "name": name.strip(), "url": url.strip(),
+            "description": description.strip()}
+
+
+class BookmarkParser(HTMLParser):
+    """增量解析 Netscape 书签 HTML，文件夹（<H3>）名称作为书签的分类"""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.records = []
+        # 当前所在的文件夹，书签栏之外的顶层书签对应 None
+        self.folders = []
+        self._pending_folder = None
+        self._text = None
+        self._href = None
+        # 最近一个书签和它的 <DD> 描述
+        self._last = None
+        self._description = None
+
+    def _end_description(self):
+        # <DD> 没有结束标签，描述一直持续到下一个标签
+        if self._description is not None:
+            if self._last is not None:
+                self._last["description"] = "".join(self._description).strip()
+            self._description = None
+
+    def handle_starttag(self, tag, attrs):
+        self._end_description()
+        if tag == 'h3':
+            self._text = []
+            self._last = None
+        elif tag == 'a':
+            self._text = []
+            self._href = dict(attrs).get('href')
+        elif tag == 'dl':
+            # <H3> 之后的 <DL> 是该文件夹的内容
+            self.folders.append(self._pending_folder)
+            self._pending_folder = None
+            self._last = None
+        elif tag == 'dd':
+            self._description = []
+
+    def handle_endtag(self, tag):
+        self._end_description()
+        if tag == 'h3' and self._text is not None:
+            self._pending_folder = "".join(self._text).strip()
+            self._text = None
+        elif tag == 'a' and self._text is not None:
+            self._last = None
+            if is_importable(self._href):
+                category = next((f for f in reversed(self.folders) if f), None)
+                self._last = _record(category, "".join(self._text), self._href)
+                self.records.append(self._last)
+            self._text = None
+        elif tag == 'dl' and self.folders:
+            self.folders.pop()
+            self._last = None
+
+    def handle_data(self, data):
+        if self._text is not None:
+            self._text.append(data)
+        elif self._description is not None:
+            self._description.append(data)
+
+
+def parse_bookmarks(f):
+    parser = BookmarkParser()
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        parser.feed(chunk)
+        # 描述可能还没读完，最后一个书签留到下一块之后再返回
+        yield from parser.records[:-1]
+        del parser.records[:-1]
+    parser.close()
+    parser._end_description()
+    yield from parser.records
+
+
+def parse_csv(f):
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+    fields = [CSV_COLUMNS.get(column.strip().lower()) for column in header]
+    if "url" not in fields:
+        raise ValueError("CSV 文件中没有 url 列")
+    for row in reader:
+        values = {field: value for field, value in zip(fields, row) if field}
+        if is_importable(values.get("url", "").strip()):
+            yield _record(values.get("category") or None, values.get("name", ""),
+                          values["url"], values.get("description", ""))
+
+
+def parse_export_txt(f):
+    """读取 websites_export.txt 格式：每个网站两行，用一行减号分隔"""
+    website = {}
+    for line in f:
+        line = line.strip()
+        if line.startswith("网站名称:"):
+            website = {"name": line[len("网站名称:"):].strip()}
+        elif line.startswith("网站URL:"):
+            website["url"] = line[len("网站URL:"):].strip()
+        elif line.startswith("网站描述:"):
+            website["description"] = line[len("网站描述:"):].strip()
+        elif line.startswith("分类:"):
+            website["category"] = line[len("分类:"):].strip()
+        elif line == EXPORT_SEPARATOR:
+            if is_importable(website.get("url")):
+                yield _record(website.get("category"), website.get("name", ""), website["url"],
+                              website.get("description", ""))
+            website = {}
+    if is_importable(website.get("url")):
+        yield _record(website.get("category"), website.get("name", ""), website["url"],
+                      website.get("description", ""))
+
+
+def parse_data_json(f):
+    """与 data.json 结构相同的文件（需要整体解析，不是流式读取）"""
+    data = json.load(f)
+    for category in data.get("categories", []):
+        for website in category.get("websites", []):
+            if is_importable(website.get("url")):
+                yield _record(category.get("name"), website.get("name", ""), website["url"],
+                              website.get("description", ""))
+
+
+def parse_jsonl(f):
+    """每行一个网站的 JSON Lines（exporter 导出的格式），分类在 category 字段中"""
+    for line in f:
+        if not line.strip():
+            continue
+        website = json.loads(line)
+        if is_importable(website.get("url")):
+            yield _record(website.get("category"), website.get("name", ""), website["url"],
+                          website.get("description", ""))
+
+
+PARSERS = {
+    ".html": parse_bookmarks,
+    ".htm": parse_bookmarks,
+    ".csv": parse_csv,
+    ".json": parse_data_json,
+    ".jsonl": parse_jsonl,
+    ".txt": parse_export_txt,
+}
+
+
+def read_records(path):
+    """按扩展名选择解析器，逐条返回 {"category", "name", "url", "description"}"""
+    parser = PARSERS.get(os.path.splitext(path)[1].lower(), parse_export_txt)
+    # utf-8-sig 兼容 Excel 保存的带 BOM 的 CSV
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        yield from parser(f)
+
+
+def import_websites(data, index, records, default_category=DEFAULT_CATEGORY):
+    """把 records 加入 data，按规范化 URL 去重；没有分类的网站放入 default_category
+
+    直接修改 data 并同步更新 index（DataIndex），返回统计信息。
+    """
+    existing = {normalize_url(website["url"])
+                for category in data["categories"] for website in category["websites"]}
+    categories = {category["name"]: category for category in data["categories"]}
+    stats = {"added": 0, "duplicates": 0, "new_categories": []}
+    for record in records:
+        key = normalize_url(record["url"])
+        if key in existing:
+            stats["duplicates"] += 1
+            continue
+        existing.add(key)
+        name = record["category"] or default_category
+        category = categories.get(name)
+        if category is None:
+            category = {"id": index.next_category_id(), "name": name, "websites": []}
+            index.add_category(data["categories"], category)
+            categories[name] = category
+            stats["new_categories"].append(name)
+        index.add_website(category, {
+            "id": index.next_website_id(),
+            "name": record["name"] or urlsplit(record["url"]).hostname or record["url"],
+            "url": record["url"],
+            "description": record["description"]
+        })
+        stats["added"] += 1
+    return stats
@@ -0,0 +1,359 @@
+"""网站收藏的命令行工具，适合在 cron 等无界面环境中批量修改数据
+
+    python -m catalog_cli list
+    python -m catalog_cli add --category 学习资源 --name MDN --url https://developer.mozilla.org/
+    python -m catalog_cli delete 101
+    python -m catalog_cli move 101 --category 实用工具
+    python -m catalog_cli import bookmarks.html
+    python -m catalog_cli import websites_export.txt --category 学习资源
+    python -m catalog_cli export websites_export.txt
+    python -m catalog_cli check-links --report link_report.csv
+    python -m catalog_cli probe-sizes
+    python -m catalog_cli expiring --hours 48 --check
+    python -m catalog_cli favicons
+    python -m catalog_cli generate
+    python -m catalog_cli artifacts
+    python -m catalog_cli publish --repo username/repo
+
+与 WebsiteManager 共用 catalog_store 中的数据层，不导入任何 Qt 模块。
+requests、PyGithub 只在检查链接和发布时才导入，其余命令只加载标准库。
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+from bulk_import import DEFAULT_CATEGORY, read_records
+from catalog_store import BACKENDS, CatalogError, CatalogStore, StoreConflict
+from exporter import EXPORTERS, write_export
+from search_index import scan_websites
+
+
+def cmd_list(store, args):
+    categories = [store.find_category(args.category)] if args.category else store.categories
+    for category in categories:
+        print(f"[{category['id']}] {category['name']}")
+        for website in category["websites"]:
+            print(f"    {website['id']}\t{website['name']}\t{website['url']}")
+    return 0
+
+
+def cmd_search(store, args):
+    matches = store.search_index.search(args.query)
+    if matches is None:
+        matches = scan_websites(store.data, args.query)
+    for category in store.categories:
+        for website in category["websites"]:
+            if website["id"] in matches:
+                print(f"{website['id']}\t{category['name']}\t{website['name']}\t{website['url']}")
+    return 0
+
+
+def cmd_add_category(store, args):
+    category = store.add_category(args.name)
+    store.save()
+    print(f"已添加分类 {category['id']}: {category['name']}")
+    return 0
+
+
+def cmd_add(store, args):
+    website = store.add_website(args.category, args.name, args.url, args.description)
+    store.save()
+    print(f"已添加网站 {website['id']}: {website['name']}")
+    return 0
+
+
+def cmd_delete(store, args):
+    for website_id in args.ids:
+        website = store.remove_website(website_id)
+        print(f"已删除网站 {website_id}: {website['name']}")
+    store.save()
+    return 0
+
+
+def cmd_move(store, args):
+    if args.category:
+        store.move_website(args.id, args.category)
+    else:
+        store.shift_website(args.id, -1 if args.up else 1)
+    store.save()
+    _, category, pos = store.find_website(args.id)
+    print(f"网站 {args.id} 现在位于 {category['name']} 第 {pos + 1} 个")
+    return 0
+
+
+def cmd_import(store, args):
+    stats = store.import_websites(read_records(args.path), args.category or DEFAULT_CATEGORY)
+    store.save()
+    print(f"已导入 {stats['added']} 个网站，跳过 {stats['duplicates']} 个重复的链接")
+    if stats["new_categories"]:
+        print(f"新建分类: {', '.join(stats['new_categories'])}")
+    return 0
+
+
+def cmd_export(store, args):
+    count = write_export(store.data, args.path, args.format)
+    print(f"已导出 {count} 个网站到 {args.path}")
+    return 0
+
+
+def cmd_check_links(store, args):
+    from http_pool import DEFAULT_WORKERS
+    from link_checker import (DEFAULT_STATUS_FILE, check_links, collect_links, export_report,
+                              format_status, load_status, save_status)
+
+    links = collect_links(store.data, store.file_data, store.notification_data)
+    results = check_links([link["url"] for link in links], max_workers=args.workers or DEFAULT_WORKERS)
+    status_path = os.path.join(store.directory, DEFAULT_STATUS_FILE)
+    link_status = load_status(status_path)
+    link_status.update(results)
+    save_status(link_status, status_path)
+
+    broken = [link for link in links if link["url"] in results and not results[link["url"]]["ok"]]
+    for link in broken:
+        print(f"{link['store']}\t{link['id']}\t{link['name']}\t{link['url']}\t"
+              f"{format_status(results[link['url']])}")
+    if args.report:
+        export_report(links, results, args.report)
+    print(f"链接检查完成: 共 {len(results)} 个，失效 {len(broken)} 个", file=sys.stderr)
+    # 有失效链接时返回非零，便于在 cron 中发送提醒
+    return 1 if broken else 0
+
+
+def cmd_probe_sizes(store, args):
+    from file_size import apply_sizes, format_size
+    from http_pool import DEFAULT_WORKERS
+    from size_probe import probe_sizes
+
+    files = store.file_data["files"]
+    results = probe_sizes([f.get("downloadUrl") for f in files], max_workers=args.workers or DEFAULT_WORKERS)
+    changed = apply_sizes(files, results)
+    if changed:
+        store.dirty.add("files")
+        store.save()
+    for file_info in files:
+        if file_info["id"] in changed:
+            print(f"{file_info['id']}\t{file_info['name']}\t{format_size(file_info['size'])}")
+    failed = [url for url, size in results.items() if size is None]
+    print(f"文件大小获取完成: 更新 {len(changed)} 个，失败 {len(failed)} 个", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def cmd_expiring(store, args):
+    from link_expiry import ExpiryIndex, format_expiry, needs_check, refresh_reason
+    from link_status import DEFAULT_STATUS_FILE, load_status, save_status
+
+    files = {f["id"]: f for f in store.file_data["files"]}
+    expiry_index = ExpiryIndex()
+    expiry_index.rebuild(files.values())
+    now = time.time()
+    file_ids = expiry_index.expiring(now + args.hours * 3600)
+    status_path = os.path.join(store.directory, DEFAULT_STATUS_FILE)
+    link_status = load_status(status_path)
+    if args.check:
+        from http_pool import DEFAULT_WORKERS
+        from link_checker import check_links
+        urls = [files[file_id]["downloadUrl"] for file_id in file_ids
+                if needs_check(expiry_index.get(file_id), link_status.get(files[file_id]["downloadUrl"]), now)]
+        if urls:
+            link_status.update(check_links(urls, max_workers=args.workers or DEFAULT_WORKERS))
+            save_status(link_status, status_path)
+
+    queued = 0
+    for file_id in file_ids:
+        file_info = files[file_id]
+        expires_at = expiry_index.get(file_id)
+        reason = refresh_reason(expires_at, link_status.get(file_info["downloadUrl"]), now,
+                                args.hours * 3600)
+        queued += 1 if reason else 0
+        print(f"{file_id}\t{file_info['name']}\t{format_expiry(expires_at, now, args.hours * 3600)}\t{reason or ''}")
+    print(f"共 {len(expiry_index)} 个带有效期的下载链接，{queued} 个需要重新生成", file=sys.stderr)
+    # 有需要更新的链接时返回非零，便于在 cron 中发送提醒
+    return 1 if queued else 0
+
+
+def cmd_favicons(store, args):
+    from favicon_cache import DEFAULT_CACHE_DIR, ICON_DIR, FaviconCache, build_sprite, collect_icons
+    from favicon_fetch import harvest_favicons
+    from http_pool import DEFAULT_WORKERS
+    from metadata_refresh import iter_websites
+
+    websites = list(iter_websites(store.data))
+    icon_dir = os.path.join(store.directory, ICON_DIR)
+    cache = FaviconCache(os.path.join(store.directory, DEFAULT_CACHE_DIR))
+    stats = harvest_favicons(websites, cache, icon_dir, max_workers=args.workers or DEFAULT_WORKERS,
+                             refresh=args.refresh)
+    # 已删除的网站不再保留图标
+    cache.prune(website["url"] for website in websites)
+    cache.save()
+    sprite_map, sprite_stats = build_sprite(cache, collect_icons(websites, cache, icon_dir), store.directory)
+
+    for url, error in stats["failed"]:
+        print(f"{url}\t{error}", file=sys.stderr)
+    print(f"图标获取完成: 下载 {stats['fetched']} 个，未变化 {stats['unchanged']} 个，"
+          f"跳过 {stats['skipped']} 个，失败 {len(stats['failed'])} 个", file=sys.stderr)
+    print(f"雪碧图 {sprite_map['image'] or '无'}: {len(sprite_map['icons'])} 个网站，"
+          f"{sprite_stats['icons']} 个不同的图标")
+    # 很多网站本来就没有图标，获取失败时显示默认图标，不算错误
+    return 0
+
+
+def cmd_generate(store, args):
+    generated = store.generate()
+    if generated:
+        files = store.store_files()
+        print(f"已生成: {', '.join(files[name][0] for name in generated)}")
+    else:
+        print("JSON 文件已是最新")
+    return 0
+
+
+def cmd_artifacts(store, args):
+    manifest, stats = store.build_artifacts()
+    for name, entry in manifest["files"].items():
+        sizes = " / ".join(f"{label} {entry[key]}" for key, label in
+                           (("size", "紧凑"), ("gzip", "gzip"), ("br", "brotli")) if key in entry)
+        print(f"{name} -> {entry['path']}（{sizes} 字节）")
+    print(f"新生成 {len(stats['written'])} 个，未变化 {len(stats['unchanged'])} 个，"
+          f"删除旧文件 {len(stats['removed'])} 个")
+    return 0
+
+
+def cmd_publish(store, args):
+    from github_publish import DEFAULT_MESSAGE, publish_files
+    from favicon_cache import SPRITE_PREFIX
+    from notification_feed import FEED_DIR
+    from publish_artifacts import ARTIFACT_DIR, artifact_paths
+
+    token = args.token or os.environ.get("GITHUB_TOKEN")
+    if not token:
+        raise CatalogError("请用 --token 或环境变量 GITHUB_TOKEN 提供GitHub访问令牌")
+    # 发布的是静态页面读取的 JSON 文件、通知分页、dist/ 中的发布版本和图标雪碧图，先从存储后端生成
+    store.build_artifacts()
+    paths = [path for path in store.static_paths() if os.path.exists(path)]
+    paths += store.feed_paths() + artifact_paths(store.directory) + store.sprite_paths()
+    files = {}
+    for path in paths:
+        with open(path, 'rb') as f:
+            files[os.path.relpath(path, store.directory).replace(os.sep, '/')] = f.read()
+    result = publish_files(token, args.repo, files, message=args.message or DEFAULT_MESSAGE,
+                           branch=args.branch, base_url=args.base_url,
+                           prune=(ARTIFACT_DIR + "/", FEED_DIR + "/", SPRITE_PREFIX))
+    if result["commit"] is None:
+        print("远端数据已是最新，无需上传")
+    else:
+        print(f"已上传: {', '.join(result['changed'])}\n提交: {result['commit'][:7]}")
+        if result["deleted"]:
+            print(f"已删除: {', '.join(result['deleted'])}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m catalog_cli", description="网站收藏命令行工具")
+    parser.add_argument("--dir", default=".", help="数据文件所在目录（默认当前目录）")
+    parser.add_argument("--backend", choices=BACKENDS,
+                        help="存储后端（默认读取环境变量 CATALOG_BACKEND，未设置时为 sqlite）")
+    parser.add_argument("--on-conflict", choices=("json", "database"),
+                        help="JSON 文件在外部被修改、数据库中也有未生成的修改时：json 导入文件，"
+                             "database 保留数据库中的内容（下次生成时覆盖文件）；默认报错退出")
+    commands = parser.add_subparsers(dest="command", required=True)
+    # 只读取数据的命令设置 readonly=True，不创建也不修改 catalog.db
+    parser.set_defaults(readonly=False)
+
+    p = commands.add_parser("list", help="列出分类和网站")
+    p.add_argument("--category", help="只列出该分类（id 或名称）")
+    p.set_defaults(func=cmd_list, readonly=True)
+
+    p = commands.add_parser("search", help="搜索网站")
+    p.add_argument("query")
+    p.set_defaults(func=cmd_search, readonly=True)
+
+    p = commands.add_parser("add-category", help="添加分类")
+    p.add_argument("name")
+    p.set_defaults(func=cmd_add_category)
+
+    p = commands.add_parser("add", help="添加网站")
+    p.add_argument("--category", required=True, help="分类 id 或名称")
+    p.add_argument("--name", required=True)
+    p.add_argument("--url", required=True)
+    p.add_argument("--description", default="")
+    p.set_defaults(func=cmd_add)
+
+    p = commands.add_parser("delete", help="删除网站")
+    p.add_argument("ids", type=int, nargs="+", metavar="id")
+    p.set_defaults(func=cmd_delete)
+
+    p = commands.add_parser("move", help="移动网站到其他分类，或在分类内上移/下移")
+    p.add_argument("id", type=int)
+    group = p.add_mutually_exclusive_group(required=True)
+    group.add_argument("--category", help="目标分类 id 或名称")
+    group.add_argument("--up", action="store_true")
+    group.add_argument("--down", action="store_true")
+    p.set_defaults(func=cmd_move)
+
+    p = commands.add_parser("import", help="导入网站（书签 HTML、CSV、websites_export.txt 格式或 data.json 结构），跳过重复链接")
+    p.add_argument("path")
+    p.add_argument("--category", help=f"没有分类信息的网站导入到该分类（默认“{DEFAULT_CATEGORY}”），不存在时自动创建")
+    p.set_defaults(func=cmd_import)
+
+    p = commands.add_parser("export", help="导出网站（txt、CSV、书签 HTML、JSON Lines 或 JSON）")
+    p.add_argument("path")
+    p.add_argument("--format", choices=sorted(EXPORTERS), help="默认按扩展名选择")
+    p.set_defaults(func=cmd_export, readonly=True)
+
+    p = commands.add_parser("check-links", help="检查所有链接，有失效链接时退出码为 1")
+    p.add_argument("--report", help="导出检查报告（.csv 或 .json）")
+    p.add_argument("--workers", type=int, help="并发数（默认 16）")
+    p.set_defaults(func=cmd_check_links)
+
+    p = commands.add_parser("probe-sizes", help="根据下载链接获取所有文件的大小（字节数），有获取失败的文件时退出码为 1")
+    p.add_argument("--workers", type=int, help="并发数（默认 16）")
+    p.set_defaults(func=cmd_probe_sizes)
+
+    p = commands.add_parser("expiring", help="列出已过期或即将过期的下载链接，有需要重新生成的链接时退出码为 1")
+    p.add_argument("--hours", type=float, default=24, help="多少小时内过期视为即将过期（默认 24）")
+    p.add_argument("--check", action="store_true", help="并发检查这些链接，结果与 check-links 共用")
+    p.add_argument("--workers", type=int, help="并发数（默认 16）")
+    p.set_defaults(func=cmd_expiring)
+
+    p = commands.add_parser("favicons", help="并发获取所有网站的图标，生成 web_ico/ 中的雪碧图和 sprite.json")
+    p.add_argument("--refresh", action="store_true", help="忽略 7 天内获取过的缓存，全部重新获取")
+    p.add_argument("--workers", type=int, help="并发数（默认 16）")
+    p.set_defaults(func=cmd_favicons)
+
+    p = commands.add_parser("generate", help="从数据库重新生成 data.json、file.json、notification.json")
+    p.set_defaults(func=cmd_generate)
+
+    p = commands.add_parser("artifacts", help="在 dist/ 中生成压缩、带内容哈希的数据文件和 manifest.json")
+    p.set_defaults(func=cmd_artifacts)
+
+    p = commands.add_parser("publish", help="把数据文件作为一次提交发布到GitHub")
+    p.add_argument("--repo", required=True, help="仓库名称，格式: username/repo_name")
+    p.add_argument("--token", help="GitHub个人访问令牌，默认读取环境变量 GITHUB_TOKEN")
+    p.add_argument("--branch")
+    p.add_argument("--message", help="提交说明")
+    p.add_argument("--base-url", help="GitHub Enterprise 的 API 地址")
+    p.set_defaults(func=cmd_publish)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    store = CatalogStore(args.dir, args.backend, args.on_conflict, args.readonly)
+    try:
+        store.load()
+        return args.func(store, args)
+    except StoreConflict as e:
+        print(f"错误: {e}，请用 --on-conflict json 导入该文件或 --on-conflict database 保留数据库中的内容",
+              file=sys.stderr)
+        return 2
+    except (CatalogError, OSError, ValueError, sqlite3.Error) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 2
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,309 @@
+"""网站、文件、通知三个数据文件的读写
+
+WebsiteManager 和命令行工具 catalog_cli 共用这里的读取和保存逻辑，本模块不依赖 Qt，
+也不导入 requests、PyGithub，命令行工具启动时只需要加载标准库。
+
+数据的存储后端可以替换：
+- sqlite（默认）：数据保存在 catalog.db 中，见 sqlite_store，JSON 文件由 generate_static 生成；
+- json：三个 JSON 文件本身就是存储，每次保存都重写整个文件。
+用环境变量 CATALOG_BACKEND 或命令行参数 --backend 选择。
+"""
+import json
+import os
+
+from bulk_import import DEFAULT_CATEGORY, import_websites
+from data_index import DataIndex
+from notification_feed import feed_dir, feed_paths, write_feed
+from search_index import DEFAULT_INDEX_FILE, SearchIndex
+from storage import atomic_write_bytes, atomic_write_json
+
+DATA_FILE = 'data.json'
+FILE_DATA_FILE = 'file.json'
+NOTIFICATION_FILE = 'notification.json'
+
+DEFAULT_BACKEND = "sqlite"
+BACKENDS = ("sqlite", "json")
+
+# 存储名 -> (默认文件名, 列表键)
+STORES = {
+    "data": (DATA_FILE, "categories"),
+    "files": (FILE_DATA_FILE, "files"),
+    "notifications": (NOTIFICATION_FILE, "notifications"),
+}
+
+
+class CatalogError(Exception):
+    """命令行操作的参数不合法，例如 id 不存在"""
+
+
+class StoreConflict(CatalogError):
+    """JSON 文件在外部被修改（例如 git pull），而数据库中也有还没生成到该文件的修改
+
+    两边都有修改时不能自动选择：直接读取数据库，下次生成会覆盖外部的修改；直接导入文件，
+    数据库中的修改会丢失。调用方询问用户后用 on_conflict 重新读取。
+    """
+    def __init__(self, store, path):
+        super().__init__(f"{os.path.basename(path)} 在外部被修改，数据库中也有尚未生成到该文件的修改")
+        self.store = store
+        self.path = path
+
+
+def load_store(path, key):
+    """读取一个数据文件，文件不存在时返回空结构；JSON 格式错误时抛出异常"""
+    if not os.path.exists(path):
+        return {key: []}
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    # 确保数据结构存在
+    if key not in data:
+        data[key] = []
+    return data
+
+
+class JsonBackend:
+    """直接读写 JSON 文件，文件本身就是静态页面使用的数据，不需要另外生成"""
+    name = "json"
+
+    def load(self, store, path, on_conflict=None):
+        return load_store(path, STORES[store][1])
+
+    def save(self, store, path, data):
+        # 先写临时文件再原子替换，写入中途崩溃不会留下半个文件
+        atomic_write_json(path, data)
+
+    def generate(self, store, path):
+        return False
+
+    def close(self):
+        pass
+
+
+def open_backend(name=None, directory='.', readonly=False):
+    """按名称打开存储后端，name 为 None 时使用环境变量 CATALOG_BACKEND 或默认后端
+
+    readonly 为 True 时不修改任何文件：数据库还不存在时直接读取 JSON 文件，不创建 catalog.db。
+    """
+    name = name or os.environ.get("CATALOG_BACKEND") or DEFAULT_BACKEND
+    if name == "json":
+        return JsonBackend()
+    if name == "sqlite":
+        from sqlite_store import DEFAULT_DB_FILE, SqliteBackend
+        path = os.path.join(directory, DEFAULT_DB_FILE)
+        if readonly and not os.path.exists(path):
+            return JsonBackend()
+        return SqliteBackend(path, readonly)
+    raise CatalogError(f"未知的存储后端: {name}")
+
+
+def write_search_index(path, search_index):
+    # 紧凑格式，减小移动端下载的大小
+    atomic_write_bytes(path, json.dumps(search_index.to_json(), ensure_ascii=False,
+                                        separators=(',', ':')).encode('utf-8'))
+
+
+def save_stores(store_files, dirty, search_index=None, search_index_file=DEFAULT_INDEX_FILE,
+                backend=None):
+    """把 dirty 集合中的存储写入后端（默认直接写 JSON 文件）
+
+    store_files 为 {存储名: (文件路径, 数据)}。每写完一个存储就把它从 dirty 中移除，
+    中途出错时没写成功的存储仍保留在 dirty 中。JSON 后端写入 data.json 时同时生成搜索索引，
+    写入 notification.json 时同时生成通知分页，其他后端的由 generate_static 生成。
+    返回已写入的存储名列表。
+    """
+    backend = backend or JsonBackend()
+    written = []
+    for store in sorted(dirty):
+        path, data = store_files[store]
+        backend.save(store, path, data)
+        if store == "data" and search_index is not None and backend.name == "json":
+            write_search_index(search_index_file, search_index)
+        if store == "notifications" and backend.name == "json":
+            write_feed(path, data)
+        dirty.discard(store)
+        written.append(store)
+    return written
+
+
+def generate_static(backend, store_files, search_index=None, search_index_file=DEFAULT_INDEX_FILE):
+    """从后端重新生成有变化的 JSON 文件（以及 data.json 对应的搜索索引），返回生成的存储名列表
+
+    通知分页每次都检查一遍，只重写有变化的分页，缺失时也会补上；没有通知并且还没有分页目录时
+    （例如在空目录中导入网站）不创建分页目录。
+    """
+    generated = []
+    for store in sorted(store_files):
+        path, data = store_files[store]
+        if backend.generate(store, path):
+            if store == "data" and search_index is not None:
+                write_search_index(search_index_file, search_index)
+            generated.append(store)
+        if store == "notifications" and (data.get("notifications") or os.path.isdir(feed_dir(path))):
+            write_feed(path, data)
+    return generated
+
+
+class CatalogStore:
+    """一个目录中的三个数据文件及其索引"""
+    def __init__(self, directory='.', backend=None, on_conflict=None, readonly=False):
+        self.directory = directory
+        # 后端名称，None 表示按环境变量或默认值选择
+        self.backend_name = backend
+        # JSON 文件和数据库都有修改时的处理方式，见 SqliteBackend.load
+        self.on_conflict = on_conflict
+        # 只读取不保存的命令（list、search 等）不创建也不修改数据库
+        self.readonly = readonly
+        self.backend = None
+        self.paths = {store: os.path.join(directory, name) for store, (name, _) in STORES.items()}
+        self.search_index_file = os.path.join(directory, DEFAULT_INDEX_FILE)
+        self.data = {"categories": []}
+        self.file_data = {"files": []}
+        self.notification_data = {"notifications": []}
+        self.index = DataIndex()
+        self.search_index = SearchIndex()
+        self.dirty = set()
+
+    def load(self):
+        if self.backend is None:
+            self.backend = open_backend(self.backend_name, self.directory, self.readonly)
+        self.data = self.backend.load("data", self.paths["data"], self.on_conflict)
+        self.file_data = self.backend.load("files", self.paths["files"], self.on_conflict)
+        self.notification_data = self.backend.load("notifications", self.paths["notifications"],
+                                                   self.on_conflict)
+        self.index.rebuild_data(self.data)
+        self.index.rebuild_files(self.file_data)
+        self.index.rebuild_notifications(self.notification_data)
+        self.search_index.rebuild(self.data)
+        self.dirty.clear()
+        return self
+
+    def store_files(self):
+        # 存储名 -> (文件路径, 数据)
+        return {
+            "data": (self.paths["data"], self.data),
+            "files": (self.paths["files"], self.file_data),
+            "notifications": (self.paths["notifications"], self.notification_data),
+        }
+
+    def save(self):
+        """只写入有修改的数据，再生成静态页面使用的 JSON 文件"""
+        written = save_stores(self.store_files(), self.dirty, self.search_index,
+                              self.search_index_file, self.backend)
+        self.generate()
+        return written
+
+    def generate(self):
+        return generate_static(self.backend, self.store_files(), self.search_index,
+                               self.search_index_file)
+
+    def static_paths(self):
+        """静态页面读取的数据文件"""
+        return [path for path, _ in self.store_files().values()] + [self.search_index_file]
+
+    def feed_paths(self):
+        """通知分页目录中的文件"""
+        return feed_paths(self.paths["notifications"])
+
+    def build_artifacts(self):
+        """生成 dist/ 中压缩、带内容哈希的发布文件，返回 (manifest, stats)"""
+        from publish_artifacts import build_artifacts
+        self.generate()
+        return build_artifacts(self.static_paths(), self.directory)
+
+    def sprite_paths(self):
+        """web_ico/ 中的网站图标雪碧图和 sprite.json（由 catalog_cli favicons 生成）"""
+        from favicon_cache import sprite_paths
+        return sprite_paths(self.directory)
+
+    def close(self):
+        if self.backend is not None:
+            self.backend.close()
+            self.backend = None
+
+    # ---------- 分类 ----------
+
+    @property
+    def categories(self):
+        return self.data["categories"]
+
+    def find_category(self, key):
+        """按 id 或名称查找分类，找不到时抛出 CatalogError"""
+        if isinstance(key, int) or str(key).isdigit():
+            category = self.index.get_category(int(key))
+            if category is not None:
+                return category
+        for category in self.categories:
+            if category["name"] == key:
+                return category
+        raise CatalogError(f"找不到分类: {key}")
+
+    def add_category(self, name):
+        for category in self.categories:
+            if category["name"] == name:
+                raise CatalogError(f"分类已存在: {name}")
+        category = {"id": self.index.next_category_id(), "name": name, "websites": []}
+        self.index.add_category(self.categories, category)
+        self.dirty.add("data")
+        return category
+
+    def remove_category(self, key):
+        category = self.find_category(key)
+        self.index.remove_category(self.categories, category["id"])
+        self.search_index.remove_category(category)
+        self.dirty.add("data")
+        return category
+
+    # ---------- 网站 ----------
+
+    def find_website(self, website_id):
+        website, category, pos = self.index.find_website(website_id)
+        if website is None:
+            raise CatalogError(f"找不到网站: {website_id}")
+        return website, category, pos
+
+    def add_website(self, category_key, name, url, description=""):
+        if not url.startswith(('http://', 'https://')):
+            raise CatalogError("URL必须以http://或https://开头")
+        category = self.find_category(category_key)
+        website = {
+            "id": self.index.next_website_id(),
+            "name": name,
+            "url": url,
+            "description": description
+        }
+        self.index.add_website(category, website)
+        self.search_index.add_website(website, category["name"])
+        self.dirty.add("data")
+        return website
+
+    def remove_website(self, website_id):
+        website, _, _ = self.find_website(website_id)
+        self.index.remove_website(website_id)
+        self.search_index.remove_website(website_id)
+        self.dirty.add("data")
+        return website
+
+    def move_website(self, website_id, category_key):
+        """移动到另一个分类的末尾"""
+        self.find_website(website_id)
+        category = self.find_category(category_key)
+        website = self.index.move_website(website_id, category)
+        self.search_index.update_website(website, category["name"])
+        self.dirty.add("data")
+        return website
+
+    def shift_website(self, website_id, offset):
+        """在分类内上移（offset=-1）或下移（offset=1）"""
+        _, category, pos = self.find_website(website_id)
+        other = pos + offset
+        if not 0 <= other < len(category["websites"]):
+            raise CatalogError("已到达分类边界，无法移动")
+        self.index.swap_websites(category, pos, other)
+        self.dirty.add("data")
+
+    def import_websites(self, records, default_category=DEFAULT_CATEGORY):
+        """批量导入，按规范化 URL 去重，返回统计信息"""
+        stats = import_websites(self.data, self.index, records, default_category)
+        if stats["added"]:
+            self.search_index.rebuild(self.data)
+            self.dirty.add("data")
+        return stats
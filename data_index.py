@@ -0,0 +1,230 @@
+"""网站、分类、文件、通知的 id 索引
+
+WebsiteManager 的各个操作都需要按 id 找到一条记录。原来的做法是每次都遍历
+所有分类和所有网站，数据量一大每次点击都是一次全量扫描。这里维护一个
+id -> (所属分类, 位置) 的内存索引，在添加、移动、删除和重新加载时同步更新，
+查找和上下移动的开销与数据量无关。
+"""
+
+
+class DataIndex:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.clear_data()
+        self.clear_files()
+        self.clear_notifications()
+
+    def clear_data(self):
+        # 分类 id -> [分类, 在 categories 列表中的位置]
+        self.categories = {}
+        # 网站 id -> [所属分类, 在分类 websites 列表中的位置]
+        self.websites = {}
+        self.max_category_id = 0
+        self.max_website_id = 0
+
+    def clear_files(self):
+        # 文件 id -> [文件, 位置]
+        self.files = {}
+        self.max_file_id = 0
+
+    def clear_notifications(self):
+        # 通知 id -> [通知, 位置]
+        self.notifications = {}
+        self.max_notification_id = 0
+
+    # ---------- 重建 ----------
+
+    def rebuild_data(self, data):
+        """根据 data.json 的内容重建分类和网站索引"""
+        self.clear_data()
+        for pos, category in enumerate(data.get("categories", [])):
+            self.categories[category["id"]] = [category, pos]
+            self.max_category_id = max(self.max_category_id, category["id"])
+            self._index_websites(category)
+
+    def rebuild_files(self, file_data):
+        """根据 file.json 的内容重建文件索引"""
+        self.clear_files()
+        for pos, file_info in enumerate(file_data.get("files", [])):
+            self.files[file_info["id"]] = [file_info, pos]
+            self.max_file_id = max(self.max_file_id, file_info["id"])
+
+    def rebuild_notifications(self, notification_data):
+        """根据 notification.json 的内容重建通知索引"""
+        self.clear_notifications()
+        for pos, notification in enumerate(notification_data.get("notifications", [])):
+            self.notifications[notification["id"]] = [notification, pos]
+            self.max_notification_id = max(self.max_notification_id, notification["id"])
+
+    def _index_websites(self, category, start=0):
+        websites = category.setdefault("websites", [])
+        for pos in range(start, len(websites)):
+            website = websites[pos]
+            self.websites[website["id"]] = [category, pos]
+            self.max_website_id = max(self.max_website_id, website["id"])
+
+    @staticmethod
+    def _reindex_list(index, items, start):
+        # 删除记录后，其后的记录位置整体前移
+        for pos in range(start, len(items)):
+            index[items[pos]["id"]][1] = pos
+
+    # ---------- 分类 ----------
+
+    def get_category(self, category_id):
+        entry = self.categories.get(category_id)
+        return entry[0] if entry else None
+
+    def category_position(self, category_id):
+        entry = self.categories.get(category_id)
+        return entry[1] if entry else -1
+
+    def next_category_id(self):
+        return self.max_category_id + 1
+
+    def add_category(self, categories, category):
+        categories.append(category)
+        self.categories[category["id"]] = [category, len(categories) - 1]
+        self.max_category_id = max(self.max_category_id, category["id"])
+        self._index_websites(category)
+
+    def insert_category(self, categories, pos, category):
+        """把分类（连同其中的网站）插入到 pos 位置"""
+        categories.insert(pos, category)
+        self.categories[category["id"]] = [category, pos]
+        self._reindex_list(self.categories, categories, pos + 1)
+        self.max_category_id = max(self.max_category_id, category["id"])
+        self._index_websites(category)
+
+    def remove_category(self, categories, category_id):
+        entry = self.categories.pop(category_id, None)
+        if entry is None:
+            return None
+        category, pos = entry
+        del categories[pos]
+        for website in category.get("websites", []):
+            self.websites.pop(website["id"], None)
+        self._reindex_list(self.categories, categories, pos)
+        return category
+
+    def swap_categories(self, categories, i, j):
+        categories[i], categories[j] = categories[j], categories[i]
+        self.categories[categories[i]["id"]][1] = i
+        self.categories[categories[j]["id"]][1] = j
+
+    # ---------- 网站 ----------
+
+    def find_website(self, website_id):
+        """返回 (网站, 所属分类, 位置)，找不到时返回 (None, None, -1)"""
+        entry = self.websites.get(website_id)
+        if entry is None:
+            return None, None, -1
+        category, pos = entry
+        return category["websites"][pos], category, pos
+
+    def next_website_id(self):
+        return self.max_website_id + 1
+
+    def add_website(self, category, website):
+        websites = category.setdefault("websites", [])
+        websites.append(website)
+        self.websites[website["id"]] = [category, len(websites) - 1]
+        self.max_website_id = max(self.max_website_id, website["id"])
+
+    def insert_website(self, category, pos, website):
+        websites = category.setdefault("websites", [])
+        websites.insert(pos, website)
+        self.websites[website["id"]] = [category, pos]
+        self._reindex_list(self.websites, websites, pos + 1)
+        self.max_website_id = max(self.max_website_id, website["id"])
+
+    def remove_website(self, website_id):
+        entry = self.websites.pop(website_id, None)
+        if entry is None:
+            return None
+        category, pos = entry
+        websites = category["websites"]
+        website = websites.pop(pos)
+        self._reindex_list(self.websites, websites, pos)
+        return website
+
+    def swap_websites(self, category, i, j):
+        websites = category["websites"]
+        websites[i], websites[j] = websites[j], websites[i]
+        self.websites[websites[i]["id"]][1] = i
+        self.websites[websites[j]["id"]][1] = j
+
+    def move_website(self, website_id, target_category):
+        """把网站移动到另一个分类的末尾"""
+        website = self.remove_website(website_id)
+        if website is not None:
+            self.add_website(target_category, website)
+        return website
+
+    # ---------- 文件 ----------
+
+    def find_file(self, file_id):
+        entry = self.files.get(file_id)
+        return entry[0] if entry else None
+
+    def file_position(self, file_id):
+        entry = self.files.get(file_id)
+        return entry[1] if entry else -1
+
+    def next_file_id(self):
+        return self.max_file_id + 1
+
+    def add_file(self, files, file_info):
+        files.append(file_info)
+        self.files[file_info["id"]] = [file_info, len(files) - 1]
+        self.max_file_id = max(self.max_file_id, file_info["id"])
+
+    def insert_file(self, files, pos, file_info):
+        files.insert(pos, file_info)
+        self.files[file_info["id"]] = [file_info, pos]
+        self._reindex_list(self.files, files, pos + 1)
+        self.max_file_id = max(self.max_file_id, file_info["id"])
+
+    def remove_file(self, files, file_id):
+        entry = self.files.pop(file_id, None)
+        if entry is None:
+            return None
+        file_info, pos = entry
+        del files[pos]
+        self._reindex_list(self.files, files, pos)
+        return file_info
+
+    # ---------- 通知 ----------
+
+    def find_notification(self, notification_id):
+        entry = self.notifications.get(notification_id)
+        return entry[0] if entry else None
+
+    def notification_position(self, notification_id):
+        entry = self.notifications.get(notification_id)
+        return entry[1] if entry else -1
+
+    def next_notification_id(self):
+        return self.max_notification_id + 1
+
+    def add_notification(self, notifications, notification):
+        notifications.append(notification)
+        self.notifications[notification["id"]] = [notification, len(notifications) - 1]
+        self.max_notification_id = max(self.max_notification_id, notification["id"])
+
+    def insert_notification(self, notifications, pos, notification):
+        notifications.insert(pos, notification)
+        self.notifications[notification["id"]] = [notification, pos]
+        self._reindex_list(self.notifications, notifications, pos + 1)
+        self.max_notification_id = max(self.max_notification_id, notification["id"])
+
+    def remove_notification(self, notifications, notification_id):
+        entry = self.notifications.pop(notification_id, None)
+        if entry is None:
+            return None
+        notification, pos = entry
+        del notifications[pos]
+        self._reindex_list(self.notifications, notifications, pos)
+        return notification
@@ -0,0 +1,118 @@
+// 按 dist/manifest.json 读取发布版本的数据文件（publish_artifacts.py 生成）
+// 带内容哈希的文件内容不会变化，可以一直使用浏览器缓存；manifest 很小，每次都向服务器确认。
+// 没有 manifest（例如本地直接打开页面）或读取失败时，退回读取原来的 JSON 文件。
+let dataManifest = null;
+
+function loadDataManifest() {
+    if (!dataManifest) {
+        dataManifest = fetch('dist/manifest.json', { cache: 'no-cache' })
+            .then(response => response.ok ? response.json() : null)
+            .then(manifest => (manifest && manifest.version === 1) ? manifest : null)
+            .catch(() => null);
+    }
+    return dataManifest;
+}
+
+async function fetchDataFile(name) {
+    const manifest = await loadDataManifest();
+    const entry = manifest && manifest.files[name];
+    if (entry) {
+        try {
+            const response = await fetch(entry.path, { cache: 'force-cache' });
+            if (response.ok) {
+                return await response.json();
+            }
+        } catch (error) {
+            console.error(`读取 ${entry.path} 失败，改为读取 ${name}:`, error);
+        }
+    }
+    const response = await fetch(name);
+    return response.json();
+}
+
+// 通知分页（notification_feed.py 生成）：head.json 只有置顶通知的 id、最新的 id 和总数，
+// 通知按 id 分成固定大小的页，用 ?v=哈希 请求，内容不变的页直接使用浏览器缓存。
+// 没有 head.json 时读取完整的 notification.json。
+let notificationHead = null;
+
+function loadNotificationHead() {
+    if (!notificationHead) {
+        notificationHead = fetch('notifications/head.json', { cache: 'no-cache' })
+            .then(response => response.ok ? response.json() : null)
+            .then(head => (head && head.version === 1) ? head : null)
+            .catch(() => null);
+    }
+    return notificationHead;
+}
+
+async function fetchNotificationPage(entry) {
+    const response = await fetch(`notifications/page-${entry.page}.json?v=${entry.sha}`);
+    const data = await response.json();
+    return data.notifications;
+}
+
+// 读取最新的 pageCount 页以及置顶通知所在的页
+// 返回 { notifications, hasMore }，置顶的通知在前，其余按从新到旧排列
+async function loadNotificationFeed(pageCount = 1) {
+    const head = await loadNotificationHead();
+    if (!head) {
+        const data = await fetchDataFile('notification.json');
+        const notifications = data.notifications || [];
+        return {
+            notifications: [...notifications.filter(n => n.pinned), ...notifications.filter(n => !n.pinned)],
+            hasMore: false
+        };
+    }
+    // head.pages 按页号从大到小排列
+    const pageOf = id => Math.floor(Math.max(id - 1, 0) / head.page_size);
+    const recentPages = new Set(head.pages.slice(0, pageCount).map(entry => entry.page));
+    const pinnedPages = new Set(head.pinned.map(pageOf));
+    const pages = await Promise.all(head.pages
+        .filter(entry => recentPages.has(entry.page) || pinnedPages.has(entry.page))
+        .map(fetchNotificationPage));
+    const loaded = [].concat(...pages);
+    return {
+        notifications: [
+            ...loaded.filter(n => n.pinned),
+            ...loaded.filter(n => !n.pinned && recentPages.has(pageOf(n.id)))
+        ],
+        hasMore: head.pages.length > pageCount
+    };
+}
+
+// 是否有未读通知：置顶通知或最新的一条通知没有读过
+async function hasUnreadNotifications(readNotifications) {
+    const head = await loadNotificationHead();
+    if (!head) {
+        const data = await fetchDataFile('notification.json');
+        return (data.notifications || []).some(n => !readNotifications.includes(n.id));
+    }
+    return head.pinned.some(id => !readNotifications.includes(id)) ||
+        (head.latest_id !== null && !readNotifications.includes(head.latest_id));
+}
+
+// 网站图标雪碧图（favicon_cache.py 生成）：sprite.json 记录每个网站 id 的图标在图中的位置，
+// 所有图标只需要下载一张图片。没有 sprite.json 时返回 null，仍然按网站名称读取 web_ico/ 中的图标。
+let iconSprite = null;
+
+function loadIconSprite() {
+    if (!iconSprite) {
+        iconSprite = fetch('web_ico/sprite.json', { cache: 'no-cache' })
+            .then(response => response.ok ? response.json() : null)
+            .then(sprite => (sprite && sprite.version === 1 && sprite.image) ? sprite : null)
+            .catch(() => null);
+    }
+    return iconSprite;
+}
+
+// 雪碧图中某个图标的背景样式，用百分比表示，与图标显示的大小无关；没有该网站的图标时返回 null
+function spriteIconStyle(sprite, websiteId) {
+    const position = sprite && sprite.icons[websiteId];
+    if (!position) {
+        return null;
+    }
+    const percent = (offset, total) => total > sprite.size ? offset / (total - sprite.size) * 100 : 0;
+    return `background-image: url('${sprite.image}'); ` +
+        `background-size: ${sprite.width / sprite.size * 100}% ${sprite.height / sprite.size * 100}%; ` +
+        `background-position: ${percent(position[0], sprite.width)}% ${percent(position[1], sprite.height)}%;`;
+}
@@ -0,0 +1,116 @@
+"""导出网站列表
+
+每种格式都是一个生成器，逐个网站产生输出片段；write_export 把片段攒成固定大小的块
+再写入文件。整个导出过程中不会拼出完整的输出字符串，内存占用与网站数量无关。
+
+支持的格式（按扩展名选择）：
+- .txt   与 websites_export.txt 相同的格式，可以用 bulk_import 再导入
+- .csv   name, url, category, description 四列，带 BOM 方便 Excel 打开
+- .html  Netscape 书签格式，分类对应书签文件夹，可以直接导入浏览器
+- .jsonl 每行一个网站的 JSON Lines
+- .json  与 data.json 相同的结构
+
+本模块不依赖 Qt。
+"""
+import csv
+import html
+import io
+import json
+import os
+
+from bulk_import import EXPORT_SEPARATOR
+from storage import atomic_write_chunks
+
+# 写入文件的块大小
+CHUNK_SIZE = 64 * 1024
+CSV_HEADER = ("name", "url", "category", "description")
+
+
+def iter_category_websites(data):
+    for category in data.get("categories", []):
+        for website in category.get("websites", []):
+            yield category, website
+
+
+def export_txt(data):
+    for _, website in iter_category_websites(data):
+        yield f"网站名称: {website['name']}\n网站URL: {website['url']}\n{EXPORT_SEPARATOR}\n"
+
+
+def export_csv(data):
+    # 同一个缓冲区反复使用，每次只保存一行
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def row(values):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    yield '\ufeff' + row(CSV_HEADER)
+    for category, website in iter_category_websites(data):
+        yield row((website["name"], website["url"], category["name"], website.get("description", "")))
+
+
+def export_bookmarks(data):
+    yield ('<!DOCTYPE NETSCAPE-Bookmark-file-1>\n'
+           '<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">\n'
+           '<TITLE>Bookmarks</TITLE>\n<H1>Bookmarks</H1>\n<DL><p>\n')
+    for category in data.get("categories", []):
+        yield f'    <DT><H3>{html.escape(category["name"])}</H3>\n    <DL><p>\n'
+        for website in category.get("websites", []):
+            yield (f'        <DT><A HREF="{html.escape(website["url"])}">'
+                   f'{html.escape(website["name"])}</A>\n')
+            if website.get("description"):
+                yield f'        <DD>{html.escape(website["description"])}\n'
+        yield '    </DL><p>\n'
+    yield '</DL><p>\n'
+
+
+def export_jsonl(data):
+    for category, website in iter_category_websites(data):
+        record = dict(website, category=category["name"])
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def export_json(data):
+    return json.JSONEncoder(ensure_ascii=False, indent=2).iterencode(data)
+
+
+EXPORTERS = {
+    "txt": export_txt,
+    "csv": export_csv,
+    "html": export_bookmarks,
+    "jsonl": export_jsonl,
+    "json": export_json,
+}
+
+EXTENSIONS = {".txt": "txt", ".csv": "csv", ".html": "html", ".htm": "html",
+              ".jsonl": "jsonl", ".json": "json"}
+
+
+def format_for_path(path):
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower(), "txt")
+
+
+def encode_chunks(pieces, chunk_size=CHUNK_SIZE):
+    """把字符串片段攒成大约 chunk_size 字节的 UTF-8 块"""
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(buffer).encode('utf-8')
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode('utf-8')
+
+
+def write_export(data, path, fmt=None):
+    """导出到 path，fmt 为 None 时按扩展名选择格式，返回导出的网站数量"""
+    exporter = EXPORTERS[fmt or format_for_path(path)]
+    atomic_write_chunks(path, encode_chunks(exporter(data)))
+    return sum(len(category.get("websites", [])) for category in data.get("categories", []))
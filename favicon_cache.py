@@ -0,0 +1,276 @@
+"""网站图标的内容寻址缓存和雪碧图生成
+
+移动端页面中每个网站的图标都是一个单独的请求（web_ico/<网站名>.png，失败后再请求默认图标），
+打开页面就会同时发出几十个请求。favicon_fetch 并发获取所有网站的图标后保存在这里：
+
+    .cache/favicons/objects/3f/3f2a...   图标的原始内容，文件名为内容的 SHA-256，相同的图标只保存一份
+    .cache/favicons/index.json           网站链接 -> 图标链接、内容哈希、ETag、获取时间
+
+build_sprite 把所有不同的图标缩放到同一尺寸后拼成一张图，并生成记录每个网站图标位置的 sprite.json：
+
+    web_ico/sprite.3f2a9c1b7e.png
+    web_ico/sprite.json
+        {"version": 1, "image": "web_ico/sprite.3f2a9c1b7e.png", "size": 32, "width": 512,
+         "height": 32, "icons": {"404": [0, 0], "405": [32, 0]}, "previous": null}
+
+页面只需要读取 sprite.json 和一张图片。安装了 Pillow 时生成 PNG；没有安装时生成 SVG，
+用 <image> 内嵌各个图标的原始内容，同样只需要一次请求。图片文件名带内容哈希，上一版图片
+保留一轮。web_ico/ 中手动放置的 <网站名>.png 优先于自动获取的图标。
+
+本模块不依赖 Qt 和 requests，Pillow 是可选依赖。
+"""
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from storage import atomic_write_bytes
+
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'favicons')
+CACHE_VERSION = 1
+ICON_DIR = 'web_ico'
+SPRITE_MAP_FILE = 'sprite.json'
+SPRITE_VERSION = 1
+# 雪碧图中每个图标的边长（像素）和每行的图标数
+ICON_SIZE = 32
+SPRITE_COLUMNS = 16
+HASH_LENGTH = 10
+# 由本模块生成的图片，清理旧文件时只删除这些；发布时远端 web_ico/ 中只清理这个前缀的文件
+SPRITE_RE = re.compile(r'^sprite\.[0-9a-f]{%d}\.(png|svg)$' % HASH_LENGTH)
+SPRITE_PREFIX = ICON_DIR + '/sprite.'
+
+# 文件头 -> MIME 类型
+IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\x00\x00\x01\x00', 'image/x-icon'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'BM', 'image/bmp'),
+)
+
+
+def image_type(data):
+    """根据内容判断图片类型，不是图片（例如服务器返回的 HTML 错误页）时返回 None"""
+    for signature, mime in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return mime
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    head = data[:512].lstrip().lower()
+    if head.startswith(b'<svg') or (head.startswith(b'<?xml') and b'<svg' in head):
+        return 'image/svg+xml'
+    return None
+
+
+def manual_icon_path(website, icon_dir=ICON_DIR):
+    """手动放置的图标 web_ico/<网站名>.png"""
+    return os.path.join(icon_dir, f"{website['name']}.png")
+
+
+class FaviconCache:
+    """按内容哈希保存图标，sites 记录每个网站链接对应的图标"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'index.json')
+        self.sites = self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(index, dict) or index.get("version") != CACHE_VERSION:
+            return {}
+        return index.get("sites", {})
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        data = json.dumps({"version": CACHE_VERSION, "sites": self.sites}, ensure_ascii=False, indent=1)
+        atomic_write_bytes(self.index_path, data.encode('utf-8'))
+
+    def object_path(self, digest):
+        return os.path.join(self.directory, 'objects', digest[:2], digest)
+
+    def put(self, data):
+        """保存图标内容，返回内容哈希；相同的内容只保存一份"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            atomic_write_bytes(path, data)
+        return digest
+
+    def get(self, digest):
+        """读取图标内容，不存在时返回 None"""
+        try:
+            with open(self.object_path(digest), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def prune(self, urls):
+        """删除不在 urls 中的网站记录和不再被引用的图标，返回删除的图标数"""
+        urls = set(urls)
+        self.sites = {url: entry for url, entry in self.sites.items() if url in urls}
+        used = {entry.get("sha256") for entry in self.sites.values()}
+        removed = 0
+        objects = os.path.join(self.directory, 'objects')
+        if not os.path.isdir(objects):
+            return removed
+        for prefix in os.listdir(objects):
+            for digest in os.listdir(os.path.join(objects, prefix)):
+                if digest not in used:
+                    os.remove(os.path.join(objects, prefix, digest))
+                    removed += 1
+        return removed
+
+
+def collect_icons(websites, cache, icon_dir=ICON_DIR):
+    """返回 {网站 id: 图标内容哈希}，手动放置的图标优先，没有图标的网站不包含在内"""
+    icons = {}
+    for website in websites:
+        path = manual_icon_path(website, icon_dir)
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                data = f.read()
+            if image_type(data):
+                icons[website["id"]] = cache.put(data)
+                continue
+        entry = cache.sites.get(website.get("url"))
+        if entry and entry.get("sha256"):
+            icons[website["id"]] = entry["sha256"]
+    return icons
+
+
+def _scaled_icon(data, size):
+    """用 Pillow 解码并缩放到 size x size 以内，无法解码（例如 SVG）时返回 None"""
+    try:
+        # ICO 默认打开其中最大的一张
+        icon = Image.open(io.BytesIO(data)).convert("RGBA")
+    except Exception:
+        return None
+    scale = size / max(icon.size)
+    return icon.resize((max(1, round(icon.width * scale)), max(1, round(icon.height * scale))),
+                       Image.LANCZOS)
+
+
+def _render_png(icons, width, height, size):
+    """icons 为 [(缩放后的图标, (x, y))]"""
+    sheet = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    for icon, (x, y) in icons:
+        sheet.paste(icon, (x + (size - icon.width) // 2, y + (size - icon.height) // 2), icon)
+    output = io.BytesIO()
+    sheet.save(output, "PNG", optimize=True)
+    return output.getvalue()
+
+
+def _render_svg(icons, width, height, size):
+    """icons 为 [(图标原始内容, (x, y))]，不需要 Pillow，由浏览器解码和缩放"""
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+             f'viewBox="0 0 {width} {height}">']
+    for data, (x, y) in icons:
+        href = f"data:{image_type(data)};base64,{base64.b64encode(data).decode('ascii')}"
+        parts.append(f'<image x="{x}" y="{y}" width="{size}" height="{size}" href="{href}"/>')
+    parts.append('</svg>')
+    return "".join(parts).encode('utf-8')
+
+
+def load_sprite_map(path):
+    """读取 sprite.json，不存在、损坏或版本不同时返回 None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            sprite_map = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(sprite_map, dict) or sprite_map.get("version") != SPRITE_VERSION:
+        return None
+    return sprite_map
+
+
+def build_sprite(cache, icons, directory='.', icon_dir=ICON_DIR, size=ICON_SIZE, columns=SPRITE_COLUMNS):
+    """把 icons（{网站 id: 内容哈希}）中的图标拼成一张图，生成 sprite.json
+
+    相同的图标只占一个位置；图标按内容哈希排列，与网站的顺序无关，
+    内容没有变化时图片文件名也不变。返回 (sprite_map, stats)，
+    stats 为 {"icons": 不同图标数, "written": [...], "removed": [...]}。
+    """
+    target = os.path.join(directory, icon_dir)
+    os.makedirs(target, exist_ok=True)
+    map_path = os.path.join(target, SPRITE_MAP_FILE)
+    previous = load_sprite_map(map_path)
+    prefix = icon_dir.replace(os.sep, '/').strip('/')
+    stats = {"icons": 0, "written": [], "removed": []}
+
+    images = []
+    for digest in sorted(set(icons.values())):
+        data = cache.get(digest)
+        if data is None or image_type(data) is None:
+            continue
+        if Image is not None:
+            # Pillow 无法解码的图标不放入雪碧图，页面显示默认图标
+            data = _scaled_icon(data, size)
+            if data is None:
+                continue
+        images.append((digest, data))
+    positions = {digest: ((i % columns) * size, (i // columns) * size)
+                 for i, (digest, _) in enumerate(images)}
+
+    sprite_map = {"version": SPRITE_VERSION, "image": None, "size": size, "width": 0, "height": 0,
+                  "icons": {}, "previous": None}
+    if images:
+        width = min(len(images), columns) * size
+        height = (len(images) + columns - 1) // columns * size
+        placed = [(data, positions[digest]) for digest, data in images]
+        if Image is not None:
+            content, ext = _render_png(placed, width, height, size), "png"
+        else:
+            content, ext = _render_svg(placed, width, height, size), "svg"
+        filename = f"sprite.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}.{ext}"
+        if not os.path.exists(os.path.join(target, filename)):
+            atomic_write_bytes(os.path.join(target, filename), content)
+            stats["written"].append(f"{prefix}/{filename}")
+        sprite_map.update({
+            "image": f"{prefix}/{filename}",
+            "width": width,
+            "height": height,
+            # 键为字符串形式的网站 id，按 id 排序便于比较差异
+            "icons": {str(website_id): list(positions[digest])
+                      for website_id, digest in sorted(icons.items()) if digest in positions},
+        })
+        stats["icons"] = len(images)
+    if previous is not None:
+        # 上一版图片保留一轮，已经打开的页面仍然可以显示
+        if previous.get("image") == sprite_map["image"]:
+            sprite_map["previous"] = previous.get("previous")
+        else:
+            sprite_map["previous"] = previous.get("image")
+    if sprite_map != previous:
+        atomic_write_bytes(map_path, json.dumps(sprite_map, ensure_ascii=False,
+                                                separators=(',', ':')).encode('utf-8'))
+        stats["written"].append(f"{prefix}/{SPRITE_MAP_FILE}")
+
+    keep = {sprite_map["image"], sprite_map["previous"]}
+    for filename in sorted(os.listdir(target)):
+        if SPRITE_RE.match(filename) and f"{prefix}/{filename}" not in keep:
+            os.remove(os.path.join(target, filename))
+            stats["removed"].append(f"{prefix}/{filename}")
+    return sprite_map, stats
+
+
+def sprite_paths(directory='.', icon_dir=ICON_DIR):
+    """需要发布的 sprite.json 和雪碧图"""
+    target = os.path.join(directory, icon_dir)
+    if not os.path.isdir(target):
+        return []
+    return [os.path.join(target, filename) for filename in sorted(os.listdir(target))
+            if filename == SPRITE_MAP_FILE or SPRITE_RE.match(filename)]
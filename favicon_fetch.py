@@ -0,0 +1,231 @@
+"""并发获取所有网站的图标，保存到 favicon_cache 的内容寻址缓存中
+
+每个网站先读取首页 <head> 中声明的图标（<link rel="icon"> 等，优先选择不小于雪碧图尺寸的
+最小的位图），没有声明或下载失败时使用 /favicon.ico。图标链接记录在缓存索引中，之后再获取时
+直接条件请求该链接，没有变化的图标服务器返回 304，不再下载；最近 max_age 内获取过的网站
+直接跳过。web_ico/ 中手动放置了图标的网站不发起请求。连接复用和按主机限流与 link_checker 相同。
+"""
+import codecs
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+import requests
+
+from favicon_cache import ICON_DIR, ICON_SIZE, image_type, manual_icon_path
+from http_cache import HttpCache
+from http_pool import (DEFAULT_PER_HOST, DEFAULT_WORKERS, HostLimiter,
+                       create_session, interleave_by_host)
+from link_checker import is_http_url
+from site_metadata import CHUNK_SIZE, SNIFF_BYTES, charset_from_content_type, pick_encoding
+
+DEFAULT_TIMEOUT = 10
+# 超过这个时间（秒）才重新获取网站的图标
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+# 查找 <link rel="icon"> 时最多读取的页面字节数
+MAX_PAGE_BYTES = 256 * 1024
+# 图标大小上限，超过的不保存
+MAX_ICON_BYTES = 512 * 1024
+
+
+class IconLinkParser(HTMLParser):
+    """收集 <head> 中的 <link rel="icon">、<link rel="apple-touch-icon">"""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'link':
+            attrs = {k.lower(): (v or "") for k, v in attrs}
+            rel = attrs.get('rel', "").lower().split()
+            if attrs.get('href') and ('icon' in rel or 'apple-touch-icon' in rel):
+                attrs['rel'] = rel
+                self.links.append(attrs)
+        elif tag == 'body':
+            self.done = True
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.done = True
+
+
+def _icon_score(link):
+    sizes = [int(width) for width, _ in re.findall(r'(\d+)x(\d+)', link.get('sizes', ""))]
+    if sizes:
+        size = max(sizes)
+    else:
+        size = 180 if 'apple-touch-icon' in link['rel'] else ICON_SIZE
+    svg = link.get('type') == 'image/svg+xml' or link['href'].lower().split('?')[0].endswith('.svg')
+    # 位图优先（Pillow 不能解码 SVG），其次是不小于 ICON_SIZE 的最小尺寸，都太小时取最大的
+    return (not svg, size >= ICON_SIZE, -size if size >= ICON_SIZE else size)
+
+
+def find_icon_links(response):
+    """从页面响应中读取声明的图标链接，按优先顺序排列；读取结束后关闭响应"""
+    parser = IconLinkParser()
+    try:
+        declared = charset_from_content_type(response.headers.get('Content-Type'))
+        decoder = None
+        read = 0
+        for chunk in response.iter_content(CHUNK_SIZE):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(pick_encoding(declared, chunk[:SNIFF_BYTES]))(
+                    errors='replace')
+            read += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            if parser.done or read >= MAX_PAGE_BYTES:
+                break
+    finally:
+        response.close()
+    icon_urls = []
+    for link in sorted(parser.links, key=_icon_score, reverse=True):
+        try:
+            icon_urls.append(urljoin(response.url, link['href']))
+        except ValueError:
+            # 无法解析的链接（例如 http://[x/icon.png）直接跳过
+            continue
+    return icon_urls
+
+
+def download_icon(session, url, timeout=DEFAULT_TIMEOUT, headers=None):
+    """下载图标，返回响应和内容；内容不是图片或过大时内容为 None，304 时内容为 None"""
+    response = session.get(url, timeout=timeout, headers=headers or {}, stream=True)
+    try:
+        if response.status_code != 200:
+            return response, None
+        data = b""
+        for chunk in response.iter_content(CHUNK_SIZE):
+            data += chunk
+            if len(data) > MAX_ICON_BYTES:
+                return response, None
+    finally:
+        response.close()
+    return response, data if image_type(data) else None
+
+
+def fetch_site_icon(session, site_url, limiter, entry=None, timeout=DEFAULT_TIMEOUT):
+    """获取一个网站的图标
+
+    返回 {"icon_url", "data", "etag", "last_modified", "not_modified", "error", "retry"}，
+    not_modified 为 True 时缓存中的图标仍然有效，data 为 None；retry 为 True 表示网络错误，
+    下次获取时不受 max_age 限制。
+    """
+    result = {"icon_url": None, "data": None, "etag": None, "last_modified": None,
+              "not_modified": False, "error": "", "retry": False}
+
+    def accept(icon_url, response, data):
+        result.update(icon_url=icon_url, data=data, etag=response.headers.get('ETag'),
+                      last_modified=response.headers.get('Last-Modified'))
+        return result
+
+    try:
+        # 先条件请求上次使用的图标链接
+        if entry and entry.get("icon_url") and entry.get("sha256"):
+            with limiter(entry["icon_url"]):
+                response, data = download_icon(session, entry["icon_url"], timeout,
+                                               HttpCache.conditional_headers(entry))
+            if response.status_code == 304:
+                result.update(icon_url=entry["icon_url"], not_modified=True,
+                              etag=entry.get("etag"), last_modified=entry.get("last_modified"))
+                return result
+            if data is not None:
+                return accept(entry["icon_url"], response, data)
+
+        candidates = []
+        with limiter(site_url):
+            response = session.get(site_url, timeout=timeout, stream=True)
+            if response.status_code < 400:
+                candidates = find_icon_links(response)
+            else:
+                response.close()
+        parts = urlsplit(response.url or site_url)
+        candidates.append(f"{parts.scheme}://{parts.netloc}/favicon.ico")
+        for icon_url in dict.fromkeys(candidates):
+            if not is_http_url(icon_url):
+                continue
+            with limiter(icon_url):
+                response, data = download_icon(session, icon_url, timeout)
+            if data is not None:
+                return accept(icon_url, response, data)
+        result["error"] = "没有找到图标"
+    except requests.exceptions.RequestException as e:
+        result["error"] = str(e)
+        result["retry"] = True
+    except Exception as e:
+        # 格式错误的网站链接（LocationParseError 等）重试也不会成功，按 max_age 再试
+        result["error"] = str(e) or type(e).__name__
+    return result
+
+
+def harvest_favicons(websites, cache, icon_dir=ICON_DIR, max_workers=DEFAULT_WORKERS,
+                     per_host=DEFAULT_PER_HOST, timeout=DEFAULT_TIMEOUT, max_age=DEFAULT_MAX_AGE,
+                     refresh=False, progress=None, cancel_event=None):
+    """并发获取网站的图标并写入 cache，相同的网站链接只请求一次
+
+    websites 只需包含 name 和 url；refresh 为 True 时忽略 max_age 全部重新获取。
+    progress(done, total) 在工作线程中回调，缓存只在调用线程中修改。
+    返回 {"fetched", "unchanged", "skipped", "failed": [(网站链接, 错误)]}。
+    """
+    now = time.time()
+    stats = {"fetched": 0, "unchanged": 0, "skipped": 0, "failed": []}
+    urls = []
+    for website in websites:
+        url = website.get("url")
+        if not is_http_url(url):
+            continue
+        entry = cache.sites.get(url)
+        if os.path.isfile(manual_icon_path(website, icon_dir)) or \
+                (not refresh and entry and now - entry.get("fetched_at", 0) < max_age):
+            stats["skipped"] += 1
+            continue
+        urls.append(url)
+    urls = list(dict.fromkeys(urls))
+    # 工作线程只读取这份快照
+    entries = {url: cache.sites.get(url) for url in urls}
+    total = len(urls)
+    limiter = HostLimiter(per_host)
+    session = create_session(max_workers)
+
+    def task(url):
+        if cancel_event is not None and cancel_event.is_set():
+            return url, None
+        return url, fetch_site_icon(session, url, limiter, entries[url], timeout)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(task, url) for url in interleave_by_host(urls)]
+            for done, future in enumerate(as_completed(futures), 1):
+                url, result = future.result()
+                if result is not None:
+                    _store_result(cache, url, result, stats)
+                if progress is not None:
+                    progress(done, total)
+    finally:
+        session.close()
+        # 取消或出错时也保存已经获取到的图标
+        cache.save()
+    return stats
+
+
+def _store_result(cache, url, result, stats):
+    entry = cache.sites.get(url) or {}
+    if result["not_modified"]:
+        stats["unchanged"] += 1
+    elif result["data"] is not None:
+        entry["sha256"] = cache.put(result["data"])
+        stats["fetched"] += 1
+    else:
+        # 获取失败时保留以前的图标，网络错误下次直接重试，没有图标的网站 max_age 之后再试
+        stats["failed"].append((url, result["error"]))
+        if result["retry"]:
+            return
+    if result["icon_url"]:
+        entry.update(icon_url=result["icon_url"], etag=result["etag"],
+                     last_modified=result["last_modified"])
+    entry.setdefault("sha256", None)
+    entry["fetched_at"] = time.time()
+    cache.sites[url] = entry
@@ -0,0 +1,59 @@
+"""文件大小的解析和显示
+
+file.json 中的 size 保存为字节数（整数），显示时才格式化成 "258.0 KB" 这样的文字，
+表格和 netdisk.html 都能按大小正确排序。以前手动填写的 "258.0kb"、"2.4 MB" 之类的
+字符串仍然可以读取，在下一次获取文件大小或修改文件时换成字节数。
+
+与 size_probe 分开，表格中显示大小不需要导入 requests。
+"""
+import re
+
+UNITS = ("B", "KB", "MB", "GB", "TB")
+# "258.0kb"、"2.4 MB"、"1.5GiB"、"12345"
+SIZE_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*(?:([KMGT])(?:I?B)?|B)?\s*$', re.IGNORECASE)
+
+
+def parse_size(text):
+    """把大小文字转换成字节数（按 1024 进位），无法识别时返回 None"""
+    match = SIZE_RE.match(text or "")
+    if not match:
+        return None
+    value = float(match.group(1))
+    if match.group(2):
+        value *= 1024 ** UNITS.index(match.group(2).upper() + "B")
+    return int(round(value))
+
+
+def size_bytes(value):
+    """file.json 中 size 字段对应的字节数，兼容旧的字符串格式，未知时返回 None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        return parse_size(value)
+    return None
+
+
+def format_size(value):
+    """显示用的大小文字；无法识别的旧数据原样显示，未知时为空"""
+    size = size_bytes(value)
+    if size is None:
+        return value if isinstance(value, str) else ""
+    number = float(size)
+    unit = 0
+    while number >= 1024 and unit < len(UNITS) - 1:
+        number /= 1024
+        unit += 1
+    return f"{size} B" if unit == 0 else f"{number:.1f} {UNITS[unit]}"
+
+
+def apply_sizes(files, sizes):
+    """把 size_probe.probe_sizes 的结果写入文件记录，返回大小有变化的文件 id 列表"""
+    changed = []
+    for file_info in files:
+        size = sizes.get(file_info.get("downloadUrl"))
+        if size is not None and file_info.get("size") != size:
+            file_info["size"] = size
+            changed.append(file_info["id"])
+    return changed
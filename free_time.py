@@ -0,0 +1,196 @@
+"""所有人课表的空闲时间查询
+
+把 timetable_compiler 编译出的 occupancy 合并成一个 用户 x 周 x 星期 的 NumPy 数组，
+每个元素是该天有课节次的位掩码（第 n 位表示第 n+1 节），再结合 routine.txt 的作息时间，
+用整列的位运算回答：
+
+- 某个时刻谁有空（who_is_free）；
+- 几个人在第 1-16 周共同的空闲节次（common_free / free_every_week）；
+- 每个人从某个时刻起的下一个空闲节次（next_free）。
+
+    python free_time.py now
+    python free_time.py common H X Y --weeks 1-16
+    python free_time.py next H --at "2025-09-15 10:30"
+
+本模块需要 NumPy，不依赖 Qt。
+"""
+import argparse
+import datetime
+
+import numpy as np
+
+from timetable_compiler import (DAY_NAMES, FIRST_WEEK_MONDAY, MAX_WEEK, PERIOD_COUNT,
+                                compile_timetables, range_mask)
+
+# 一天所有节次都空闲的掩码
+FULL_DAY = (1 << PERIOD_COUNT) - 1
+# 掩码 -> 最低位的节次下标（0 没有节次，对应 -1）
+LOWEST_PERIOD = np.array([(m & -m).bit_length() - 1 for m in range(1 << PERIOD_COUNT)],
+                         dtype=np.int8)
+
+
+def _minutes(text):
+    hours, minutes = text.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+class FreeTimeEngine:
+    def __init__(self, users, occupancy, periods, first_monday=FIRST_WEEK_MONDAY):
+        # users[i] 对应 occupancy[i]，occupancy 形状为 (用户数, 周数, 7)
+        self.users = list(users)
+        self.user_index = {user: i for i, user in enumerate(self.users)}
+        self.occupancy = np.asarray(occupancy, dtype=np.uint16)
+        self.weeks = self.occupancy.shape[1]
+        self.first_monday = first_monday
+        # 各节次的开始、结束时间（从零点起的分钟数）
+        self.starts = np.array([_minutes(p["start"]) for p in periods], dtype=np.int16)
+        self.ends = np.array([_minutes(p["end"]) for p in periods], dtype=np.int16)
+
+    @classmethod
+    def from_artifact(cls, artifact):
+        users = list(artifact["users"])
+        occupancy = [artifact["users"][user]["occupancy"] for user in users]
+        if not users:
+            occupancy = np.zeros((0, artifact["weeks"], len(DAY_NAMES)), dtype=np.uint16)
+        return cls(users, occupancy, artifact["periods"])
+
+    @classmethod
+    def load(cls, directory=None, routine_file=None):
+        """编译（只重新解析有变化的文件）并加载所有课表"""
+        kwargs = {}
+        if directory:
+            kwargs["directory"] = directory
+        if routine_file:
+            kwargs["routine_file"] = routine_file
+        artifact, _ = compile_timetables(**kwargs)
+        return cls.from_artifact(artifact)
+
+    def _rows(self, users):
+        if users is None:
+            return slice(None)
+        try:
+            return np.array([self.user_index[user] for user in users], dtype=np.intp)
+        except KeyError as e:
+            raise ValueError(f"没有 {e.args[0]} 的课表") from None
+
+    def locate(self, when):
+        """when 所在的 (周下标, 星期下标, 节次下标)，不在上课时间时节次为 -1，周在学期外时为 None"""
+        week = (when.date() - self.first_monday).days // 7
+        minute = when.hour * 60 + when.minute
+        inside = np.flatnonzero((self.starts <= minute) & (minute <= self.ends))
+        period = int(inside[0]) if len(inside) else -1
+        return (week if 0 <= week < self.weeks else None), when.weekday(), period
+
+    def who_is_free(self, when, users=None):
+        """when 时刻没有课的用户；不在上课时间或学期外时所有人都有空"""
+        rows = self._rows(users)
+        candidates = self.users if users is None else list(users)
+        week, day, period = self.locate(when)
+        if week is None or period < 0:
+            return candidates
+        busy = (self.occupancy[rows, week, day] >> np.uint16(period)) & 1
+        return [candidates[i] for i in np.flatnonzero(busy == 0)]
+
+    def common_free(self, users, weeks=None):
+        """users 共同的空闲节次，返回形状为 (周数, 7) 的掩码数组，weeks 是从 1 开始的周次"""
+        week_rows = np.arange(self.weeks) if weeks is None else np.asarray(weeks, dtype=np.intp) - 1
+        busy = np.bitwise_or.reduce(self.occupancy[self._rows(users)][:, week_rows], axis=0)
+        return ~busy & np.uint16(FULL_DAY)
+
+    def free_every_week(self, users, weeks=None):
+        """在 weeks 的每一周都共同空闲的节次，返回 7 个掩码"""
+        return np.bitwise_and.reduce(self.common_free(users, weeks), axis=0)
+
+    def next_free(self, when, users=None):
+        """每个用户从 when 起（包括当前节次）的下一个空闲节次
+
+        返回 {用户: (周次, 星期下标, 节次)}，周次和节次从 1 开始，学期内已没有空闲节次时为 None。
+        """
+        rows = self._rows(users)
+        candidates = self.users if users is None else list(users)
+        week = (when.date() - self.first_monday).days // 7
+        minute = when.hour * 60 + when.minute
+        # 当前节次还没结束时从当前节次算起，否则从下一节开始
+        first = int(np.searchsorted(self.ends, minute))
+        slot = max(week, 0) * len(DAY_NAMES) + when.weekday()
+        if week < 0:
+            slot, first = 0, 0
+
+        free = ~self.occupancy[rows].reshape(len(candidates), -1) & np.uint16(FULL_DAY)
+        free[:, :min(slot, free.shape[1])] = 0
+        if slot < free.shape[1]:
+            free[:, slot] &= np.uint16(~((1 << first) - 1) & FULL_DAY)
+        nonzero = free != 0
+        has_free = nonzero.any(axis=1)
+        # argmax 在布尔数组上返回第一个 True 的位置
+        slots = nonzero.argmax(axis=1) if free.size else np.zeros(len(candidates), dtype=np.intp)
+        periods = LOWEST_PERIOD[free[np.arange(len(candidates)), slots]] if free.size else slots
+        result = {}
+        for user, found, s, p in zip(candidates, has_free, slots.tolist(), periods.tolist()):
+            result[user] = (s // len(DAY_NAMES) + 1, s % len(DAY_NAMES), p + 1) if found else None
+        return result
+
+
+def mask_periods(mask):
+    """掩码 -> 从 1 开始的节次列表"""
+    return [n + 1 for n in range(PERIOD_COUNT) if int(mask) >> n & 1]
+
+
+def parse_weeks(text, limit=MAX_WEEK):
+    """"1-8"、"1,3,5-7" -> 从 1 开始的周次列表"""
+    mask = range_mask(text, limit)
+    return [n + 1 for n in range(limit) if mask >> n & 1]
+
+
+def format_periods(mask):
+    periods = mask_periods(mask)
+    return ",".join(map(str, periods)) if periods else "无"
+
+
+def _parse_time(text):
+    return datetime.datetime.strptime(text, "%Y-%m-%d %H:%M") if text else datetime.datetime.now()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="查询所有课表中的空闲时间")
+    parser.add_argument("--dir", help="课表文件所在目录（默认 timetable）")
+    parser.add_argument("--routine", help="作息时间文件（默认 routine.txt）")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("now", help="某个时刻谁有空")
+    p.add_argument("--at", help="时间，格式 YYYY-MM-DD HH:MM，默认现在")
+
+    p = commands.add_parser("common", help="几个人共同的空闲节次")
+    p.add_argument("users", nargs="+")
+    p.add_argument("--weeks", default=f"1-{MAX_WEEK}", help="周次范围，例如 1-8 或 1,3,5-7")
+
+    p = commands.add_parser("next", help="下一个空闲节次")
+    p.add_argument("users", nargs="*", help="默认所有人")
+    p.add_argument("--at", help="时间，格式 YYYY-MM-DD HH:MM，默认现在")
+    args = parser.parse_args(argv)
+
+    engine = FreeTimeEngine.load(args.dir, args.routine)
+    try:
+        if args.command == "now":
+            print(" ".join(engine.who_is_free(_parse_time(args.at))) or "所有人都在上课")
+        elif args.command == "common":
+            weeks = parse_weeks(args.weeks, engine.weeks)
+            masks = engine.free_every_week(args.users, weeks)
+            print(f"第{args.weeks}周每周都空闲的节次:")
+            for day, mask in enumerate(masks):
+                print(f"  {DAY_NAMES[day]}: {format_periods(mask)}")
+        else:
+            results = engine.next_free(_parse_time(args.at), args.users or None)
+            for user, slot in results.items():
+                if slot is None:
+                    print(f"{user}: 本学期没有空闲节次")
+                else:
+                    week, day, period = slot
+                    print(f"{user}: 第{week}周 {DAY_NAMES[day]} 第{period}节")
+    except ValueError as e:
+        parser.exit(2, f"错误: {e}\n")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
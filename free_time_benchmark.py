@@ -0,0 +1,128 @@
+"""free_time 查询引擎的基准测试
+
+随机生成指定数量用户的课表（默认 10000 人，每人每周若干门两节连上的课），
+分别用 FreeTimeEngine 的向量化位运算和逐个用户遍历掩码的纯 Python 写法回答同样的查询，
+比较耗时并核对两者结果一致。
+
+    python free_time_benchmark.py
+    python free_time_benchmark.py --users 10000 --repeat 20 --json free_time.json
+"""
+import argparse
+import datetime
+import json
+import random
+import statistics
+import time
+
+from free_time import FULL_DAY, FreeTimeEngine
+from timetable_compiler import DAY_NAMES, FIRST_WEEK_MONDAY, MAX_WEEK, PERIOD_COUNT
+
+PERIODS = [
+    {"name": f"第{n + 1}节课", "start": start, "end": end}
+    for n, (start, end) in enumerate([
+        ("08:00", "08:50"), ("09:00", "09:50"), ("10:10", "11:00"), ("11:10", "12:00"),
+        ("14:30", "15:20"), ("15:30", "16:20"), ("16:40", "17:30"), ("17:40", "18:30"),
+        ("19:40", "20:30"), ("20:40", "21:30"),
+    ])
+]
+
+
+def make_artifact(users, courses_per_user=10, seed=0):
+    """生成与 timetable_compiler 输出结构相同的 users 部分"""
+    rng = random.Random(seed)
+    result = {}
+    for u in range(users):
+        occupancy = [[0] * len(DAY_NAMES) for _ in range(MAX_WEEK)]
+        for _ in range(courses_per_user):
+            day = rng.randrange(5)
+            start = rng.choice((0, 2, 4, 6, 8))
+            first_week = rng.randint(1, 9)
+            last_week = rng.randint(first_week, MAX_WEEK)
+            for week in range(first_week - 1, last_week):
+                occupancy[week][day] |= 0b11 << start
+        result[f"u{u}"] = {"occupancy": occupancy}
+    return {"weeks": MAX_WEEK, "periods": PERIODS, "users": result}
+
+
+def python_who_is_free(artifact, week, day, period):
+    return [user for user, entry in artifact["users"].items()
+            if not entry["occupancy"][week][day] >> period & 1]
+
+
+def python_common_free(artifact, users):
+    masks = []
+    for day in range(len(DAY_NAMES)):
+        free = FULL_DAY
+        for week in range(MAX_WEEK):
+            for user in users:
+                free &= ~artifact["users"][user]["occupancy"][week][day]
+        masks.append(free)
+    return masks
+
+
+def python_next_free(artifact, week, day, first):
+    result = {}
+    for user, entry in artifact["users"].items():
+        result[user] = None
+        for slot in range(week * len(DAY_NAMES) + day, MAX_WEEK * len(DAY_NAMES)):
+            mask = entry["occupancy"][slot // len(DAY_NAMES)][slot % len(DAY_NAMES)]
+            start = first if slot == week * len(DAY_NAMES) + day else 0
+            period = next((p for p in range(start, PERIOD_COUNT) if not mask >> p & 1), None)
+            if period is not None:
+                result[user] = (slot // len(DAY_NAMES) + 1, slot % len(DAY_NAMES), period + 1)
+                break
+    return result
+
+
+def timed(func, repeat):
+    """返回 (结果, 中位数耗时 ms)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return result, round(statistics.median(times), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量空闲时间查询的耗时")
+    parser.add_argument("--users", type=int, default=10000, help="生成的用户数量")
+    parser.add_argument("--repeat", type=int, default=10, help="每个查询重复的次数")
+    parser.add_argument("--json", help="把结果写入 JSON 文件，便于比较多次测试")
+    args = parser.parse_args()
+
+    artifact = make_artifact(args.users)
+    engine, build_ms = timed(lambda: FreeTimeEngine.from_artifact(artifact), 1)
+    # 第 5 周星期三 10:30（第 3 节）
+    when = datetime.datetime.combine(FIRST_WEEK_MONDAY + datetime.timedelta(weeks=4, days=2),
+                                     datetime.time(10, 30))
+    week, day, period = engine.locate(when)
+    group = engine.users[:3]
+
+    queries = [
+        ("who_is_free", lambda: engine.who_is_free(when),
+         lambda: python_who_is_free(artifact, week, day, period)),
+        ("common_free (3 人)", lambda: [int(m) for m in engine.free_every_week(group)],
+         lambda: python_common_free(artifact, group)),
+        ("common_free (所有人)", lambda: [int(m) for m in engine.free_every_week(engine.users)],
+         lambda: python_common_free(artifact, engine.users)),
+        ("next_free (所有人)", lambda: engine.next_free(when),
+         lambda: python_next_free(artifact, week, day, period)),
+    ]
+    results = {"users": args.users, "build_ms": build_ms, "queries": {}}
+    print(f"{args.users} 个用户，创建引擎 {build_ms:.1f} ms")
+    print(f"{'查询':24}{'NumPy':>12}{'纯 Python':>12}{'加速':>8}   (ms, 中位数)")
+    for name, vectorized, baseline in queries:
+        fast, fast_ms = timed(vectorized, args.repeat)
+        slow, slow_ms = timed(baseline, max(1, args.repeat // 5))
+        if fast != slow:
+            raise SystemExit(f"{name} 的结果与纯 Python 实现不一致")
+        results["queries"][name] = {"numpy_ms": fast_ms, "python_ms": slow_ms}
+        print(f"{name:24}{fast_ms:>12}{slow_ms:>12}{slow_ms / max(fast_ms, 1e-6):>7.0f}x")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""通过 Git Data API 把多个数据文件作为一次提交发布到 GitHub
+
+原来每个文件单独上传：每次都新建客户端、多调一次 get_user()、再 get_contents 取 SHA，
+并各自产生一个提交。这里读取一次分支和目录树，用本地计算的 blob SHA 跳过内容
+没有变化的文件，然后把所有变化的文件放进同一个 tree 和同一个 commit，
+整个发布只需要少量 API 调用。
+"""
+import base64
+import hashlib
+
+from github import Auth, Github, InputGitTreeElement
+
+DEFAULT_MESSAGE = "Update site data"
+
+
+def git_blob_sha(content):
+    """按 git 的规则计算 blob SHA，与远端目录树中的 sha 直接比较"""
+    header = b"blob %d\0" % len(content)
+    return hashlib.sha1(header + content).hexdigest()
+
+
+def _tree_element(repo, path, content):
+    try:
+        text = content.decode('utf-8')
+    except UnicodeDecodeError:
+        # 二进制文件（如压缩包）需要先单独创建 blob
+        blob = repo.create_git_blob(base64.b64encode(content).decode('ascii'), 'base64')
+        return InputGitTreeElement(path, '100644', 'blob', sha=blob.sha)
+    return InputGitTreeElement(path, '100644', 'blob', content=text)
+
+
+def publish_files(token, repo_name, files, message=DEFAULT_MESSAGE, branch=None,
+                  base_url=None, prune=None):
+    """把 files（仓库内路径 -> bytes）作为一次提交推送到分支
+
+    prune 为目录前缀（例如 "dist/"）或前缀元组，远端这些目录中不在 files 里的文件会在同一个提交中删除。
+    返回 {"commit": 新提交 SHA 或 None, "changed": [...], "unchanged": [...], "deleted": [...]}。
+    base_url 可指向 GitHub Enterprise 或本地的 API 替身。
+    """
+    kwargs = {"auth": Auth.Token(token)}
+    if base_url:
+        kwargs["base_url"] = base_url
+    g = Github(**kwargs)
+    try:
+        repo = g.get_repo(repo_name)
+        branch = branch or repo.default_branch
+        ref = repo.get_git_ref(f"heads/{branch}")
+        head_commit = repo.get_git_commit(ref.object.sha)
+
+        # 只有需要发布或清理子目录中的文件时才递归读取整个目录树
+        recursive = bool(prune) or any('/' in path for path in files)
+        base_tree = repo.get_git_tree(head_commit.tree.sha, recursive=recursive)
+        remote_shas = {element.path: element.sha for element in base_tree.tree
+                       if element.type == 'blob'}
+
+        changed = []
+        unchanged = []
+        elements = []
+        for path, content in files.items():
+            if remote_shas.get(path) == git_blob_sha(content):
+                unchanged.append(path)
+                continue
+            changed.append(path)
+            elements.append(_tree_element(repo, path, content))
+
+        deleted = []
+        if prune:
+            for path in sorted(remote_shas):
+                if path.startswith(prune) and path not in files:
+                    deleted.append(path)
+                    # sha 为 null 的元素表示从目录树中删除该文件
+                    elements.append(InputGitTreeElement(path, '100644', 'blob', sha=None))
+
+        if not elements:
+            return {"commit": None, "changed": changed, "unchanged": unchanged, "deleted": deleted}
+
+        tree = repo.create_git_tree(elements, base_tree)
+        commit = repo.create_git_commit(message, tree, [head_commit])
+        # 非快进更新会失败，远端在此期间有新提交时不会被覆盖
+        ref.edit(commit.sha)
+        return {"commit": commit.sha, "changed": changed, "unchanged": unchanged, "deleted": deleted}
+    finally:
+        g.close()
@@ -0,0 +1,66 @@
+"""基于 ETag / Last-Modified 的磁盘响应缓存
+
+每个 URL 对应缓存目录下的一个 JSON 文件，记录服务器返回的校验头和解析后的结果。
+再次请求时带上 If-None-Match / If-Modified-Since，服务器返回 304 时直接使用缓存。
+"""
+import hashlib
+import json
+import os
+import time
+
+from storage import atomic_write_bytes
+
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'http')
+
+
+class HttpCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, url):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def get(self, url):
+        """返回缓存条目，不存在或已损坏时返回 None"""
+        try:
+            with open(self._path(url), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # 防止哈希冲突时取到别的 URL 的缓存
+        if entry.get("url") != url:
+            return None
+        return entry
+
+    @staticmethod
+    def conditional_headers(entry):
+        """根据缓存条目生成条件请求头"""
+        headers = {}
+        if not entry:
+            return headers
+        if entry.get("etag"):
+            headers['If-None-Match'] = entry["etag"]
+        if entry.get("last_modified"):
+            headers['If-Modified-Since'] = entry["last_modified"]
+        return headers
+
+    def put(self, url, response_headers, payload):
+        """保存响应的校验头和解析结果，没有校验头的响应不缓存"""
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return None
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": time.time(),
+            "payload": payload
+        }
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 每次写入使用唯一的临时文件，并发写入同一个条目时不会互相覆盖临时文件
+        atomic_write_bytes(path, json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+        return entry
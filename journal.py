@@ -0,0 +1,266 @@
+"""操作日志（JSON Lines），用于撤销/重做和崩溃恢复
+
+WebsiteManager 的每次操作（添加、修改、移动、删除、置顶……）都以一行 JSON 追加到
+journal.jsonl 并立即 fsync，写入量只与这次操作涉及的记录有关。一次操作记录为：
+
+    {"type": "do", "seq": 12, "label": "删除网站", "ops": [
+        {"store": "data", "kind": "website", "id": 5,
+         "before": [所属分类 id, 位置, 记录], "after": null}]}
+
+before/after 是记录在操作前后的完整内容和位置（不存在时为 null）：
+
+- 撤销就是把 before 和 after 互换后应用，写入一行 "undo"；重做重新应用原来的 ops，写入一行 "redo"；
+- 应用 ops 只是把这些记录放到 after 指定的位置，重复应用结果不变。数据文件保存成功后追加一行
+  "checkpoint"，启动时把最后一个检查点之后的操作重新应用到读取的数据上，即可恢复崩溃前未保存的修改；
+- 日志过长时 compact() 把它改写为只有一个检查点的文件，检查点中保留撤销/重做栈。
+
+本模块不依赖 Qt。
+"""
+import json
+import os
+
+from storage import atomic_write_bytes
+
+DEFAULT_JOURNAL_FILE = 'journal.jsonl'
+# 最多可以撤销的操作数
+UNDO_LIMIT = 100
+# 日志超过这么多行时压缩
+COMPACT_LINES = 500
+
+# 记录类型 -> 所属的数据存储
+KIND_STORES = {"category": "data", "website": "data", "file": "files", "notification": "notifications"}
+# 应用 ops 时先插入分类，再插入其中的网站
+KIND_ORDER = {"category": 0, "website": 1, "file": 2, "notification": 3}
+
+
+# ---------- 记录操作前后的内容 ----------
+
+def record_image(index, kind, record_id):
+    """记录当前的 [上级 id, 位置, 内容]，不存在时返回 None；分类的内容不包括其中的网站"""
+    if kind == "category":
+        entry = index.categories.get(record_id)
+        if entry is None:
+            return None
+        category, pos = entry
+        return [None, pos, {k: v for k, v in category.items() if k != "websites"}]
+    if kind == "website":
+        website, category, pos = index.find_website(record_id)
+        return None if website is None else [category["id"], pos, dict(website)]
+    entry = (index.files if kind == "file" else index.notifications).get(record_id)
+    return None if entry is None else [None, entry[1], dict(entry[0])]
+
+
+class Change:
+    """一次操作涉及的记录：修改前调用 watch，修改后由 ops() 得到日志中的 ops"""
+    def __init__(self, index):
+        self.index = index
+        # (类型, id) -> 修改前的内容，按 watch 的顺序
+        self.before = {}
+
+    def watch(self, kind, record_id):
+        if (kind, record_id) not in self.before:
+            self.before[(kind, record_id)] = record_image(self.index, kind, record_id)
+
+    def watch_new(self, kind, record_ids):
+        """操作之前还不存在、操作之后才知道 id 的记录（例如批量导入）"""
+        for record_id in record_ids:
+            self.before.setdefault((kind, record_id), None)
+
+    def watch_category(self, category_id):
+        """分类及其中的所有网站"""
+        category = self.index.get_category(category_id)
+        for website in (category or {}).get("websites", []):
+            self.watch("website", website["id"])
+        self.watch("category", category_id)
+
+    def ops(self):
+        ops = []
+        for (kind, record_id), before in self.before.items():
+            after = record_image(self.index, kind, record_id)
+            if after != before:
+                ops.append({"store": KIND_STORES[kind], "kind": kind, "id": record_id,
+                            "before": before, "after": after})
+        return ops
+
+
+def invert(ops):
+    """撤销 ops 需要应用的 ops"""
+    return [dict(op, before=op["after"], after=op["before"]) for op in reversed(ops)]
+
+
+# ---------- 应用 ops ----------
+
+def _detach(stores, index, kind, record_id):
+    if kind == "category":
+        entry = index.categories.get(record_id)
+        return index.remove_category(stores["data"]["categories"], record_id) if entry else None
+    if kind == "website":
+        return index.remove_website(record_id)
+    if kind == "file":
+        return index.remove_file(stores["files"]["files"], record_id)
+    return index.remove_notification(stores["notifications"]["notifications"], record_id)
+
+
+def _insert(stores, index, kind, parent, pos, record):
+    if kind == "category":
+        categories = stores["data"]["categories"]
+        index.insert_category(categories, min(pos, len(categories)), record)
+    elif kind == "website":
+        category = index.get_category(parent)
+        if category is None:
+            # 只会在崩溃恢复时出现：数据文件已经包含之后删除这个分类的操作，网站随分类一起删除
+            return
+        index.insert_website(category, min(pos, len(category["websites"])), record)
+    elif kind == "file":
+        files = stores["files"]["files"]
+        index.insert_file(files, min(pos, len(files)), record)
+    else:
+        notifications = stores["notifications"]["notifications"]
+        index.insert_notification(notifications, min(pos, len(notifications)), record)
+
+
+def apply_ops(ops, stores, index):
+    """把 ops 中的记录放到 after 指定的位置，返回涉及的存储名集合
+
+    stores 为 {"data": ..., "files": ..., "notifications": ...}。先取出所有涉及的记录，
+    再按最终位置从小到大插回，所以结果与 ops 的顺序无关，重复应用也不会改变结果。
+    """
+    detached = {}
+    for op in ops:
+        record = _detach(stores, index, op["kind"], op["id"])
+        if record is not None:
+            detached[(op["kind"], op["id"])] = record
+    inserts = [op for op in ops if op["after"] is not None]
+    inserts.sort(key=lambda op: (KIND_ORDER[op["kind"]], op["after"][0] or 0, op["after"][1]))
+    for op in inserts:
+        parent, pos, content = op["after"]
+        # 重新使用原来的对象，分类中的网站列表保持不变
+        record = detached.pop((op["kind"], op["id"]), None)
+        websites = record.get("websites", []) if record is not None else []
+        record = record if record is not None else {}
+        record.clear()
+        record.update(content)
+        if op["kind"] == "category":
+            record["websites"] = websites
+        _insert(stores, index, op["kind"], parent, pos, record)
+    return {op["store"] for op in ops}
+
+
+# ---------- 日志文件 ----------
+
+class Journal:
+    def __init__(self, path=DEFAULT_JOURNAL_FILE, undo_limit=UNDO_LIMIT, compact_lines=COMPACT_LINES):
+        self.path = path
+        self.undo_limit = undo_limit
+        self.compact_lines = compact_lines
+        # 栈中的每一项为 {"seq", "label", "ops"}，ops 为原操作（不是撤销用的 ops）
+        self.undo_stack = []
+        self.redo_stack = []
+        self.seq = 0
+        self.lines = 0
+        # 最后一个检查点之后是否有新的操作
+        self.uncommitted = False
+        self.file = None
+
+    def open(self):
+        """读取日志，重建撤销/重做栈，返回最后一个检查点之后需要重新应用的 ops 列表"""
+        pending = []
+        if os.path.exists(self.path):
+            with open(self.path, 'rb+') as f:
+                raw = f.read()
+                # 写入中途崩溃时最后一行不完整，截掉它，之后追加的行才能正常读取
+                end = raw.rfind(b"\n") + 1
+                if end < len(raw):
+                    f.truncate(end)
+            for line in raw[:end].decode('utf-8').splitlines():
+                entry = json.loads(line)
+                self.lines += 1
+                self._track(entry)
+                if entry["type"] == "checkpoint":
+                    pending = []
+                else:
+                    pending.append(entry["ops"])
+        self.uncommitted = bool(pending)
+        self.file = open(self.path, 'a', encoding='utf-8')
+        return pending
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def _track(self, entry):
+        """根据一行日志更新撤销/重做栈"""
+        self.seq = max(self.seq, entry.get("seq", 0))
+        kind = entry["type"]
+        if kind == "do":
+            self.undo_stack.append({"seq": entry["seq"], "label": entry["label"], "ops": entry["ops"]})
+            del self.undo_stack[:-self.undo_limit]
+            self.redo_stack.clear()
+        elif kind == "undo" and self.undo_stack:
+            self.redo_stack.append(self.undo_stack.pop())
+        elif kind == "redo" and self.redo_stack:
+            self.undo_stack.append(self.redo_stack.pop())
+        elif kind == "checkpoint" and "undo" in entry:
+            self.undo_stack = entry["undo"]
+            self.redo_stack = entry["redo"]
+
+    def _append(self, entry):
+        # 每一行写入后立即落盘，之后才修改数据文件
+        self.file.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.lines += 1
+        self._track(entry)
+
+    def record(self, label, ops):
+        self.seq += 1
+        self._append({"type": "do", "seq": self.seq, "label": label, "ops": ops})
+        self.uncommitted = True
+
+    def undo_label(self):
+        return self.undo_stack[-1]["label"] if self.undo_stack else None
+
+    def redo_label(self):
+        return self.redo_stack[-1]["label"] if self.redo_stack else None
+
+    def undo(self):
+        """写入一行撤销记录，返回 (说明, 需要应用的 ops)；没有可撤销的操作时返回 None"""
+        if not self.undo_stack:
+            return None
+        entry = self.undo_stack[-1]
+        ops = invert(entry["ops"])
+        self.seq += 1
+        self._append({"type": "undo", "seq": self.seq, "target": entry["seq"],
+                      "label": entry["label"], "ops": ops})
+        self.uncommitted = True
+        return entry["label"], ops
+
+    def redo(self):
+        if not self.redo_stack:
+            return None
+        entry = self.redo_stack[-1]
+        self.seq += 1
+        self._append({"type": "redo", "seq": self.seq, "target": entry["seq"],
+                      "label": entry["label"], "ops": entry["ops"]})
+        self.uncommitted = True
+        return entry["label"], entry["ops"]
+
+    def checkpoint(self):
+        """数据文件已经包含之前的所有操作"""
+        if self.uncommitted:
+            self._append({"type": "checkpoint", "seq": self.seq})
+            self.uncommitted = False
+
+    def needs_compaction(self):
+        return self.lines >= self.compact_lines
+
+    def compact(self):
+        """把日志改写为一个带撤销/重做栈的检查点，调用前数据文件必须已经保存"""
+        entry = {"type": "checkpoint", "seq": self.seq, "undo": self.undo_stack, "redo": self.redo_stack}
+        self.close()
+        atomic_write_bytes(self.path, (json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+                                       + "\n").encode('utf-8'))
+        self.file = open(self.path, 'a', encoding='utf-8')
+        self.lines = 1
+        self.uncommitted = False
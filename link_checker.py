@@ -0,0 +1,143 @@
+"""链接健康检查
+
+检查 data.json 中网站的 url、file.json 中的 previewUrl / downloadUrl，以及
+notification.json 中的 link / attachment。先发 HEAD 请求，服务器不支持 HEAD 时
+改用 GET（只读响应头），并发执行并复用连接，记录状态码、耗时和重定向链。
+"""
+import csv
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from http_pool import (DEFAULT_PER_HOST, DEFAULT_WORKERS, HostLimiter,
+                       create_session, interleave_by_host)
+# 检查结果的保存和显示不需要网络库，放在 link_status 中，这里一并导出
+from link_status import (DEFAULT_STATUS_FILE, format_record_status, format_status,
+                         load_status, save_status)
+
+DEFAULT_TIMEOUT = 10
+
+# 这些状态码通常表示服务器不接受 HEAD，需要用 GET 再试一次
+HEAD_FALLBACK_STATUS = (400, 403, 405, 500, 501)
+
+# 需要检查的字段，(存储名, 列表键, 字段)
+LINK_FIELDS = (
+    ("data", None, "url"),
+    ("files", "files", "previewUrl"),
+    ("files", "files", "downloadUrl"),
+    ("notifications", "notifications", "link"),
+    ("notifications", "notifications", "attachment"),
+)
+
+
+def is_http_url(url):
+    return isinstance(url, str) and url.startswith(('http://', 'https://'))
+
+
+def collect_links(data, file_data, notification_data):
+    """收集三个数据文件中所有需要检查的链接"""
+    links = []
+    for category in data.get("categories", []):
+        for website in category.get("websites", []):
+            if is_http_url(website.get("url")):
+                links.append({"store": "data", "id": website["id"], "field": "url",
+                              "name": website.get("name", ""), "url": website["url"]})
+    stores = {"files": file_data, "notifications": notification_data}
+    for store, key, field in LINK_FIELDS[1:]:
+        for record in stores[store].get(key, []):
+            url = record.get(field, "")
+            if is_http_url(url):
+                links.append({"store": store, "id": record["id"], "field": field,
+                              "name": record.get("name") or record.get("title", ""), "url": url})
+    return links
+
+
+def check_url(session, url, limiter, timeout=DEFAULT_TIMEOUT):
+    """检查单个链接，返回检查结果"""
+    result = {"url": url, "ok": False, "status": None, "latency_ms": None,
+              "final_url": url, "redirects": [], "method": "HEAD", "error": "",
+              "checked_at": time.strftime("%Y-%m-%d %H:%M")}
+    start = time.monotonic()
+    try:
+        with limiter(url):
+            response = session.head(url, timeout=timeout, allow_redirects=True)
+            if response.status_code in HEAD_FALLBACK_STATUS:
+                # 只读取响应头，不下载内容
+                response = session.get(url, timeout=timeout, allow_redirects=True, stream=True)
+                response.close()
+                result["method"] = "GET"
+    except Exception as e:
+        # 除了网络错误，格式错误的链接（例如 http://example..com/）会抛出 urllib3 的
+        # LocationParseError 等异常，同样记为检查失败，不能中断整批检查
+        result["error"] = str(e) or type(e).__name__
+        result["latency_ms"] = int((time.monotonic() - start) * 1000)
+        return result
+    result["latency_ms"] = int((time.monotonic() - start) * 1000)
+    result["status"] = response.status_code
+    result["ok"] = response.status_code < 400
+    result["final_url"] = response.url
+    result["redirects"] = [[r.status_code, r.url] for r in response.history]
+    return result
+
+
+def check_links(urls, max_workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST,
+                timeout=DEFAULT_TIMEOUT, progress=None, cancel_event=None):
+    """并发检查一组链接，相同的链接只检查一次，返回 {url: 结果}
+
+    progress(done, total) 在工作线程中回调。
+    """
+    urls = list(dict.fromkeys(u for u in urls if is_http_url(u)))
+    total = len(urls)
+    results = {}
+    limiter = HostLimiter(per_host)
+    session = create_session(max_workers)
+
+    def task(url):
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        return check_url(session, url, limiter, timeout)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(task, url) for url in interleave_by_host(urls)]
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                if result is not None:
+                    results[result["url"]] = result
+                if progress is not None:
+                    progress(done, total)
+    finally:
+        session.close()
+    return results
+
+
+def export_report(links, results, path):
+    """导出检查报告，按扩展名选择 CSV 或 JSON"""
+    rows = []
+    for link in links:
+        result = results.get(link["url"]) or {}
+        rows.append({
+            "store": link["store"],
+            "id": link["id"],
+            "field": link["field"],
+            "name": link["name"],
+            "url": link["url"],
+            "ok": result.get("ok"),
+            "status": result.get("status"),
+            "latency_ms": result.get("latency_ms"),
+            "method": result.get("method"),
+            "final_url": result.get("final_url"),
+            "redirects": " -> ".join(f"{status} {url}" for status, url in result.get("redirects", [])),
+            "error": result.get("error"),
+            "checked_at": result.get("checked_at"),
+        })
+    if path.lower().endswith('.json'):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+    else:
+        # utf-8-sig 方便 Excel 直接打开中文
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else ["url"])
+            writer.writeheader()
+            writer.writerows(rows)
+    return len(rows)
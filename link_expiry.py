@@ -0,0 +1,161 @@
+"""下载链接中签名有效期的解析和索引
+
+file.json 中的 downloadUrl 是网盘生成的带签名的临时链接，例如
+
+    .../saranli.pdf?sign=YijJ...NM%3D%3A1757837348
+
+sign 参数中最后一个冒号之后的 1757837348 是链接失效的 Unix 时间戳，过期之后网盘页面的
+下载会直接失败。这里从链接中解析出过期时间并按时间排序建立索引：表格显示有效期、标记
+需要更新的文件都不需要网络请求，后台定时任务也只需要检查即将过期的少数链接。
+
+除了 sign=签名:时间戳，也识别常见的 Expires=时间戳（CloudFront、OSS 等）和
+X-Amz-Date + X-Amz-Expires（S3 预签名链接）。
+
+本模块不依赖 Qt。
+"""
+import bisect
+import calendar
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+# 距离过期不足这个时间（秒）的链接视为即将过期，需要提前在网盘中重新生成
+DEFAULT_WARN_SECONDS = 24 * 3600
+# 同一个链接两次后台检查之间至少间隔的时间（秒）
+DEFAULT_RECHECK_SECONDS = 6 * 3600
+
+
+def parse_expiry(url):
+    """返回链接的过期时间（Unix 时间戳），不是带有效期的签名链接时返回 None"""
+    if not isinstance(url, str):
+        return None
+    try:
+        query = dict(parse_qsl(urlsplit(url).query))
+    except ValueError:
+        return None
+    # parse_qsl 已经把 %3A 解码为冒号
+    sign = query.get("sign", "")
+    if ":" in sign:
+        timestamp = sign.rsplit(":", 1)[1]
+        if timestamp.isdigit():
+            return int(timestamp)
+    for key in ("Expires", "expires"):
+        if query.get(key, "").isdigit():
+            return int(query[key])
+    if query.get("X-Amz-Expires", "").isdigit():
+        try:
+            signed_at = calendar.timegm(time.strptime(query.get("X-Amz-Date", ""), "%Y%m%dT%H%M%SZ"))
+        except ValueError:
+            return None
+        return signed_at + int(query["X-Amz-Expires"])
+    return None
+
+
+def expiry_state(expires_at, now=None, warn_seconds=DEFAULT_WARN_SECONDS):
+    """"expired"（已过期）、"expiring"（即将过期）或 "valid"，没有有效期时返回 None"""
+    if expires_at is None:
+        return None
+    now = time.time() if now is None else now
+    if expires_at <= now:
+        return "expired"
+    if expires_at - now <= warn_seconds:
+        return "expiring"
+    return "valid"
+
+
+def _duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 86400:
+        return f"{seconds // 86400} 天"
+    if seconds >= 3600:
+        return f"{seconds // 3600} 小时"
+    return f"{max(seconds // 60, 1)} 分钟"
+
+
+def format_expiry(expires_at, now=None, warn_seconds=DEFAULT_WARN_SECONDS):
+    """表格中显示的有效期文字"""
+    state = expiry_state(expires_at, now, warn_seconds)
+    if state is None:
+        return ""
+    now = time.time() if now is None else now
+    if state == "expired":
+        return f"✗ 已过期 {_duration(now - expires_at)}"
+    if state == "expiring":
+        return f"⚠ {_duration(expires_at - now)}后过期"
+    return time.strftime("%Y-%m-%d %H:%M 到期", time.localtime(expires_at))
+
+
+def checked_at(result):
+    """链接检查结果的检查时间（Unix 时间戳），没有或无法识别时返回 None"""
+    try:
+        return time.mktime(time.strptime(result["checked_at"], "%Y-%m-%d %H:%M"))
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return None
+
+
+def needs_check(expires_at, result, now=None, recheck_seconds=DEFAULT_RECHECK_SECONDS):
+    """即将过期或已过期的链接是否需要再检查一次
+
+    已过期并且在过期之后检查过的链接不会再恢复，不再请求；其余的链接最近
+    recheck_seconds 内检查过时也跳过。
+    """
+    last = checked_at(result) if result else None
+    if last is None:
+        return True
+    now = time.time() if now is None else now
+    # checked_at 只精确到分钟
+    if expires_at <= now and last >= expires_at - 60:
+        return False
+    return now - last >= recheck_seconds
+
+
+def refresh_reason(expires_at, result, now=None, warn_seconds=DEFAULT_WARN_SECONDS):
+    """下载链接需要在网盘中重新生成的原因，不需要时返回 None
+
+    result 为该链接最近一次的检查结果（link_status 中的记录）。
+    """
+    state = expiry_state(expires_at, now, warn_seconds)
+    if state == "expired":
+        return "已过期"
+    if result and not result.get("ok"):
+        return "链接失效"
+    if state == "expiring":
+        return "即将过期"
+    return None
+
+
+class ExpiryIndex:
+    """文件 id -> 下载链接的过期时间，同时按过期时间排序，便于找出即将过期的链接"""
+
+    def __init__(self):
+        self.expiry = {}
+        # [(过期时间, 文件 id)]，按过期时间从早到晚
+        self._order = []
+
+    def __len__(self):
+        return len(self.expiry)
+
+    def get(self, file_id):
+        return self.expiry.get(file_id)
+
+    def rebuild(self, files):
+        self.expiry = {}
+        for file_info in files:
+            expires_at = parse_expiry(file_info.get("downloadUrl"))
+            if expires_at is not None:
+                self.expiry[file_info["id"]] = expires_at
+        self._order = sorted((expires_at, file_id) for file_id, expires_at in self.expiry.items())
+
+    def update(self, file_id, url):
+        """文件新增或修改后更新索引，url 为 None 表示文件已删除"""
+        old = self.expiry.pop(file_id, None)
+        if old is not None:
+            del self._order[bisect.bisect_left(self._order, (old, file_id))]
+        expires_at = parse_expiry(url)
+        if expires_at is not None:
+            self.expiry[file_id] = expires_at
+            bisect.insort(self._order, (expires_at, file_id))
+
+    def expiring(self, before):
+        """过期时间不晚于 before 的文件 id（包括已过期的），按过期时间从早到晚"""
+        end = bisect.bisect_right(self._order, (before, float("inf")))
+        return [file_id for _, file_id in self._order[:end]]
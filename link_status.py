@@ -0,0 +1,48 @@
+"""链接检查结果的保存和显示
+
+与 link_checker 分开，界面启动时读取上一次的检查结果、表格中显示状态都不需要
+导入 requests，真正检查链接时才加载网络相关的模块。
+"""
+import json
+import os
+
+DEFAULT_STATUS_FILE = os.path.join('.cache', 'link_status.json')
+
+
+def format_status(result):
+    """表格中显示的状态文本"""
+    if not result:
+        return ""
+    if result["status"] is None:
+        return f"失败: {result['error'][:60]}"
+    text = f"{result['status']} ({result['latency_ms']}ms)"
+    if result["redirects"]:
+        text += f" 重定向{len(result['redirects'])}次"
+    return text if result["ok"] else "✗ " + text
+
+
+def format_record_status(link_status, record, fields):
+    """拼接一条记录中多个链接的检查状态，fields 为 ((标签, 字段), ...)"""
+    parts = []
+    for label, field in fields:
+        result = link_status.get(record.get(field, ""))
+        if result:
+            parts.append(f"{label} {format_status(result)}")
+    return " | ".join(parts)
+
+
+def load_status(path=DEFAULT_STATUS_FILE):
+    """读取上一次的检查结果，{url: 结果}"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_status(results, path=DEFAULT_STATUS_FILE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
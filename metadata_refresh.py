@@ -0,0 +1,108 @@
+"""批量刷新全部网站的描述
+
+并发抓取 data.json 中的所有网站，共用一个连接池会话，并限制每个主机的并发数。
+请求带上缓存中的 ETag / Last-Modified，未变化的网站只收到 304，不再重新下载。
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from http_cache import HttpCache
+from http_pool import (DEFAULT_PER_HOST, DEFAULT_WORKERS, HostLimiter,
+                       create_session, interleave_by_host)
+from site_metadata import FetchCancelled, format_description, open_page, read_metadata
+
+# 单个网站的刷新结果
+UPDATED = "updated"
+NOT_MODIFIED = "not_modified"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+def iter_websites(data):
+    for category in data.get("categories", []):
+        for website in category.get("websites", []):
+            yield website
+
+
+def fetch_with_cache(session, url, cache, limiter, cancel_event=None):
+    """条件请求一个网址，返回 (状态, 解析结果)"""
+    if cancel_event is not None and cancel_event.is_set():
+        return CANCELLED, None
+    entry = cache.get(url)
+    with limiter(url):
+        response = open_page(url, session, headers=HttpCache.conditional_headers(entry))
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            return NOT_MODIFIED, entry["payload"]
+        try:
+            response.raise_for_status()
+        except Exception:
+            response.close()
+            raise
+        metadata = read_metadata(response, cancel_event)
+    cache.put(url, response.headers, metadata)
+    return UPDATED, metadata
+
+
+def refresh_all_metadata(websites, cache_dir=None, max_workers=DEFAULT_WORKERS,
+                         per_host=DEFAULT_PER_HOST, progress=None, cancel_event=None):
+    """并发刷新给定的网站，返回 [{"id", "url", "status", "metadata", "error"}]
+
+    websites 只需包含 id 和 url，GUI 中应传入快照，避免工作线程读取正在修改的数据。
+    相同的链接只请求一次，结果分给使用该链接的所有网站。
+    progress(done, total) 在工作线程中回调，total 为不同链接的数量。
+    """
+    cache = HttpCache(cache_dir) if cache_dir else HttpCache()
+    limiter = HostLimiter(per_host)
+    # 链接 -> 使用该链接的网站
+    by_url = {}
+    for website in websites:
+        if website.get("url", "").startswith(('http://', 'https://')):
+            by_url.setdefault(website["url"], []).append(website)
+    total = len(by_url)
+    results = []
+    session = create_session(max_workers)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(fetch_with_cache, session, url, cache, limiter, cancel_event): url
+                for url in interleave_by_host(by_url)
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                url = futures[future]
+                status, metadata, error = FAILED, None, ""
+                try:
+                    status, metadata = future.result()
+                except FetchCancelled:
+                    status = CANCELLED
+                except Exception as e:
+                    error = str(e)
+                for website in by_url[url]:
+                    results.append({"id": website["id"], "url": url, "status": status,
+                                    "metadata": metadata, "error": error})
+                if progress is not None:
+                    progress(done, total)
+    finally:
+        session.close()
+    return results
+
+
+def apply_results(index, results, overwrite=False):
+    """把刷新结果写回网站描述，返回被修改的网站 id 列表
+
+    overwrite 为 False 时只填充描述为空的网站，不覆盖手写的描述。
+    """
+    changed = []
+    for result in results:
+        if result["metadata"] is None:
+            continue
+        website, _, _ = index.find_website(result["id"])
+        # 刷新期间网站可能已被删除或修改了URL
+        if website is None or website["url"] != result["url"]:
+            continue
+        if website.get("description") and not overwrite:
+            continue
+        description = format_description(result["metadata"]).strip()
+        if description and description != website.get("description"):
+            website["description"] = description
+            changed.append(website["id"])
+    return changed
@@ -1,6 +1,9 @@
 // 移动端网站数据处理
 let websiteData = [];
 let currentWebsiteUrl = ''; // 存储当前网站的URL
+let searchIndex = null; // 管理器生成的搜索索引（search_index.json），词项 -> 网站id数组
+let searchVocabulary = []; // 所有词项，单字和英文按子串匹配时遍历
+let websiteIconSprite = null; // 网站图标雪碧图（web_ico/sprite.json），没有时为 null
 
 // 页面可见性变化处理函数
 function handleVisibilityChange() {
@@ -30,10 +33,13 @@ document.addEventListener('DOMContentLoaded', function() {
 // 加载数据
 async function loadData() {
     try {
-        const response = await fetch('data.json');
-        const data = await response.json();
+        // 图标雪碧图与数据一起读取，渲染时所有图标只需要一张图片
+        const [data, sprite] = await Promise.all([fetchDataFile('data.json'), loadIconSprite()]);
+        websiteIconSprite = sprite;
         // 使用与桌面端相同的数据结构
         websiteData = data.categories;
+        // 搜索索引在后台加载，不影响首屏渲染
+        loadSearchIndex();
     } catch (error) {
         console.error('加载数据失败:', error);
         // 如果加载失败，使用默认数据
@@ -71,7 +77,7 @@ function renderCategories() {
                     ${category.websites.map(website => `
                         <div class="website-item-mobile" data-url="${website.url}">
                             <div class="website-header">
-                                <img src="web_ico/${website.name}.png" alt="${website.name}图标" class="website-icon" onerror="this.src='web_ico/网站.png'">
+                                ${websiteIconHtml(website)}
                                 <h3>${website.name}</h3>
                             </div>
                             <p>${website.description}</p>
@@ -197,6 +203,72 @@ function setupEventListeners() {
     });
 }
 
+// 加载预生成的搜索索引
+async function loadSearchIndex() {
+    try {
+        const index = await fetchDataFile('search_index.json');
+        const websiteCount = websiteData.reduce((count, category) => count + category.websites.length, 0);
+        // 索引与data.json不一致时（例如只更新了其中一个文件）不使用索引
+        if (index.version !== 1 || index.count !== websiteCount) {
+            return;
+        }
+        // id按差值存储，还原为实际的id
+        const tokens = {};
+        Object.keys(index.tokens).forEach(token => {
+            let id = 0;
+            tokens[token] = index.tokens[token].map(delta => (id += delta));
+        });
+        searchVocabulary = Object.keys(tokens).sort();
+        searchIndex = tokens;
+    } catch (error) {
+        console.error('加载搜索索引失败，使用逐条搜索:', error);
+    }
+}
+
+// 切分搜索词，与管理器 search_index.py 中的 tokenize 保持一致：
+// 英文和数字按单词切分，连续的中文按相邻两个字切分
+function tokenize(text) {
+    const tokens = [];
+    const runs = text.toLowerCase().match(/[a-z0-9]+|[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+/g) || [];
+    runs.forEach(run => {
+        if (run[0] >= '\u3400' && run.length > 1) {
+            for (let i = 0; i < run.length - 1; i++) {
+                tokens.push(run.substr(i, 2));
+            }
+        } else {
+            tokens.push(run);
+        }
+    });
+    return tokens;
+}
+
+// 用搜索索引查找同时匹配所有搜索词的网站id，返回Set；
+// 搜索词中没有可以索引的内容（例如只有标点）时返回null，改为逐条匹配
+function searchWithIndex(searchTerm) {
+    const tokens = new Set(tokenize(searchTerm));
+    if (tokens.size === 0) {
+        return null;
+    }
+    let result = null;
+    for (const token of tokens) {
+        let terms;
+        if (token[0] >= '\u3400' && token.length > 1) {
+            // 中文二元组精确匹配
+            terms = searchIndex[token] ? [token] : [];
+        } else {
+            // 单个汉字匹配包含它的二元组；英文按子串匹配，与逐条搜索一致（输入hub可以找到github）
+            terms = searchVocabulary.filter(t => t.includes(token));
+        }
+        const ids = new Set();
+        terms.forEach(term => searchIndex[term].forEach(id => ids.add(id)));
+        result = result === null ? ids : new Set([...result].filter(id => ids.has(id)));
+        if (result.size === 0) {
+            break;
+        }
+    }
+    return result;
+}
+
 // 执行搜索
 function performSearch() {
     const searchTerm = document.getElementById('searchInput').value.toLowerCase().trim();
@@ -207,9 +279,13 @@ function performSearch() {
         return;
     }
     
+    // 有搜索索引时按索引查找，否则逐条匹配名称和描述
+    const matchedIds = searchIndex ? searchWithIndex(searchTerm) : null;
+    
     // 过滤网站数据
     const filteredData = websiteData.map(category => {
-        const filteredWebsites = category.websites.filter(website => 
+        const filteredWebsites = category.websites.filter(website => matchedIds ?
+            matchedIds.has(website.id) :
             website.name.toLowerCase().includes(searchTerm) || 
             website.description.toLowerCase().includes(searchTerm)
         );
@@ -242,7 +318,7 @@ function renderSearchResults(data) {
                 ${category.websites.map(website => `
                     <div class="website-item-mobile" data-url="${website.url}">
                         <div class="website-header">
-                            <img src="web_ico/${website.name}.png" alt="${website.name}图标" class="website-icon" onerror="this.src='web_ico/网站.png'">
+                            ${websiteIconHtml(website)}
                             <h3>${website.name}</h3>
                         </div>
                         <p>${website.description}</p>
@@ -610,15 +686,15 @@ function showNotificationDetail(notification) {
     detailModal.classList.add('active');
 }
 
-function updateNotificationsModal() {
+// pageCount 为显示的通知页数，点击“加载更多”时加一
+function updateNotificationsModal(pageCount = 1) {
     const notificationsModal = document.getElementById('about-modal');
     const modalBody = notificationsModal.querySelector('.modal-body');
     
-    // 通过fetch获取通知数据
-    fetch('notification.json')
-        .then(response => response.json())
-        .then(data => {
-            const notifications = data.notifications || [];
+    // 通过fetch获取通知数据，只读取最新的几页和置顶通知所在的页
+    loadNotificationFeed(pageCount)
+        .then(feed => {
+            const notifications = feed.notifications;
             
             if (notifications.length === 0) {
                 modalBody.innerHTML = '<p>暂无通知</p>';
@@ -628,10 +704,8 @@ function updateNotificationsModal() {
             // 获取已读通知ID列表
             const readNotifications = JSON.parse(localStorage.getItem('readNotifications') || '[]');
             
-            // 按置顶状态排序，置顶的通知显示在前面
-            const pinnedNotifications = notifications.filter(n => n.pinned);
-            const unpinnedNotifications = notifications.filter(n => !n.pinned);
-            const sortedNotifications = [...pinnedNotifications, ...unpinnedNotifications];
+            // 置顶的通知已经排在前面
+            const sortedNotifications = notifications;
             
             // 构建通知列表HTML
             let notificationsHTML = '<div class="notifications-list">';
@@ -681,11 +755,23 @@ function updateNotificationsModal() {
                     </div>
                 `;
             });
+            if (feed.hasMore) {
+                notificationsHTML += '<button class="load-more-notifications">加载更多</button>';
+            }
             notificationsHTML += '</div>';
             
             // 更新模态框内容
             modalBody.innerHTML = notificationsHTML;
             
+            // 加载更早的通知
+            const loadMoreButton = modalBody.querySelector('.load-more-notifications');
+            if (loadMoreButton) {
+                loadMoreButton.addEventListener('click', function(e) {
+                    e.stopPropagation();
+                    updateNotificationsModal(pageCount + 1);
+                });
+            }
+            
             // 为查看详情链接添加事件处理
             const viewDetailLinks = modalBody.querySelectorAll('.view-detail-link');
             viewDetailLinks.forEach(link => {
@@ -1008,6 +1094,19 @@ function showToast(message, type = 'info', duration = 3000) {
     }, duration);
 }
 
+// 网站卡片中的图标：有雪碧图时使用其中的图标，雪碧图已包含 web_ico/ 中手动放置的图标，
+// 其中没有的网站直接显示默认图标；没有雪碧图时按网站名称读取 web_ico/ 中的图标
+function websiteIconHtml(website) {
+    const style = spriteIconStyle(websiteIconSprite, website.id);
+    if (style) {
+        return `<span class="website-icon sprite-icon" role="img" aria-label="${website.name}图标" style="${style}"></span>`;
+    }
+    if (websiteIconSprite) {
+        return `<img src="web_ico/网站.png" alt="${website.name}图标" class="website-icon">`;
+    }
+    return `<img src="web_ico/${website.name}.png" alt="${website.name}图标" class="website-icon" onerror="this.src='web_ico/网站.png'">`;
+}
+
 // 获取网站图标
 function getWebsiteIcon(url) {
     // 尝试获取网站的favicon
@@ -1099,6 +1198,13 @@ function renderFavoriteWebsites() {
             
             favoritesContainer.appendChild(dockItem);
             
+            // 雪碧图中有该网站的图标时直接使用，不再单独请求 favicon
+            const spriteStyle = spriteIconStyle(websiteIconSprite, websiteInfo.id);
+            if (spriteStyle) {
+                dockItem.querySelector('.website-icon').innerHTML = `<span class="sprite-icon" style="${spriteStyle}"></span>`;
+                return;
+            }
+            
             // 然后尝试获取网站真实图标并替换
             const iconUrl = getWebsiteIcon(item.url);
             if (iconUrl) {
@@ -1291,21 +1397,9 @@ function checkAndShowNewNotifications() {
     // 获取已读通知ID列表
     const readNotifications = JSON.parse(localStorage.getItem('readNotifications') || '[]');
     
-    // 获取通知数据
-    fetch('notification.json')
-        .then(response => response.json())
-        .then(data => {
-            const notifications = data.notifications || [];
-            
-            if (notifications.length === 0) {
-                return;
-            }
-            
-            // 检查是否有未读通知
-            const hasUnread = notifications.some(notification => 
-                !readNotifications.includes(notification.id)
-            );
-            
+    // 只读取通知分页的 head.json 检查是否有未读通知
+    hasUnreadNotifications(readNotifications)
+        .then(hasUnread => {
             // 如果有未读通知，则自动弹出通知页面
             if (hasUnread) {
                 openModal('about');
@@ -0,0 +1,125 @@
+"""把通知拆分成一个很小的 head.json 和按 id 分段的固定大小分页
+
+notification.json 包含所有通知的完整内容，页面每次打开都要整个下载，只是为了判断有没有
+未读通知和显示置顶通知。这里在 notification.json 旁边生成 notifications/ 目录：
+
+    notifications/head.json
+        {"version": 1, "count": 2, "latest_id": 4, "pinned": [3], "page_size": 20,
+         "pages": [{"page": 0, "count": 2, "sha": "..."}]}
+    notifications/page-0.json
+        {"page": 0, "notifications": [id 为 1-20 的通知，按 id 从新到旧]}
+
+第 k 页固定包含 id 为 k*page_size+1 到 (k+1)*page_size 的通知，新通知只会写入最后一页，
+删除或修改一条通知也只影响它所在的一页。生成时与上一次的 head.json 比较各页的哈希，
+只重写有变化的页。页面用 ?v=哈希 请求分页，内容不变的页可以一直使用浏览器缓存。
+
+本模块不依赖 Qt。
+"""
+import hashlib
+import json
+import os
+import re
+
+from storage import atomic_write_bytes
+
+FEED_DIR = 'notifications'
+HEAD_FILE = 'head.json'
+FEED_VERSION = 1
+PAGE_SIZE = 20
+
+PAGE_RE = re.compile(r'^page-(\d+)\.json$')
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def feed_dir(notification_file):
+    """notification.json 对应的分页目录"""
+    return os.path.join(os.path.dirname(notification_file), FEED_DIR)
+
+
+def page_file(page):
+    return f"page-{page}.json"
+
+
+def page_of(notification_id, page_size=PAGE_SIZE):
+    return max(notification_id - 1, 0) // page_size
+
+
+def build_feed(notifications, page_size=PAGE_SIZE):
+    """返回 (head, {页号: 分页文件内容})"""
+    grouped = {}
+    for notification in notifications:
+        grouped.setdefault(page_of(notification["id"], page_size), []).append(notification)
+    pages = {}
+    entries = []
+    for page in sorted(grouped, reverse=True):
+        items = sorted(grouped[page], key=lambda n: n["id"], reverse=True)
+        pages[page] = _dumps({"page": page, "notifications": items})
+        entries.append({"page": page, "count": len(items),
+                        "sha": hashlib.sha1(pages[page]).hexdigest()[:10]})
+    head = {
+        "version": FEED_VERSION,
+        "count": len(notifications),
+        "latest_id": max((n["id"] for n in notifications), default=None),
+        "pinned": [n["id"] for n in notifications if n.get("pinned")],
+        "page_size": page_size,
+        "pages": entries,
+    }
+    return head, pages
+
+
+def load_head(path):
+    """读取 head.json，不存在、损坏或版本不同时返回 None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            head = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(head, dict) or head.get("version") != FEED_VERSION:
+        return None
+    return head
+
+
+def write_feed(notification_file, notification_data, page_size=PAGE_SIZE):
+    """生成 notification_file 旁边的分页目录，只写入有变化的文件
+
+    返回 {"written": [...], "removed": [...]}，为相对于分页目录的文件名。
+    """
+    directory = feed_dir(notification_file)
+    os.makedirs(directory, exist_ok=True)
+    head_path = os.path.join(directory, HEAD_FILE)
+    previous = load_head(head_path)
+    old_shas = {}
+    if previous is not None and previous.get("page_size") == page_size:
+        old_shas = {entry["page"]: entry["sha"] for entry in previous["pages"]}
+
+    head, pages = build_feed(notification_data.get("notifications", []), page_size)
+    stats = {"written": [], "removed": []}
+    for entry in head["pages"]:
+        path = os.path.join(directory, page_file(entry["page"]))
+        if old_shas.get(entry["page"]) == entry["sha"] and os.path.exists(path):
+            continue
+        atomic_write_bytes(path, pages[entry["page"]])
+        stats["written"].append(page_file(entry["page"]))
+
+    # 分页写完之后再更新 head.json，最后删除不再使用的分页，页面不会读到指向不存在分页的 head
+    if head != previous or stats["written"]:
+        atomic_write_bytes(head_path, _dumps(head))
+        stats["written"].append(HEAD_FILE)
+    for filename in sorted(os.listdir(directory)):
+        match = PAGE_RE.match(filename)
+        if match and int(match.group(1)) not in pages:
+            os.remove(os.path.join(directory, filename))
+            stats["removed"].append(filename)
+    return stats
+
+
+def feed_paths(notification_file):
+    """分页目录中需要发布的所有文件的路径"""
+    directory = feed_dir(notification_file)
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, filename) for filename in sorted(os.listdir(directory))
+            if filename == HEAD_FILE or PAGE_RE.match(filename)]
@@ -0,0 +1,114 @@
+"""文件预览窗口
+
+原来每次预览都新建一个 QDialog 和 QWebEngineView，Chromium 的页面状态和缓存在关闭
+对话框后全部丢弃。这里整个程序只创建一个预览窗口，关闭时只是隐藏：
+
+- 使用带磁盘 HTTP 缓存的持久化 QWebEngineProfile，重启程序后缓存仍然有效；
+- 已经打开过或预加载过的页面保存在一个小的页面池中，再次预览时直接切换，不需要重新加载；
+- prefetch() 在后台预加载文件表格中相邻文件的预览链接。
+
+导入本模块会加载 QtWebEngine，WebsiteManager 在第一次预览时才导入。
+"""
+import os
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt, QUrl
+from PyQt5.QtWidgets import (QApplication, QCheckBox, QDialog, QHBoxLayout, QPushButton,
+                             QVBoxLayout)
+from PyQt5.QtWebEngineWidgets import QWebEnginePage, QWebEngineProfile, QWebEngineView
+
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'webengine')
+# 磁盘缓存上限
+HTTP_CACHE_SIZE = 200 * 1024 * 1024
+# 同时保留的页面数量（当前页面加上预加载的页面）
+PAGE_POOL_SIZE = 4
+
+
+class PreviewWindow(QDialog):
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("预览")
+        self.setGeometry(100, 100, 1000, 700)
+        self.setWindowFlags(self.windowFlags() | Qt.WindowMinMaxButtonsHint)
+
+        cache_dir = os.path.abspath(cache_dir)
+        # 命名的 profile 会把 Cookie 和缓存保存到磁盘。profile 必须比使用它的页面晚销毁，
+        # 所以挂在 QApplication 上，而不是挂在本窗口上
+        self.profile = QWebEngineProfile("preview", QApplication.instance())
+        self.profile.setPersistentStoragePath(os.path.join(cache_dir, 'storage'))
+        self.profile.setCachePath(os.path.join(cache_dir, 'cache'))
+        self.profile.setHttpCacheType(QWebEngineProfile.DiskHttpCache)
+        self.profile.setHttpCacheMaximumSize(HTTP_CACHE_SIZE)
+
+        # url -> QWebEnginePage，按最近使用排序，最后一个最新
+        self.pages = OrderedDict()
+        self.current_url = None
+
+        layout = QVBoxLayout()
+        self.web_view = QWebEngineView(self)
+        layout.addWidget(self.web_view)
+
+        button_layout = QHBoxLayout()
+        self.prefetch_check = QCheckBox("预加载相邻文件")
+        self.prefetch_check.setChecked(True)
+        button_layout.addWidget(self.prefetch_check)
+        button_layout.addStretch()
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.close)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+    def _page(self, url):
+        """取出池中的页面，没有时新建并开始加载"""
+        page = self.pages.pop(url, None)
+        if page is None:
+            page = QWebEnginePage(self.profile, self)
+            # 预加载的页面不出声，切换到前台时再打开声音
+            page.setAudioMuted(True)
+            page.load(QUrl(url))
+        self.pages[url] = page
+        self._trim()
+        return page
+
+    def _trim(self):
+        while len(self.pages) > PAGE_POOL_SIZE:
+            url = next(iter(self.pages))
+            if url == self.current_url:
+                self.pages.move_to_end(url)
+                continue
+            self.pages.pop(url).deleteLater()
+
+    def show_url(self, url):
+        """显示预览窗口并切换到 url，页面已在池中时不重新加载"""
+        if url != self.current_url:
+            # 切换前先让当前页面静音，它留在池中继续播放的音视频不能在后台出声
+            outgoing = self.pages.get(self.current_url)
+            if outgoing is not None:
+                outgoing.setAudioMuted(True)
+            self.current_url = url
+            page = self._page(url)
+            self.web_view.setPage(page)
+        else:
+            page = self.pages[url]
+        page.setAudioMuted(False)
+        self.show()
+        self.raise_()
+        self.activateWindow()
+
+    def prefetch(self, urls):
+        """后台预加载这些链接，只占用池中除当前页面外的位置"""
+        if not self.prefetch_check.isChecked():
+            return
+        for url in list(urls)[:PAGE_POOL_SIZE - 1]:
+            if url.startswith(('http://', 'https://')) and url != self.current_url:
+                self._page(url)
+        # 预加载不能把当前页面挤出池
+        if self.current_url in self.pages:
+            self.pages.move_to_end(self.current_url)
+
+    def hideEvent(self, event):
+        # 关闭窗口只是隐藏，保留页面和缓存；隐藏时所有页面静音
+        for page in self.pages.values():
+            page.setAudioMuted(True)
+        super().hideEvent(event)
@@ -0,0 +1,145 @@
+"""生成发布用的压缩、带内容哈希的数据文件
+
+静态页面每次打开都要下载 data.json、file.json、notification.json、search_index.json，
+而这些文件为了便于查看差异都带缩进保存。发布前在 dist/ 中为每个文件生成：
+
+- 去掉空白的紧凑 JSON，文件名带内容的 SHA-256 前缀，例如 dist/data.3f2a9c1b7e.json；
+- 同名的 .gz（gzip -9）和 .br（brotli，需要安装 brotli 包）预压缩文件，
+  供支持 gzip_static/brotli_static 的服务器直接返回；
+- dist/manifest.json，记录每个原文件名对应的带哈希文件和各版本的大小。
+
+页面先以 no-cache 方式读取很小的 manifest.json，再按其中的路径请求数据文件。内容不变时
+文件名不变，浏览器可以一直使用缓存，只重新下载有变化的文件。上一版 manifest 引用的文件
+会保留一轮，已经打开的页面在发布后仍然可以读取；更早的文件会被删除。
+
+本模块不依赖 Qt，brotli 是可选依赖。
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from storage import atomic_write_bytes
+
+ARTIFACT_DIR = 'dist'
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_VERSION = 1
+# 文件名中内容哈希的长度
+HASH_LENGTH = 10
+# 预压缩版本的扩展名 -> manifest 中记录大小的键
+VARIANTS = {".gz": "gzip", ".br": "br"}
+# 由本模块生成的文件，清理旧文件时只删除这些
+ARTIFACT_RE = re.compile(r'\.[0-9a-f]{%d}\.json(\.gz|\.br)?$' % HASH_LENGTH)
+
+
+def minify_json(raw):
+    """去掉 JSON 中所有不必要的空白，保留中文原文"""
+    return json.dumps(json.loads(raw), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def compress_variants(data):
+    """返回 {扩展名: 压缩后的内容}，没有安装 brotli 时只有 gzip 版本"""
+    # mtime=0 使相同的内容每次压缩得到相同的字节，发布时不会被当作修改
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    return variants
+
+
+def hashed_name(name, digest):
+    base, ext = os.path.splitext(name)
+    return f"{base}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def load_manifest(path):
+    """读取 manifest，不存在、损坏或版本不同时返回 None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def manifest_paths(manifest):
+    """manifest 引用的所有文件（包括预压缩版本），为相对于站点根目录的路径"""
+    paths = set()
+    for entry in manifest["files"].values():
+        paths.add(entry["path"])
+        paths.update(entry["path"] + ext for ext, key in VARIANTS.items() if key in entry)
+    return paths
+
+
+def build_artifacts(paths, directory='.', output_dir=ARTIFACT_DIR):
+    """为 paths 中的 JSON 文件生成发布版本和 manifest
+
+    paths 为文件路径，manifest 中的键和路径都相对于站点根目录 directory，
+    output_dir 也相对于 directory。已经存在的带哈希文件不会重写。
+    返回 (manifest, stats)，stats 为 {"written", "unchanged", "removed"} 三个列表。
+    """
+    target = os.path.join(directory, output_dir)
+    os.makedirs(target, exist_ok=True)
+    manifest_file = os.path.join(target, MANIFEST_FILE)
+    previous = load_manifest(manifest_file)
+    prefix = output_dir.replace(os.sep, '/').strip('/')
+    stats = {"written": [], "unchanged": [], "removed": []}
+
+    files = {}
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        name = os.path.relpath(path, directory).replace(os.sep, '/')
+        with open(path, 'rb') as f:
+            data = minify_json(f.read())
+        digest = hashlib.sha256(data).hexdigest()
+        filename = hashed_name(os.path.basename(name), digest)
+        artifact = os.path.join(target, filename)
+        entry = {"path": f"{prefix}/{filename}", "sha256": digest, "size": len(data)}
+
+        written = False
+        if not os.path.exists(artifact):
+            atomic_write_bytes(artifact, data)
+            written = True
+        for ext, content in compress_variants(data).items():
+            if not os.path.exists(artifact + ext):
+                atomic_write_bytes(artifact + ext, content)
+                written = True
+            entry[VARIANTS[ext]] = len(content)
+        stats["written" if written else "unchanged"].append(name)
+        files[name] = entry
+
+    manifest = {"version": MANIFEST_VERSION, "files": files, "previous": []}
+    if previous is not None:
+        if previous["files"] == files:
+            manifest["previous"] = previous.get("previous", [])
+        else:
+            manifest["previous"] = sorted(manifest_paths(previous) - manifest_paths(manifest))
+    if manifest != previous:
+        # manifest 每次页面加载都要读取，同样使用紧凑格式
+        atomic_write_bytes(manifest_file, json.dumps(manifest, ensure_ascii=False,
+                                                     separators=(',', ':')).encode('utf-8'))
+
+    # 删除既不属于当前版本、也不属于上一版本的旧文件
+    keep = manifest_paths(manifest) | set(manifest["previous"])
+    for filename in sorted(os.listdir(target)):
+        if ARTIFACT_RE.search(filename) and f"{prefix}/{filename}" not in keep:
+            os.remove(os.path.join(target, filename))
+            stats["removed"].append(f"{prefix}/{filename}")
+    return manifest, stats
+
+
+def artifact_paths(directory='.', output_dir=ARTIFACT_DIR):
+    """output_dir 中需要发布的所有文件的路径"""
+    target = os.path.join(directory, output_dir)
+    if not os.path.isdir(target):
+        return []
+    return [os.path.join(target, filename) for filename in sorted(os.listdir(target))
+            if filename == MANIFEST_FILE or ARTIFACT_RE.search(filename)]
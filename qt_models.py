@@ -0,0 +1,654 @@
+"""WebsiteManager 使用的 Qt 数据模型
+
+模型直接读写 data.json 对应的字典，所有增删移动都通过 DataIndex 完成，
+并发出细粒度的 beginInsertRows / beginMoveRows / dataChanged 信号，
+视图只重绘受影响的行，不再每次操作都重建整棵树。
+"""
+import time
+
+from PyQt5.QtCore import (QAbstractItemModel, QAbstractTableModel, QEvent, QModelIndex, QRect,
+                          QSortFilterProxyModel, Qt, pyqtSignal)
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+
+from file_size import format_size, size_bytes
+from link_expiry import ExpiryIndex, format_expiry, refresh_reason
+from link_status import format_record_status, format_status
+
+# 分类节点每次懒加载的网站数量
+FETCH_BATCH = 500
+
+
+class WebsiteTreeModel(QAbstractItemModel):
+    """分类 -> 网站 两级树
+
+    分类节点的 internalId 为 0；网站节点的 internalId 为所属分类的 id + 1，
+    通过 DataIndex 可以 O(1) 找到父节点所在的行。
+    """
+    HEADERS = ["网站名称", "URL", "描述", "链接状态"]
+    STATUS_COLUMN = 3
+
+    def __init__(self, link_status=None, search_index=None, parent=None):
+        super().__init__(parent)
+        self.source_data = {"categories": []}
+        self.data_index = None
+        self.link_status = link_status if link_status is not None else {}
+        # 增删改网站时同步更新搜索索引，重新加载数据时由调用方重建
+        self.search_index = search_index
+        # 分类 id -> 已加载到视图中的网站数量
+        self.loaded = {}
+
+    # ---------- 数据源 ----------
+
+    def set_source(self, data, index):
+        """重新加载全部数据时调用"""
+        self.beginResetModel()
+        self.source_data = data
+        self.data_index = index
+        self.loaded = {}
+        self.endResetModel()
+
+    @property
+    def categories(self):
+        return self.source_data["categories"]
+
+    def _category_at(self, row):
+        return self.categories[row]
+
+    def _category_of(self, index):
+        """网站节点所属的分类"""
+        return self.data_index.get_category(index.internalId() - 1)
+
+    def _loaded_count(self, category):
+        return min(self.loaded.get(category["id"], 0), len(category["websites"]))
+
+    def is_website(self, index):
+        return index.isValid() and index.internalId() != 0
+
+    def website_id(self, index):
+        """返回网站 id，分类节点返回 None"""
+        if not self.is_website(index):
+            return None
+        category = self._category_of(index)
+        return category["websites"][index.row()]["id"]
+
+    def category_id(self, index):
+        if not index.isValid():
+            return None
+        if self.is_website(index):
+            return index.internalId() - 1
+        return self._category_at(index.row())["id"]
+
+    def category_index(self, category_id):
+        row = self.data_index.category_position(category_id)
+        if row < 0:
+            return QModelIndex()
+        return self.index(row, 0)
+
+    def website_index(self, website_id, column=0):
+        website, category, pos = self.data_index.find_website(website_id)
+        if website is None:
+            return QModelIndex()
+        parent = self.category_index(category["id"])
+        # 还没有懒加载到的行先加载进来
+        while pos >= self._loaded_count(category) and self.canFetchMore(parent):
+            self.fetchMore(parent)
+        return self.createIndex(pos, column, category["id"] + 1)
+
+    # ---------- QAbstractItemModel 接口 ----------
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, 0)
+        category = self._category_at(parent.row())
+        return self.createIndex(row, column, category["id"] + 1)
+
+    def parent(self, index):
+        if not self.is_website(index):
+            return QModelIndex()
+        return self.createIndex(self.data_index.category_position(index.internalId() - 1), 0, 0)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.categories)
+        if self.is_website(parent) or parent.column() != 0:
+            return 0
+        return self._loaded_count(self._category_at(parent.row()))
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self.categories)
+        if self.is_website(parent):
+            return False
+        return bool(self._category_at(parent.row())["websites"])
+
+    def canFetchMore(self, parent):
+        if not parent.isValid() or self.is_website(parent):
+            return False
+        category = self._category_at(parent.row())
+        return self._loaded_count(category) < len(category["websites"])
+
+    def fetchMore(self, parent):
+        category = self._category_at(parent.row())
+        start = self._loaded_count(category)
+        end = min(start + FETCH_BATCH, len(category["websites"]))
+        if end <= start:
+            return
+        self.beginInsertRows(parent, start, end - 1)
+        self.loaded[category["id"]] = end
+        self.endInsertRows()
+
+    def load_websites(self, website_ids):
+        """把这些网站所在的行都懒加载进来，过滤搜索结果前调用"""
+        last = {}
+        for website_id in website_ids:
+            website, category, pos = self.data_index.find_website(website_id)
+            if website is not None and pos > last.get(category["id"], -1):
+                last[category["id"]] = pos
+        for category_id, pos in last.items():
+            parent = self.category_index(category_id)
+            category = self.data_index.get_category(category_id)
+            while pos >= self._loaded_count(category) and self.canFetchMore(parent):
+                self.fetchMore(parent)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if not self.is_website(index):
+            category = self._category_at(index.row())
+            if role == Qt.DisplayRole and index.column() == 0:
+                return category["name"]
+            if role == Qt.UserRole:
+                return category["id"]
+            return None
+
+        website = self._category_of(index)["websites"][index.row()]
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            column = index.column()
+            if column == 0:
+                return website["name"]
+            if column == 1:
+                return website["url"]
+            if column == 2:
+                return website["description"]
+            if column == self.STATUS_COLUMN:
+                return format_status(self.link_status.get(website["url"]))
+        if role == Qt.UserRole:
+            return website["id"]
+        return None
+
+    # ---------- 分类的增删移动 ----------
+
+    def add_category(self, category):
+        row = len(self.categories)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.data_index.add_category(self.categories, category)
+        self.endInsertRows()
+
+    def remove_category(self, category_id):
+        row = self.data_index.category_position(category_id)
+        if row < 0:
+            return None
+        self.beginRemoveRows(QModelIndex(), row, row)
+        category = self.data_index.remove_category(self.categories, category_id)
+        self.loaded.pop(category_id, None)
+        self.endRemoveRows()
+        if self.search_index is not None:
+            self.search_index.remove_category(category)
+        return category
+
+    def swap_categories(self, row, other):
+        """交换相邻的两个分类"""
+        upper, lower = min(row, other), max(row, other)
+        # 把上面一行移动到下面一行之后
+        self.beginMoveRows(QModelIndex(), upper, upper, QModelIndex(), lower + 1)
+        self.data_index.swap_categories(self.categories, row, other)
+        self.endMoveRows()
+
+    # ---------- 网站的增删移动 ----------
+
+    def add_website(self, category, website):
+        parent = self.category_index(category["id"])
+        row = len(category["websites"])
+        fully_loaded = self._loaded_count(category) == row
+        if fully_loaded:
+            self.beginInsertRows(parent, row, row)
+        self.data_index.add_website(category, website)
+        if self.search_index is not None:
+            self.search_index.add_website(website, category["name"])
+        if fully_loaded:
+            self.loaded[category["id"]] = row + 1
+            self.endInsertRows()
+
+    def remove_website(self, website_id):
+        website, category, pos = self.data_index.find_website(website_id)
+        if website is None:
+            return None
+        loaded = pos < self._loaded_count(category)
+        if loaded:
+            self.beginRemoveRows(self.category_index(category["id"]), pos, pos)
+        self.data_index.remove_website(website_id)
+        if self.search_index is not None:
+            self.search_index.remove_website(website_id)
+        if loaded:
+            self.loaded[category["id"]] -= 1
+            self.endRemoveRows()
+        return website
+
+    def move_website(self, website_id, target_category):
+        """移动到另一个分类的末尾"""
+        website = self.remove_website(website_id)
+        if website is not None:
+            self.add_website(target_category, website)
+        return website
+
+    def swap_websites(self, category, row, other):
+        """交换同一分类中相邻的两个网站，只影响这两行"""
+        parent = self.category_index(category["id"])
+        upper, lower = min(row, other), max(row, other)
+        while lower >= self._loaded_count(category) and self.canFetchMore(parent):
+            self.fetchMore(parent)
+        self.beginMoveRows(parent, upper, upper, parent, lower + 1)
+        self.data_index.swap_websites(category, row, other)
+        self.endMoveRows()
+
+    def website_changed(self, website_id):
+        if self.search_index is not None:
+            website, category, _ = self.data_index.find_website(website_id)
+            if website is not None:
+                self.search_index.update_website(website, category["name"])
+        index = self.website_index(website_id)
+        if index.isValid():
+            self.dataChanged.emit(index.sibling(index.row(), 0),
+                                  index.sibling(index.row(), self.columnCount() - 1))
+
+    def status_changed(self):
+        """链接检查结果更新后刷新状态列"""
+        for row, category in enumerate(self.categories):
+            count = self._loaded_count(category)
+            if count:
+                parent = self.index(row, 0)
+                self.dataChanged.emit(self.index(0, self.STATUS_COLUMN, parent),
+                                      self.index(count - 1, self.STATUS_COLUMN, parent))
+
+
+class WebsiteFilterProxy(QSortFilterProxyModel):
+    """按搜索结果过滤网站树，不排序，保持 data.json 中的顺序
+
+    matches 为 None 时不过滤；否则只显示 id 在 matches 中的网站及其所属分类。
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.matches = None
+        self.matched_categories = set()
+
+    def set_matches(self, matches):
+        self.matches = matches
+        self.matched_categories = set()
+        if matches is not None:
+            model = self.sourceModel()
+            for website_id in matches:
+                _, category, _ = model.data_index.find_website(website_id)
+                if category is not None:
+                    self.matched_categories.add(category["id"])
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.matches is None:
+            return True
+        model = self.sourceModel()
+        if not source_parent.isValid():
+            return model.categories[source_row]["id"] in self.matched_categories
+        index = model.index(source_row, 0, source_parent)
+        return model.website_id(index) in self.matches
+
+
+class FileTableModel(QAbstractTableModel):
+    """file.json 中的文件列表，按文件中的顺序排列，操作按钮由 ButtonDelegate 绘制
+
+    排序交给 QSortFilterProxyModel：sortRole 设为 SORT_ROLE 时大小列按字节数排序，
+    有效期列按过期时间排序。
+    """
+    HEADERS = ["文件名", "大小", "时间", "链接状态", "有效期", "预览链接", "下载链接", "编辑", "删除"]
+    SIZE_COLUMN = 1
+    TIME_COLUMN = 2
+    STATUS_COLUMN = 3
+    EXPIRY_COLUMN = 4
+    SORT_ROLE = Qt.UserRole + 1
+    # 按钮列 -> (按钮标识, 按钮文字)
+    BUTTON_COLUMNS = {
+        5: ("preview", "预览"),
+        6: ("download", "下载"),
+        7: ("edit", "编辑"),
+        8: ("delete", "删除"),
+    }
+    LINK_FIELDS = (("预览", "previewUrl"), ("下载", "downloadUrl"))
+    # 需要更新的原因 -> 有效期单元格的背景色
+    REFRESH_COLORS = {"已过期": "#f8d7da", "链接失效": "#f8d7da", "即将过期": "#fff3cd"}
+
+    def __init__(self, link_status=None, parent=None):
+        super().__init__(parent)
+        self.source_data = {"files": []}
+        self.data_index = None
+        self.link_status = link_status if link_status is not None else {}
+        # 下载链接的过期时间，增删改文件时同步更新，set_source 时重建
+        self.expiry_index = ExpiryIndex()
+
+    @property
+    def files(self):
+        return self.source_data["files"]
+
+    def set_source(self, file_data, index):
+        self.beginResetModel()
+        self.source_data = file_data
+        self.data_index = index
+        self.expiry_index.rebuild(self.files)
+        self.endResetModel()
+
+    def file_at(self, row):
+        return self.files[row]
+
+    def file_id(self, row):
+        return self.files[row]["id"]
+
+    def refresh_reason(self, file_info):
+        """下载链接需要重新生成的原因（已过期、即将过期或检查失败），不需要时返回 None"""
+        return refresh_reason(self.expiry_index.get(file_info["id"]),
+                              self.link_status.get(file_info.get("downloadUrl", "")))
+
+    def refresh_queue(self):
+        """需要重新生成下载链接的文件，[(文件, 原因)]，按过期时间从早到晚"""
+        queue = [(f, self.refresh_reason(f)) for f in self.files]
+        queue = [(f, reason) for f, reason in queue if reason]
+        queue.sort(key=lambda item: self.expiry_index.get(item[0]["id"]) or float("inf"))
+        return queue
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.files)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        file_info = self.files[index.row()]
+        column = index.column()
+        if role == Qt.UserRole:
+            return file_info["id"]
+        if role == self.SORT_ROLE:
+            if column == self.SIZE_COLUMN:
+                # 大小未知的排在最前（升序时）
+                size = size_bytes(file_info.get("size"))
+                return -1 if size is None else size
+            if column == self.EXPIRY_COLUMN:
+                # 没有有效期的链接排在最后（升序时）
+                expires_at = self.expiry_index.get(file_info["id"])
+                return float("inf") if expires_at is None else float(expires_at)
+            if column in self.BUTTON_COLUMNS:
+                return file_info["id"]
+            return self.data(index, Qt.DisplayRole) or ""
+        if role == Qt.BackgroundRole and column == self.EXPIRY_COLUMN:
+            color = self.REFRESH_COLORS.get(self.refresh_reason(file_info))
+            return QColor(color) if color else None
+        if role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        if column == 0:
+            return file_info["name"]
+        if column == self.SIZE_COLUMN:
+            if role == Qt.ToolTipRole and size_bytes(file_info.get("size")) is not None:
+                return f"{size_bytes(file_info['size'])} 字节"
+            return format_size(file_info.get("size"))
+        if column == 2:
+            return file_info.get("time", "")
+        if column == self.STATUS_COLUMN:
+            return format_record_status(self.link_status, file_info, self.LINK_FIELDS)
+        if column == self.EXPIRY_COLUMN:
+            expires_at = self.expiry_index.get(file_info["id"])
+            if role == Qt.ToolTipRole and expires_at is not None:
+                reason = self.refresh_reason(file_info)
+                tip = time.strftime("下载链接 %Y-%m-%d %H:%M 到期", time.localtime(expires_at))
+                return f"{tip}，需要重新生成（{reason}）" if reason else tip
+            return format_expiry(expires_at)
+        # 按钮列只在提示中显示链接，文字由 ButtonDelegate 绘制
+        if role == Qt.ToolTipRole and column == 5:
+            return file_info["previewUrl"]
+        if role == Qt.ToolTipRole and column == 6:
+            return file_info["downloadUrl"]
+        return None
+
+    def buttons(self, index):
+        """ButtonDelegate 回调：返回该单元格中要绘制的按钮"""
+        return [self.BUTTON_COLUMNS[index.column()]]
+
+    def add_file(self, file_info):
+        row = len(self.files)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.data_index.add_file(self.files, file_info)
+        self.expiry_index.update(file_info["id"], file_info.get("downloadUrl"))
+        self.endInsertRows()
+
+    def remove_file(self, file_id):
+        row = self.data_index.file_position(file_id)
+        if row < 0:
+            return None
+        self.beginRemoveRows(QModelIndex(), row, row)
+        file_info = self.data_index.remove_file(self.files, file_id)
+        self.expiry_index.update(file_id, None)
+        self.endRemoveRows()
+        return file_info
+
+    def file_changed(self, file_id):
+        row = self.data_index.file_position(file_id)
+        if row >= 0:
+            self.expiry_index.update(file_id, self.files[row].get("downloadUrl"))
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+
+    def status_changed(self):
+        # 有效期列的标记也取决于下载链接的检查结果，随时间推移也需要重绘
+        if self.files:
+            self.dataChanged.emit(self.index(0, self.STATUS_COLUMN),
+                                  self.index(len(self.files) - 1, self.EXPIRY_COLUMN))
+
+
+class NotificationTableModel(QAbstractTableModel):
+    """notification.json 中的通知，按文件中的顺序排列，排序交给 NotificationSortProxy"""
+    HEADERS = ["标题", "内容", "时间", "附件", "链接", "链接状态", "操作"]
+    FIELDS = ["title", "content", "time", "attachment", "link"]
+    TIME_COLUMN = 2
+    STATUS_COLUMN = 5
+    ACTION_COLUMN = 6
+    PINNED_ROLE = Qt.UserRole + 1
+    LINK_FIELDS = (("链接", "link"), ("附件", "attachment"))
+
+    def __init__(self, link_status=None, parent=None):
+        super().__init__(parent)
+        self.source_data = {"notifications": []}
+        self.data_index = None
+        self.link_status = link_status if link_status is not None else {}
+
+    @property
+    def notifications(self):
+        return self.source_data["notifications"]
+
+    def set_source(self, notification_data, index):
+        self.beginResetModel()
+        self.source_data = notification_data
+        self.data_index = index
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.notifications)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        notification = self.notifications[index.row()]
+        column = index.column()
+        if role == Qt.UserRole:
+            return notification["id"]
+        if role == self.PINNED_ROLE:
+            return bool(notification.get("pinned", False))
+        if role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        if column == 0:
+            # 置顶的通知在标题前添加标记
+            if notification.get("pinned", False):
+                return "📌 " + notification["title"]
+            return notification["title"]
+        if column < len(self.FIELDS):
+            return notification.get(self.FIELDS[column], "")
+        if column == self.STATUS_COLUMN:
+            return format_record_status(self.link_status, notification, self.LINK_FIELDS)
+        return None
+
+    @classmethod
+    def buttons(cls, index):
+        """ButtonDelegate 回调，index 可以是代理模型的索引"""
+        pinned = index.data(cls.PINNED_ROLE)
+        return [("pin", "取消置顶" if pinned else "置顶"), ("edit", "编辑"), ("delete", "删除")]
+
+    def add_notification(self, notification):
+        row = len(self.notifications)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.data_index.add_notification(self.notifications, notification)
+        self.endInsertRows()
+
+    def remove_notification(self, notification_id):
+        row = self.data_index.notification_position(notification_id)
+        if row < 0:
+            return None
+        self.beginRemoveRows(QModelIndex(), row, row)
+        notification = self.data_index.remove_notification(self.notifications, notification_id)
+        self.endRemoveRows()
+        return notification
+
+    def notification_changed(self, notification_id):
+        """通知内容或置顶状态变化，代理模型只会重新排序这一行"""
+        row = self.data_index.notification_position(notification_id)
+        if row >= 0:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+
+    def status_changed(self):
+        if self.notifications:
+            self.dataChanged.emit(self.index(0, self.STATUS_COLUMN),
+                                  self.index(len(self.notifications) - 1, self.STATUS_COLUMN))
+
+
+class NotificationSortProxy(QSortFilterProxyModel):
+    """置顶的通知始终排在前面，其余按当前排序列（默认时间）排序"""
+    def lessThan(self, left, right):
+        left_pinned = left.data(NotificationTableModel.PINNED_ROLE)
+        right_pinned = right.data(NotificationTableModel.PINNED_ROLE)
+        if left_pinned != right_pinned:
+            # 降序时 Qt 会反转比较结果，这里相应调整，保证置顶始终在前
+            if self.sortOrder() == Qt.AscendingOrder:
+                return left_pinned
+            return right_pinned
+        left_value = left.data(Qt.DisplayRole) or ""
+        right_value = right.data(Qt.DisplayRole) or ""
+        if left_value != right_value:
+            return left_value < right_value
+        # 时间相同时按 id 排序，保证顺序稳定
+        return left.data(Qt.UserRole) < right.data(Qt.UserRole)
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    """在单元格中绘制按钮并处理点击，不再为每一行创建 QPushButton
+
+    按钮列表由 buttons(index) 提供，每项为 (按钮标识, 按钮文字)；
+    colors 为 按钮标识 -> (背景色, 文字色)，未指定的按钮使用系统样式。
+    点击时发出 clicked(index, 按钮标识)。
+    """
+    clicked = pyqtSignal(QModelIndex, str)
+    SPACING = 2
+
+    def __init__(self, buttons, colors=None, parent=None):
+        super().__init__(parent)
+        self.buttons = buttons
+        self.colors = colors or {}
+        self._pressed = None
+
+    def _button_rects(self, rect, count):
+        width = (rect.width() - self.SPACING * (count + 1)) // count
+        return [QRect(rect.left() + self.SPACING + i * (width + self.SPACING), rect.top() + 2,
+                      width, rect.height() - 4) for i in range(count)]
+
+    def paint(self, painter, option, index):
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        buttons = self.buttons(index)
+        if not buttons:
+            return
+        style = option.widget.style() if option.widget else QApplication.style()
+        for (key, text), rect in zip(buttons, self._button_rects(option.rect, len(buttons))):
+            color = self.colors.get(key)
+            if color is None:
+                button = QStyleOptionButton()
+                button.rect = rect
+                button.text = text
+                button.state = QStyle.State_Enabled | QStyle.State_Raised
+                if self._pressed == (index.row(), index.column(), key):
+                    button.state |= QStyle.State_Sunken
+                style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+                continue
+            background, foreground = color
+            painter.save()
+            painter.setRenderHint(painter.Antialiasing)
+            painter.setPen(Qt.NoPen)
+            fill = QColor(background)
+            if self._pressed == (index.row(), index.column(), key):
+                fill = fill.darker(120)
+            painter.setBrush(fill)
+            painter.drawRoundedRect(rect, 3, 3)
+            painter.setPen(QColor(foreground))
+            painter.drawText(rect, Qt.AlignCenter, text)
+            painter.restore()
+
+    def _hit(self, rect, index, pos):
+        buttons = self.buttons(index)
+        if not buttons:
+            return None
+        for (key, _), button_rect in zip(buttons, self._button_rects(rect, len(buttons))):
+            if button_rect.contains(pos):
+                return key
+        return None
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+            key = self._hit(option.rect, index, event.pos())
+            self._pressed = (index.row(), index.column(), key) if key else None
+            return key is not None
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            pressed, self._pressed = self._pressed, None
+            key = self._hit(option.rect, index, event.pos())
+            if key and pressed == (index.row(), index.column(), key):
+                self.clicked.emit(index, key)
+                return True
+            return pressed is not None
+        if event.type() == QEvent.MouseButtonDblClick:
+            return self._hit(option.rect, index, event.pos()) is not None
+        return super().editorEvent(event, model, option, index)
@@ -0,0 +1,161 @@
+"""网站的全文搜索索引
+
+对网站名称、URL、描述和所属分类名建立倒排索引：英文和数字按单词切分，
+连续的中文按二元组（相邻两个字）切分，单个汉字单独成词。
+增删改网站时只更新这一个网站的词项，不需要重建整个索引。
+重新加载数据后索引推迟到第一次搜索或导出时才构建，不拖慢程序启动。
+
+索引也可以导出为紧凑的 search_index.json，移动端页面直接加载，
+不再在浏览器中逐条扫描 data.json。
+"""
+import re
+
+INDEX_VERSION = 1
+DEFAULT_INDEX_FILE = 'search_index.json'
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+|[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+_URL_SCHEME_RE = re.compile(r'^[a-z]+://(www\.)?')
+
+
+def _is_cjk(token):
+    return token[0] >= '\u3400'
+
+
+def tokenize(text):
+    """把文本切分为词项列表，移动端 mobile.js 中的 tokenize 与此保持一致"""
+    tokens = []
+    for run in _TOKEN_RE.findall((text or "").lower()):
+        if _is_cjk(run) and len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def website_tokens(website, category_name=""):
+    url = _URL_SCHEME_RE.sub("", (website.get("url") or "").lower())
+    text = " ".join((website.get("name", ""), url, website.get("description", ""), category_name))
+    return set(tokenize(text))
+
+
+def scan_websites(data, query):
+    """逐条比较名称和描述，返回包含 query 的网站 id 集合
+
+    查询中没有可以索引的内容（例如只有标点）时使用，与 mobile.js 中没有索引时的逐条搜索一致。
+    """
+    query = query.lower()
+    return {website["id"]
+            for category in data.get("categories", [])
+            for website in category.get("websites", [])
+            if query in (website.get("name") or "").lower()
+            or query in (website.get("description") or "").lower()}
+
+
+class SearchIndex:
+    """词项 -> 网站 id 集合 的倒排索引"""
+    def __init__(self):
+        self.postings = {}
+        # 网站 id -> 该网站的词项，删除和修改时用来撤销旧的词项
+        self.doc_tokens = {}
+        self._vocabulary = None
+        # 等待构建索引的数据，构建之前的增删改都会体现在这份数据中
+        self._pending = None
+
+    def rebuild(self, data):
+        """按 data 重建索引，实际构建推迟到第一次使用时"""
+        self.postings = {}
+        self.doc_tokens = {}
+        self._vocabulary = None
+        self._pending = data
+
+    def _ensure_built(self):
+        if self._pending is None:
+            return
+        data, self._pending = self._pending, None
+        for category in data.get("categories", []):
+            for website in category.get("websites", []):
+                self.add_website(website, category.get("name", ""))
+
+    def add_website(self, website, category_name=""):
+        if self._pending is not None:
+            return
+        website_id = website["id"]
+        tokens = website_tokens(website, category_name)
+        self.doc_tokens[website_id] = tokens
+        for token in tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                self.postings[token] = ids = set()
+                self._vocabulary = None
+            ids.add(website_id)
+
+    def remove_website(self, website_id):
+        if self._pending is not None:
+            return
+        for token in self.doc_tokens.pop(website_id, ()):
+            ids = self.postings.get(token)
+            if ids is None:
+                continue
+            ids.discard(website_id)
+            if not ids:
+                del self.postings[token]
+                self._vocabulary = None
+
+    def update_website(self, website, category_name=""):
+        """网站内容或所属分类改变后调用"""
+        self.remove_website(website["id"])
+        self.add_website(website, category_name)
+
+    def remove_category(self, category):
+        for website in category.get("websites", []):
+            self.remove_website(website["id"])
+
+    @property
+    def vocabulary(self):
+        # 排好序的词项，子串查找时遍历，导出时按顺序写出；词项集合变化后才重新排序
+        self._ensure_built()
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        return self._vocabulary
+
+    def _expand(self, token):
+        """查询词 -> 匹配的索引词项
+
+        中文二元组精确匹配；单个汉字匹配包含它的二元组，英文按子串匹配（输入 hub
+        可以找到 github），与原来逐条比较名称和描述的结果一致。
+        """
+        if _is_cjk(token) and len(token) > 1:
+            return [token] if token in self.postings else []
+        return [t for t in self.vocabulary if token in t]
+
+    def search(self, query):
+        """返回同时匹配所有查询词的网站 id 集合
+
+        查询中没有可以索引的内容（例如 "." 或 "++"）时返回 None，调用方改用 scan_websites。
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        self._ensure_built()
+        result = None
+        for token in dict.fromkeys(tokens):
+            ids = set()
+            for term in self._expand(token):
+                ids |= self.postings[term]
+            result = ids if result is None else result & ids
+            if not result:
+                return set()
+        return result or set()
+
+    def to_json(self):
+        """导出给移动端使用的紧凑格式：每个词项的 id 升序排列后按差值存储"""
+        self._ensure_built()
+        tokens = {}
+        for token in self.vocabulary:
+            previous = 0
+            deltas = []
+            for website_id in sorted(self.postings[token]):
+                deltas.append(website_id - previous)
+                previous = website_id
+            tokens[token] = deltas
+        return {"version": INDEX_VERSION, "count": len(self.doc_tokens), "tokens": tokens}
@@ -0,0 +1,234 @@
+"""网站标题和描述的获取
+
+不依赖 Qt，既可以在 WebsiteManager 的后台线程池中调用，也可以在命令行脚本中使用。
+
+响应以流的方式读取，边读边交给增量 HTML 解析器，读到 </head> 且已经拿到标题或
+描述时就停止，不再下载整个页面；无论如何最多只读取 MAX_READ_BYTES 字节。
+"""
+import codecs
+import re
+from html.parser import HTMLParser
+
+import requests
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+
+DEFAULT_TIMEOUT = 10
+CHUNK_SIZE = 16 * 1024
+# 读取上限，超过后即使没有读到 </head> 也停止
+MAX_READ_BYTES = 512 * 1024
+# 在页面开头查找 <meta charset> 的字节数，与 HTML 规范的预扫描长度一致
+SNIFF_BYTES = 1024
+# 没有标题和描述时保留的正文长度
+TEXT_LENGTH = 201
+
+# GB2312/GBK 都是 GB18030 的子集，统一按 GB18030 解码，避免生僻字乱码
+ENCODING_ALIASES = {
+    'gb2312': 'gb18030',
+    'gbk': 'gb18030',
+    'x-gbk': 'gb18030',
+    'gb_2312-80': 'gb18030',
+}
+
+# 很多服务器不论实际内容一律声明 ISO-8859-1，这类声明不可信
+WEAK_ENCODINGS = ('iso8859-1', 'cp1252', 'ascii')
+
+_CHARSET_RE = re.compile(br'charset\s*=\s*["\']?\s*([a-zA-Z0-9_\-:.]+)', re.IGNORECASE)
+_META_RE = re.compile(br'<meta[^>]+>', re.IGNORECASE)
+
+
+class FetchCancelled(Exception):
+    """获取过程被用户取消"""
+
+
+def normalize_encoding(name):
+    """返回 Python 可用的编码名，不认识的编码返回 None"""
+    if not name:
+        return None
+    name = name.strip().strip('"\'').lower()
+    name = ENCODING_ALIASES.get(name, name)
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def charset_from_content_type(content_type):
+    if not content_type:
+        return None
+    match = _CHARSET_RE.search(content_type.encode('latin-1', errors='ignore'))
+    return normalize_encoding(match.group(1).decode('ascii')) if match else None
+
+
+def sniff_encoding(prefix):
+    """根据 BOM 或页面开头的 <meta charset> 判断编码，判断不出返回 None"""
+    for bom, name in ((codecs.BOM_UTF8, 'utf-8'),
+                      (codecs.BOM_UTF16_LE, 'utf-16-le'),
+                      (codecs.BOM_UTF16_BE, 'utf-16-be')):
+        if prefix.startswith(bom):
+            return name
+    for meta in _META_RE.finditer(prefix[:SNIFF_BYTES]):
+        match = _CHARSET_RE.search(meta.group(0))
+        if match:
+            encoding = normalize_encoding(match.group(1).decode('ascii'))
+            if encoding:
+                return encoding
+    return None
+
+
+def guess_encoding(prefix):
+    """没有声明编码时，能按 UTF-8 解码就用 UTF-8，否则按 GB18030（校园网站大多是 GBK）"""
+    try:
+        prefix.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError as e:
+        # 结尾被截断的多字节字符不算错误
+        if e.start >= len(prefix) - 3 and e.reason == 'unexpected end of data':
+            return 'utf-8'
+        return 'gb18030'
+
+
+def pick_encoding(declared, prefix):
+    if declared and declared not in WEAK_ENCODINGS:
+        return declared
+    return sniff_encoding(prefix) or guess_encoding(prefix)
+
+
+class HeadMetadataParser(HTMLParser):
+    """增量解析 <head> 中的标题、description 和 og:description"""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.description = ""
+        self.og_description = ""
+        self.text_parts = []
+        self.text_length = 0
+        self.head_closed = False
+        self._in_title = False
+        self._skip_depth = 0
+
+    @property
+    def done(self):
+        # 读完 <head> 后，只有在需要正文兜底时才继续读取
+        if not self.head_closed:
+            return False
+        return bool(self.title or self.description or self.og_description) or \
+            self.text_length >= TEXT_LENGTH
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title' and not self.title:
+            self._in_title = True
+        elif tag == 'meta':
+            attrs = {k.lower(): (v or "") for k, v in attrs}
+            content = attrs.get('content', "").strip()
+            if attrs.get('name', "").lower() == 'description' and not self.description:
+                self.description = content
+            elif attrs.get('property', "").lower() == 'og:description' and not self.og_description:
+                self.og_description = content
+        elif tag in ('script', 'style', 'noscript', 'template'):
+            self._skip_depth += 1
+        elif tag == 'body':
+            self.head_closed = True
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+        elif tag in ('script', 'style', 'noscript', 'template'):
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == 'head':
+            self.head_closed = True
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth and self.head_closed and self.text_length < TEXT_LENGTH:
+            self.text_parts.append(data)
+            self.text_length += len(data)
+
+    def result(self):
+        text = re.sub(r'\s+', ' ', "".join(self.text_parts)).strip()[:TEXT_LENGTH]
+        title = re.sub(r'\s+', ' ', self.title).strip()
+        return {
+            "title": title,
+            "description": self.description or self.og_description,
+            "text": text if not (title or self.description or self.og_description) else ""
+        }
+
+
+def extract_metadata(chunks, content_type=None, cancel_event=None, max_bytes=MAX_READ_BYTES):
+    """从字节块序列中增量提取标题和描述，返回 {"title", "description", "text"}
+
+    cancel_event 为 threading.Event，被置位后在处理下一块数据前抛出 FetchCancelled。
+    """
+    parser = HeadMetadataParser()
+    declared = charset_from_content_type(content_type)
+    decoder = None
+    pending = b""
+    read = 0
+    for chunk in chunks:
+        if cancel_event is not None and cancel_event.is_set():
+            raise FetchCancelled()
+        if not chunk:
+            continue
+        read += len(chunk)
+        if decoder is None:
+            # 攒够用于判断编码的开头部分再开始解码
+            pending += chunk
+            if len(pending) < SNIFF_BYTES and read < max_bytes:
+                continue
+            decoder = codecs.getincrementaldecoder(pick_encoding(declared, pending))(errors='replace')
+            chunk, pending = pending, b""
+        parser.feed(decoder.decode(chunk))
+        if parser.done or read >= max_bytes:
+            break
+    else:
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder(pick_encoding(declared, pending))(errors='replace')
+            parser.feed(decoder.decode(pending))
+        parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    return parser.result()
+
+
+def open_page(url, session=None, timeout=DEFAULT_TIMEOUT, headers=None):
+    """以流方式发起请求，调用方负责读取或关闭响应"""
+    http = session or requests
+    request_headers = {'User-Agent': USER_AGENT}
+    if headers:
+        request_headers.update(headers)
+    return http.get(url, headers=request_headers, timeout=timeout, stream=True)
+
+
+def read_metadata(response, cancel_event=None):
+    """边读取响应边解析标题和描述，读取结束后关闭响应（不会读完整个页面）"""
+    try:
+        return extract_metadata(response.iter_content(CHUNK_SIZE),
+                                response.headers.get('Content-Type'), cancel_event)
+    finally:
+        response.close()
+
+
+def fetch_site_metadata(url, session=None, timeout=DEFAULT_TIMEOUT, cancel_event=None):
+    """获取网页的标题和描述，返回 {"title", "description", "text"}"""
+    response = open_page(url, session, timeout)
+    try:
+        response.raise_for_status()
+    except Exception:
+        response.close()
+        raise
+    return read_metadata(response, cancel_event)
+
+
+def format_description(metadata):
+    """把获取到的信息拼成填入描述框的文本"""
+    desc_text = ""
+    if metadata["title"]:
+        desc_text += f"标题: {metadata['title']}\n\n"
+    if metadata["description"]:
+        desc_text += f"描述: {metadata['description']}\n\n"
+    if not metadata["title"] and not metadata["description"]:
+        # 如果没有找到标题和描述，使用页面前200个字符
+        text = metadata["text"]
+        desc_text = text[:200] + "..." if len(text) > 200 else text
+    return desc_text
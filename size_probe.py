@@ -0,0 +1,79 @@
+"""并发获取下载链接对应文件的字节数
+
+先发 HEAD 请求读取 Content-Length；服务器不支持 HEAD、没有返回长度或返回的是压缩后的
+长度时，改为请求第一个字节（Range: bytes=0-0），从 Content-Range 中读取总长度。
+都不会下载文件内容。连接复用和按主机限流与 link_checker 相同。
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from http_pool import (DEFAULT_PER_HOST, DEFAULT_WORKERS, HostLimiter,
+                       create_session, interleave_by_host)
+from link_checker import is_http_url
+
+DEFAULT_TIMEOUT = 10
+
+CONTENT_RANGE_RE = re.compile(r'bytes\s+\d+-\d+/(\d+)', re.IGNORECASE)
+
+
+def _content_length(response):
+    # 压缩传输时 Content-Length 是压缩后的长度，不是文件大小
+    if response.headers.get('Content-Encoding', 'identity').lower() != 'identity':
+        return None
+    length = response.headers.get('Content-Length', '')
+    return int(length) if length.isdigit() else None
+
+
+def probe_size(session, url, limiter, timeout=DEFAULT_TIMEOUT):
+    """返回 url 对应文件的字节数，无法获取时返回 None"""
+    try:
+        with limiter(url):
+            response = session.head(url, timeout=timeout, allow_redirects=True)
+            if response.status_code == 200:
+                size = _content_length(response)
+                if size:
+                    return size
+            # 只请求第一个字节，不下载内容
+            response = session.get(url, headers={'Range': 'bytes=0-0'}, timeout=timeout,
+                                   allow_redirects=True, stream=True)
+            response.close()
+    except Exception:
+        # 网络错误和格式错误的链接（LocationParseError 等）都视为无法获取，不中断整批请求
+        return None
+    if response.status_code == 206:
+        match = CONTENT_RANGE_RE.search(response.headers.get('Content-Range', ''))
+        return int(match.group(1)) if match else None
+    if response.status_code == 200:
+        # 服务器忽略了 Range，返回的是整个文件
+        return _content_length(response)
+    return None
+
+
+def probe_sizes(urls, max_workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST,
+                timeout=DEFAULT_TIMEOUT, progress=None, cancel_event=None):
+    """并发获取一组链接的文件大小，相同的链接只请求一次，返回 {url: 字节数或 None}
+
+    progress(done, total) 在工作线程中回调。
+    """
+    urls = list(dict.fromkeys(u for u in urls if is_http_url(u)))
+    total = len(urls)
+    results = {}
+    limiter = HostLimiter(per_host)
+    session = create_session(max_workers)
+
+    def task(url):
+        if cancel_event is not None and cancel_event.is_set():
+            return url, None
+        return url, probe_size(session, url, limiter, timeout)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(task, url) for url in interleave_by_host(urls)]
+            for done, future in enumerate(as_completed(futures), 1):
+                url, size = future.result()
+                results[url] = size
+                if progress is not None:
+                    progress(done, total)
+    finally:
+        session.close()
+    return results
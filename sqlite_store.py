@@ -0,0 +1,353 @@
+"""SQLite 存储后端
+
+JSON 后端每次保存都要把整个 data.json 序列化并重写一遍。这里用一个 WAL 模式的 SQLite
+数据库（catalog.db）作为主存储，分类、网站、文件、通知各一张表，每条记录一行：
+
+- 保存时与上次读取或写入后的内容逐行比较，只写入变化的行，一次修改就是一个单行事务；
+- 记录的顺序保存在 position 列中，删除、追加、上下移动一条记录都不需要改写其余的行；
+- 网站表按 id（主键）、分类和 URL 建立索引。
+
+mobile.js、netdisk.html 等静态页面仍然读取 JSON 文件，generate() 从数据库重新生成有变化的
+JSON 文件。第一次使用时，或者 JSON 文件在外部被修改（例如 git pull）而数据库中没有未生成的
+修改时，load() 会先把 JSON 文件导入数据库；两边都有修改时抛出 StoreConflict，由调用方选择。
+
+本模块只使用标准库，不依赖 Qt。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from bisect import bisect_left
+from urllib.parse import quote
+
+from catalog_store import STORES, StoreConflict, load_store
+from storage import atomic_write_bytes
+
+DEFAULT_DB_FILE = 'catalog.db'
+# 按这个顺序只包含这些字段的网站直接存成列，其余的网站把完整记录存在 extra 中
+WEBSITE_KEYS = ("id", "name", "url", "description")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    position REAL NOT NULL,
+    name TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS websites (
+    id INTEGER PRIMARY KEY,
+    category_id INTEGER NOT NULL,
+    position REAL NOT NULL,
+    name TEXT,
+    url TEXT,
+    description TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS websites_category ON websites (category_id, position);
+CREATE INDEX IF NOT EXISTS websites_url ON websites (url);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    position REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS notifications (
+    id INTEGER PRIMARY KEY,
+    position REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# 表名 -> 写入一行的语句，参数依次为 id、上级 id、position 和各列的值
+UPSERT = {
+    "categories": "INSERT OR REPLACE INTO categories (id, position, name, data) VALUES (?, ?, ?, ?)",
+    "websites": ("INSERT OR REPLACE INTO websites (id, category_id, position, name, url, description, extra) "
+                 "VALUES (?, ?, ?, ?, ?, ?, ?)"),
+    "files": "INSERT OR REPLACE INTO files (id, position, data) VALUES (?, ?, ?)",
+    "notifications": "INSERT OR REPLACE INTO notifications (id, position, data) VALUES (?, ?, ?)",
+}
+# 存储名 -> 表名（data 还包括 websites 表）
+STORE_TABLES = {"data": ("categories", "websites"), "files": ("files",), "notifications": ("notifications",)}
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _file_sha1(path):
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def category_values(category):
+    record = {key: value for key, value in category.items() if key != "websites"}
+    return (category.get("name", ""), _dumps(record))
+
+
+def website_values(website):
+    if tuple(website) == WEBSITE_KEYS:
+        return (website["name"], website["url"], website["description"], None)
+    return (website.get("name"), website.get("url"), website.get("description"), _dumps(website))
+
+
+def record_values(record):
+    return (_dumps(record),)
+
+
+def assign_positions(old_positions):
+    """为一组按顺序排列的记录分配严格递增的位置
+
+    old_positions 是每条记录在数据库中的原位置，新记录或从别的分类移过来的记录为 None。
+    原位置中最长的递增子序列保持不变，只给其余记录分配新位置，所以删除、追加、上下移动
+    一条记录都只需要写入一行。
+    """
+    n = len(old_positions)
+    # 最长递增子序列：tails[k] 是长度为 k+1 的子序列结尾的下标
+    tails, tail_values, prev = [], [], [-1] * n
+    for i, pos in enumerate(old_positions):
+        if pos is None:
+            continue
+        k = bisect_left(tail_values, pos)
+        prev[i] = tails[k - 1] if k else -1
+        if k == len(tails):
+            tails.append(i)
+            tail_values.append(pos)
+        else:
+            tails[k] = i
+            tail_values[k] = pos
+    positions = [None] * n
+    i = tails[-1] if tails else -1
+    while i >= 0:
+        positions[i] = old_positions[i]
+        i = prev[i]
+
+    # 在前后两个保留的位置之间均匀插入其余记录
+    lower = None
+    i = 0
+    while i < n:
+        if positions[i] is not None:
+            lower = positions[i]
+            i += 1
+            continue
+        j = i
+        while j < n and positions[j] is None:
+            j += 1
+        upper = positions[j] if j < n else None
+        count = j - i
+        if upper is None:
+            start = 0 if lower is None else lower + 1
+            positions[i:j] = [start + k for k in range(count)]
+        elif lower is None:
+            positions[i:j] = [upper - count + k for k in range(count)]
+        else:
+            step = (upper - lower) / (count + 1)
+            positions[i:j] = [lower + step * (k + 1) for k in range(count)]
+        lower = positions[j - 1]
+        i = j
+    # 反复在同一处插入，浮点数的间隔用完时整组重新编号
+    if any(a >= b for a, b in zip(positions, positions[1:])):
+        return list(range(n))
+    return positions
+
+
+def diff_rows(old, groups, values_of):
+    """比较一张表的新旧内容
+
+    old 为 {id: (上级 id, position, 列值)}，groups 为 [(上级 id, 按顺序排列的记录)]。
+    返回 (新快照, 需要写入的 [(id, 上级 id, position, 列值)], 需要删除的 id 列表)。
+    """
+    new = {}
+    changed = []
+    for parent, items in groups:
+        olds = []
+        for item in items:
+            entry = old.get(item["id"])
+            olds.append(entry[1] if entry is not None and entry[0] == parent else None)
+        for item, pos in zip(items, assign_positions(olds)):
+            entry = (parent, pos, values_of(item))
+            new[item["id"]] = entry
+            if old.get(item["id"]) != entry:
+                changed.append((item["id"],) + entry)
+    removed = [item_id for item_id in old if item_id not in new]
+    return new, changed, removed
+
+
+class SqliteBackend:
+    name = "sqlite"
+
+    def __init__(self, path=DEFAULT_DB_FILE, readonly=False):
+        self.path = path
+        # 只读打开时不建表，需要导入的 JSON 文件直接读取，不写入数据库
+        self.readonly = readonly
+        # 存储名 -> {表名: {id: (上级 id, position, 列值)}}，即数据库中当前的内容
+        self.snapshots = {}
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True)
+            return
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # WAL 模式下 NORMAL 不会损坏数据库，断电时最多丢失最后几个事务
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ---------- meta ----------
+
+    def _meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        if value is None:
+            self.conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+        else:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def is_stale(self, store):
+        """数据库中是否有还没生成到 JSON 文件的修改"""
+        return self._meta(f"stale:{store}") is not None
+
+    # ---------- 读取 ----------
+
+    def _read(self, store):
+        """从数据库读取一个存储，返回 (数据, 快照)"""
+        key = STORES[store][1]
+        if store == "data":
+            items, categories, websites = [], {}, {}
+            by_id = {}
+            for item_id, pos, name, data in self.conn.execute(
+                    "SELECT id, position, name, data FROM categories ORDER BY position"):
+                category = json.loads(data)
+                category["websites"] = []
+                items.append(category)
+                by_id[item_id] = category
+                categories[item_id] = (None, pos, (name, data))
+            for category_id, item_id, pos, name, url, description, extra in self.conn.execute(
+                    "SELECT category_id, id, position, name, url, description, extra FROM websites "
+                    "ORDER BY category_id, position"):
+                if category_id not in by_id:
+                    continue
+                if extra is None:
+                    website = {"id": item_id, "name": name, "url": url, "description": description}
+                else:
+                    website = json.loads(extra)
+                by_id[category_id]["websites"].append(website)
+                websites[item_id] = (category_id, pos, (name, url, description, extra))
+            snapshot = {"categories": categories, "websites": websites}
+        else:
+            table = STORE_TABLES[store][0]
+            items, rows = [], {}
+            for item_id, pos, data in self.conn.execute(
+                    f"SELECT id, position, data FROM {table} ORDER BY position"):
+                items.append(json.loads(data))
+                rows[item_id] = (None, pos, (data,))
+            snapshot = {table: rows}
+        data = {key: items}
+        data.update(json.loads(self._meta(f"root:{store}") or "{}"))
+        return data, snapshot
+
+    def load(self, store, path, on_conflict=None):
+        """读取一个存储，需要时先从 JSON 文件导入
+
+        JSON 文件在外部被修改、数据库中又有未生成的修改时，on_conflict 为 "json" 导入文件
+        （放弃数据库中的修改），为 "database" 保留数据库中的内容（下次生成时覆盖文件），
+        为 None 时抛出 StoreConflict。
+        """
+        digest = _file_sha1(path)
+        if digest is not None and digest != self._meta(f"json_sha1:{store}"):
+            if not self.is_stale(store) or on_conflict == "json":
+                if self.readonly:
+                    # JSON 文件比数据库新，直接读取文件
+                    return load_store(path, STORES[store][1])
+                self._import_json(store, path, digest)
+            elif on_conflict == "database":
+                if self.readonly:
+                    return self._read(store)[0]
+                # 记下已经处理过这个版本的文件，不再重复询问
+                with self.conn:
+                    self._set_meta(f"json_sha1:{store}", digest)
+            else:
+                raise StoreConflict(store, path)
+        data, self.snapshots[store] = self._read(store)
+        return data
+
+    def _import_json(self, store, path, digest):
+        data = load_store(path, STORES[store][1])
+        with self.conn:
+            for table in STORE_TABLES[store]:
+                self.conn.execute(f"DELETE FROM {table}")
+            self.snapshots[store] = {table: {} for table in STORE_TABLES[store]}
+            self._write(store, data)
+            self._set_meta(f"json_sha1:{store}", digest)
+            self._set_meta(f"stale:{store}", None)
+
+    # ---------- 写入 ----------
+
+    def _write(self, store, data):
+        """把 data 与快照的差异写入数据库，返回写入和删除的行数；调用方负责事务"""
+        key = STORES[store][1]
+        items = data.get(key, [])
+        snapshot = self.snapshots[store]
+        if store == "data":
+            tables = [
+                ("categories", [(None, items)], category_values),
+                ("websites", [(category["id"], category.get("websites", [])) for category in items],
+                 website_values),
+            ]
+        else:
+            tables = [(STORE_TABLES[store][0], [(None, items)], record_values)]
+
+        count = 0
+        for table, groups, values_of in tables:
+            rows, changed, removed = diff_rows(snapshot[table], groups, values_of)
+            if table == "websites":
+                self.conn.executemany(UPSERT[table], [(item_id, parent, pos) + values
+                                                      for item_id, parent, pos, values in changed])
+            else:
+                self.conn.executemany(UPSERT[table], [(item_id, pos) + values
+                                                      for item_id, _, pos, values in changed])
+            self.conn.executemany(f"DELETE FROM {table} WHERE id = ?", [(item_id,) for item_id in removed])
+            snapshot[table] = rows
+            count += len(changed) + len(removed)
+
+        root = {k: v for k, v in data.items() if k != key}
+        root = _dumps(root) if root else None
+        if root != self._meta(f"root:{store}"):
+            self._set_meta(f"root:{store}", root)
+            count += 1
+        return count
+
+    def save(self, store, path, data):
+        """只写入与数据库不同的行，整个保存在一个事务中；返回写入和删除的行数"""
+        if store not in self.snapshots:
+            self.snapshots[store] = self._read(store)[1]
+        try:
+            with self.conn:
+                count = self._write(store, data)
+                if count:
+                    self._set_meta(f"stale:{store}", "1")
+        except BaseException:
+            # 事务已回滚，快照可能与数据库不一致，下次保存前重新读取
+            self.snapshots.pop(store, None)
+            raise
+        return count
+
+    def generate(self, store, path):
+        """数据库有未生成的修改或 JSON 文件缺失时重新生成 JSON 文件，返回是否写入了文件"""
+        if not self.is_stale(store) and os.path.exists(path):
+            return False
+        data, _ = self._read(store)
+        raw = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+        atomic_write_bytes(path, raw)
+        with self.conn:
+            self._set_meta(f"json_sha1:{store}", hashlib.sha1(raw).hexdigest())
+            self._set_meta(f"stale:{store}", None)
+        return True
@@ -0,0 +1,149 @@
+"""WebsiteManager 启动时间基准测试
+
+每次运行都启动一个新的 Python 进程，测量从进程启动到主窗口第一次绘制（time to first
+paint）的时间，并分别记录导入模块、创建窗口所用的时间。
+
+cold：每次使用一个空的字节码缓存目录，所有模块都要重新编译；
+warm：复用上一次运行生成的字节码缓存。
+操作系统的文件缓存在普通权限下无法清除，cold 只排除了 Python 层面的缓存。
+
+    python startup_benchmark.py
+    python startup_benchmark.py --runs 10 --websites 20000 --json startup.json
+    python startup_benchmark.py --offscreen        # 没有显示器的环境（如 CI）
+
+测试在临时目录中的数据副本上进行，不会修改当前目录中的数据文件。
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DATA_FILES = ('data.json', 'file.json', 'notification.json')
+
+
+def run_child(data_dir):
+    """子进程：启动界面，第一次绘制主窗口后输出各阶段耗时并退出"""
+    start = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    import website_manager
+    from PyQt5.QtCore import QEvent, QObject
+
+    imported = time.perf_counter()
+    app = website_manager.create_application(sys.argv[:1])
+    os.chdir(data_dir)
+    window = website_manager.WebsiteManager()
+    created = time.perf_counter()
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if obj is window and event.type() == QEvent.Paint:
+                painted = time.perf_counter()
+                print(json.dumps({
+                    "import_ms": (imported - start) * 1000,
+                    "window_ms": (created - imported) * 1000,
+                    "paint_ms": (painted - created) * 1000,
+                }), flush=True)
+                # 不调用 closeEvent，避免写入数据文件
+                os._exit(0)
+            return False
+
+    first_paint = FirstPaint()
+    window.installEventFilter(first_paint)
+    window.show()
+    app.exec_()
+
+
+def make_data_dir(websites):
+    """复制数据文件到临时目录；指定 websites 时生成该数量的网站"""
+    data_dir = tempfile.mkdtemp(prefix='startup-data-')
+    for name in DATA_FILES:
+        if os.path.exists(os.path.join(ROOT, name)):
+            shutil.copy(os.path.join(ROOT, name), data_dir)
+    if websites:
+        per_category = 500
+        categories = []
+        for c in range((websites + per_category - 1) // per_category):
+            count = min(per_category, websites - c * per_category)
+            categories.append({
+                "id": c + 1,
+                "name": f"分类{c + 1}",
+                "websites": [{
+                    "id": 100000 + c * per_category + i,
+                    "name": f"网站{c * per_category + i}",
+                    "url": f"https://example{c}.com/page{i}",
+                    "description": f"第 {c + 1} 个分类中的第 {i} 个网站"
+                } for i in range(count)]
+            })
+        with open(os.path.join(data_dir, 'data.json'), 'w', encoding='utf-8') as f:
+            json.dump({"categories": categories}, f, ensure_ascii=False)
+    return data_dir
+
+
+def measure(data_dir, pycache_dir, offscreen):
+    env = dict(os.environ, PYTHONPYCACHEPREFIX=pycache_dir)
+    if offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", data_dir],
+                            env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                            check=True).stdout
+    total = (time.perf_counter() - start) * 1000
+    result = json.loads(output.decode().strip().splitlines()[-1])
+    result["total_ms"] = total
+    return result
+
+
+def summarize(runs):
+    return {key: round(statistics.median(run[key] for run in runs), 1)
+            for key in ("total_ms", "import_ms", "window_ms", "paint_ms")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量 WebsiteManager 的启动时间")
+    parser.add_argument("--runs", type=int, default=5, help="cold 和 warm 各运行的次数")
+    parser.add_argument("--websites", type=int, default=0, help="生成指定数量的网站，默认使用当前数据")
+    parser.add_argument("--offscreen", action="store_true", help="使用 Qt 的 offscreen 平台")
+    parser.add_argument("--json", help="把结果写入 JSON 文件，便于比较多次测试")
+    parser.add_argument("--child", metavar="DATA_DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    data_dir = make_data_dir(args.websites)
+    warm_cache = tempfile.mkdtemp(prefix='startup-pycache-')
+    try:
+        cold = []
+        for _ in range(args.runs):
+            cold_cache = tempfile.mkdtemp(prefix='startup-pycache-')
+            try:
+                cold.append(measure(data_dir, cold_cache, args.offscreen))
+            finally:
+                shutil.rmtree(cold_cache, ignore_errors=True)
+        # 先运行一次生成字节码缓存
+        measure(data_dir, warm_cache, args.offscreen)
+        warm = [measure(data_dir, warm_cache, args.offscreen) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+        shutil.rmtree(warm_cache, ignore_errors=True)
+
+    result = {"runs": args.runs, "websites": args.websites or None,
+              "cold": summarize(cold), "warm": summarize(warm)}
+    print(f"{'':6}{'总计':>10}{'导入':>10}{'创建窗口':>10}{'首次绘制':>10}   (ms, 中位数)")
+    for name in ("cold", "warm"):
+        row = result[name]
+        print(f"{name:6}{row['total_ms']:>10}{row['import_ms']:>10}{row['window_ms']:>10}{row['paint_ms']:>10}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
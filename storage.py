@@ -0,0 +1,54 @@
+"""数据文件的安全写入
+
+先写入同目录下的临时文件并 fsync，再用 os.replace 原子替换目标文件。
+写入过程中崩溃或断电时，原文件要么保持旧内容，要么是完整的新内容，不会被截断。
+"""
+import json
+import os
+import tempfile
+
+
+def _file_mode(path):
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def atomic_write_bytes(path, data):
+    atomic_write_chunks(path, (data,))
+
+
+def atomic_write_chunks(path, chunks):
+    """依次写入 chunks 中的字节块，适合无法一次放进内存的大文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp 创建的文件只有所有者可读，改为与原文件（或新建文件的默认权限）一致
+        os.chmod(tmp_path, _file_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    # 同步目录项，保证重命名本身也落盘（Windows 不支持打开目录）
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def atomic_write_json(path, obj, indent=2):
+    data = json.dumps(obj, ensure_ascii=False, indent=indent).encode('utf-8')
+    atomic_write_bytes(path, data)
@@ -0,0 +1,89 @@
+"""link_checker 的测试：用本地 HTTP 服务器代替真实网站
+
+运行: python -m unittest test_link_checker
+"""
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from link_checker import check_links
+
+
+# 路径 -> (状态码, 重定向目标)
+REDIRECTS = {'/r1': (301, '/r2'), '/r2': (302, '/ok')}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """/ok 返回 200，/nohead 不支持 HEAD（405）但 GET 返回 200，
+    /r1 -> /r2 -> /ok 为重定向链，其余路径返回 404"""
+
+    def _respond(self, method):
+        if self.path in REDIRECTS:
+            status, location = REDIRECTS[self.path]
+            self.send_response(status)
+            self.send_header('Location', location)
+        elif self.path == '/nohead':
+            self.send_response(405 if method == 'HEAD' else 200)
+        else:
+            self.send_response(200 if self.path == '/ok' else 404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_HEAD(self):
+        self._respond('HEAD')
+
+    def do_GET(self):
+        self._respond('GET')
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CheckLinksTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_malformed_url_and_404_are_failures(self):
+        # 格式错误的链接会抛出 urllib3 的 LocationParseError，不能中断整批检查
+        urls = [self.base + '/ok', self.base + '/missing', 'http://example..com/']
+        results = check_links(urls, max_workers=4, timeout=5)
+
+        self.assertEqual(set(results), set(urls))
+        self.assertTrue(results[self.base + '/ok']["ok"])
+        self.assertEqual(results[self.base + '/ok']["status"], 200)
+
+        missing = results[self.base + '/missing']
+        self.assertFalse(missing["ok"])
+        self.assertEqual(missing["status"], 404)
+
+        malformed = results['http://example..com/']
+        self.assertFalse(malformed["ok"])
+        self.assertIsNone(malformed["status"])
+        self.assertTrue(malformed["error"])
+
+    def test_head_not_allowed_falls_back_to_get(self):
+        url = self.base + '/nohead'
+        result = check_links([url], timeout=5)[url]
+        self.assertTrue(result["ok"])
+        self.assertEqual(result["status"], 200)
+        self.assertEqual(result["method"], "GET")
+
+    def test_redirect_chain_is_recorded(self):
+        url = self.base + '/r1'
+        result = check_links([url], timeout=5)[url]
+        self.assertTrue(result["ok"])
+        self.assertEqual(result["method"], "HEAD")
+        self.assertEqual(result["redirects"], [[301, self.base + '/r1'], [302, self.base + '/r2']])
+        self.assertEqual(result["final_url"], self.base + '/ok')
+
+
+if __name__ == '__main__':
+    unittest.main()
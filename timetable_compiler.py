@@ -0,0 +1,255 @@
+"""把 timetable/*.txt 课表编译成一个 JSON 文件
+
+timetable.html 原来每次打开都要逐个下载各人的课表文本，再用正则按 [星期X]、! 和
+节次/周次 字段解析一遍。这里预先解析好，生成 timetable/timetable.json：
+
+    {
+      "version": 1, "weeks": 16, "periods": [{"name", "start", "end"}, ...],
+      "routine_sha1": "...",
+      "users": {
+        "H": {
+          "source": "huxinyue.txt", "sha1": "...",
+          "courses": [[课程, 教室], ...],
+          "sessions": [{"course", "day", "period", "weeks", "period_mask", "week_mask"}, ...],
+          "occupancy": [[第1周星期一的节次掩码, ..., 星期日], ...]
+        }
+      }
+    }
+
+courses 是去重后的课程表，sessions 是每次上课，day 为 0-6（星期一到星期日），
+period_mask/week_mask 的第 n 位表示第 n+1 节/第 n+1 周。occupancy[w][d] 是第 w+1 周
+星期 d 有课的节次掩码，判断某人某节是否有空只需要一次位运算。
+
+重新编译时按文件内容的 SHA-1 判断，只重新解析有变化的课表文件；都没有变化时不写文件。
+
+    python timetable_compiler.py
+    python timetable_compiler.py --force
+
+本模块不依赖 Qt。
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import re
+
+from storage import atomic_write_json
+
+ARTIFACT_VERSION = 1
+TIMETABLE_DIR = 'timetable'
+ARTIFACT_FILE = 'timetable.json'
+ROUTINE_FILE = 'routine.txt'
+MAX_WEEK = 16
+PERIOD_COUNT = 10
+# 第一周的周一，与 timetable.html 中的 calculateCurrentWeek 一致
+FIRST_WEEK_MONDAY = datetime.date(2025, 9, 8)
+DAY_NAMES = ("星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日")
+# timetable.html 中使用的用户代号
+USER_KEYS = {"huxinyue.txt": "H", "X.txt": "X", "yangxin.txt": "Y"}
+
+DAY_RE = re.compile(r'^\[(星期.)\]$')
+RANGE_RE = re.compile(r'(\d+)(?:-(\d+))?')
+ROUTINE_RE = re.compile(r'^(第.+节课)\s*[:：]\s*(\d{1,2}:\d{2})\s*-\s*(\d{1,2}:\d{2})$')
+FIELDS = {"课程": "title", "教室": "classroom", "节次": "period", "周次": "weeks"}
+
+
+def range_mask(text, limit):
+    """把 "3-4"、"第1-12周"、"1,3,5-7" 之类的范围转换成位掩码，超出 1..limit 的部分忽略"""
+    mask = 0
+    for match in RANGE_RE.finditer(text):
+        start = int(match.group(1))
+        end = int(match.group(2) or start)
+        for n in range(max(start, 1), min(end, limit) + 1):
+            mask |= 1 << (n - 1)
+    return mask
+
+
+def parse_timetable(text):
+    """逐行解析课表文本，返回 [{"day", "title", "classroom", "period", "weeks"}, ...]
+
+    每天的内容以 [星期X] 开始、[/星期X] 结束，同一天的课程之间用一行 ! 分隔；
+    缺少字段的课程和 (无课程安排) 会被跳过。
+    """
+    courses = []
+    day = None
+    course = {}
+
+    def finish():
+        if day is not None and all(course.get(field) for field in FIELDS.values()):
+            courses.append(dict(course, day=day))
+        course.clear()
+
+    for line in text.splitlines():
+        line = line.strip()
+        match = DAY_RE.match(line)
+        if match:
+            finish()
+            day = DAY_NAMES.index(match.group(1)) if match.group(1) in DAY_NAMES else None
+        elif line.startswith('[/星期'):
+            finish()
+            day = None
+        elif line == '!':
+            finish()
+        elif ':' in line:
+            key, _, value = line.partition(':')
+            field = FIELDS.get(key.strip())
+            if field:
+                course[field] = value.strip()
+    finish()
+    return courses
+
+
+def compile_user(text):
+    """把一个人的课表编译成 courses/sessions/occupancy"""
+    courses = []
+    course_ids = {}
+    sessions = []
+    occupancy = [[0] * len(DAY_NAMES) for _ in range(MAX_WEEK)]
+    for course in parse_timetable(text):
+        period_mask = range_mask(course["period"], PERIOD_COUNT)
+        week_mask = range_mask(course["weeks"], MAX_WEEK)
+        if not period_mask or not week_mask:
+            continue
+        key = (course["title"], course["classroom"])
+        if key not in course_ids:
+            course_ids[key] = len(courses)
+            courses.append(list(key))
+        sessions.append({
+            "course": course_ids[key],
+            "day": course["day"],
+            "period": course["period"],
+            "weeks": course["weeks"],
+            "period_mask": period_mask,
+            "week_mask": week_mask,
+        })
+        for week in range(MAX_WEEK):
+            if week_mask >> week & 1:
+                occupancy[week][course["day"]] |= period_mask
+    return {"courses": courses, "sessions": sessions, "occupancy": occupancy}
+
+
+def parse_routine(text):
+    """读取 routine.txt 中的上课时间，返回 [{"name", "start", "end"}, ...]"""
+    periods = []
+    for line in text.splitlines():
+        match = ROUTINE_RE.match(line.strip())
+        if match:
+            name, start, end = match.groups()
+            periods.append({"name": name, "start": start.zfill(5), "end": end.zfill(5)})
+    return periods
+
+
+def user_key(filename):
+    return USER_KEYS.get(filename, os.path.splitext(filename)[0])
+
+
+def load_artifact(path):
+    """读取已编译的课表，不存在、损坏或版本不同时返回 None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            artifact = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(artifact, dict) or artifact.get("version") != ARTIFACT_VERSION:
+        return None
+    return artifact
+
+
+def _sha1(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def compile_timetables(directory=TIMETABLE_DIR, output=None, routine_file=ROUTINE_FILE, force=False):
+    """编译 directory 中的所有 .txt 课表，只重新解析内容有变化的文件
+
+    返回 (artifact, stats)，stats 为 {"compiled", "unchanged", "removed"} 三个用户代号列表，
+    以及表示是否写入了文件的 "written"。
+    """
+    output = output or os.path.join(directory, ARTIFACT_FILE)
+    previous = None if force else load_artifact(output)
+    old_users = previous["users"] if previous else {}
+    stats = {"compiled": [], "unchanged": [], "removed": [], "written": False}
+
+    users = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith('.txt'):
+            continue
+        with open(os.path.join(directory, filename), 'rb') as f:
+            raw = f.read()
+        key = user_key(filename)
+        digest = _sha1(raw)
+        old = old_users.get(key)
+        if old and old.get("source") == filename and old.get("sha1") == digest:
+            users[key] = old
+            stats["unchanged"].append(key)
+            continue
+        users[key] = dict(compile_user(raw.decode('utf-8-sig')), source=filename, sha1=digest)
+        stats["compiled"].append(key)
+    stats["removed"] = sorted(set(old_users) - set(users))
+
+    routine_sha1 = None
+    periods = []
+    if routine_file and os.path.exists(routine_file):
+        with open(routine_file, 'rb') as f:
+            raw = f.read()
+        routine_sha1 = _sha1(raw)
+        if previous and previous.get("routine_sha1") == routine_sha1:
+            periods = previous["periods"]
+        else:
+            periods = parse_routine(raw.decode('utf-8-sig'))
+
+    artifact = {
+        "version": ARTIFACT_VERSION,
+        "weeks": MAX_WEEK,
+        "periods": periods,
+        "routine_sha1": routine_sha1,
+        "users": users,
+    }
+    if artifact != previous:
+        # 掩码和数字不需要缩进，保持文件紧凑
+        atomic_write_json(output, artifact, indent=None)
+        stats["written"] = True
+    return artifact, stats
+
+
+def current_week(today=None):
+    """today 所在的教学周，限制在 1..MAX_WEEK 之内"""
+    days = ((today or datetime.date.today()) - FIRST_WEEK_MONDAY).days
+    return min(max(days // 7 + 1, 1), MAX_WEEK)
+
+
+def course_at(entry, week, day, period):
+    """第 week 周星期 day（0-6）第 period 节的课程，没有课时返回 None
+
+    与 timetable.html 的解析结果一致：同一节有多门课时取文件中后出现的一门。
+    """
+    if not 1 <= week <= MAX_WEEK or not entry["occupancy"][week - 1][day] >> (period - 1) & 1:
+        return None
+    for session in reversed(entry["sessions"]):
+        if (session["day"] == day and session["week_mask"] >> (week - 1) & 1
+                and session["period_mask"] >> (period - 1) & 1):
+            title, classroom = entry["courses"][session["course"]]
+            return dict(session, title=title, classroom=classroom)
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="把 timetable/*.txt 编译成 timetable.json")
+    parser.add_argument("--dir", default=TIMETABLE_DIR, help="课表文件所在目录（默认 timetable）")
+    parser.add_argument("--output", help="输出文件，默认为课表目录中的 timetable.json")
+    parser.add_argument("--routine", default=ROUTINE_FILE, help="作息时间文件（默认 routine.txt）")
+    parser.add_argument("--force", action="store_true", help="忽略已编译的结果，全部重新解析")
+    args = parser.parse_args(argv)
+
+    _, stats = compile_timetables(args.dir, args.output, args.routine, args.force)
+    print(f"重新编译: {', '.join(stats['compiled']) or '无'}；"
+          f"未变化: {', '.join(stats['unchanged']) or '无'}；"
+          f"已删除: {', '.join(stats['removed']) or '无'}")
+    if not stats["written"]:
+        print("课表没有变化，未写入文件")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
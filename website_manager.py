@@ -1,34 +1,235 @@
 import sys
-import json
 import os
-import requests
+import threading
+import time
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QLabel, QLineEdit, QTextEdit, QPushButton, QListWidget, 
                              QListWidgetItem, QMessageBox, QTabWidget, QFormLayout, 
-                             QGroupBox, QComboBox, QFileDialog, QDialog, QInputDialog, 
-                             QTableWidget, QTableWidgetItem, QHeaderView, QTreeWidget, 
-                             QTreeWidgetItem)
-from PyQt5.QtWebEngineWidgets import QWebEngineView
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont, QIcon
-from github import Github
+                             QGroupBox, QComboBox, QFileDialog, QInputDialog, 
+                             QHeaderView, QProgressBar, 
+                             QTreeView, QTableView, QTableWidget, QTableWidgetItem,
+                             QSpinBox)
+from PyQt5.QtCore import Qt, QObject, QRunnable, QSortFilterProxyModel, QThreadPool, QTimer, pyqtSignal
+from PyQt5.QtGui import QFont, QIcon, QKeySequence
+from data_index import DataIndex
+from qt_models import (WebsiteTreeModel, WebsiteFilterProxy, FileTableModel, NotificationTableModel,
+                       NotificationSortProxy, ButtonDelegate)
+from catalog_store import (DATA_FILE, FILE_DATA_FILE, NOTIFICATION_FILE, JsonBackend,
+                           StoreConflict, generate_static, open_backend, save_stores)
+from search_index import SearchIndex, DEFAULT_INDEX_FILE, scan_websites
+from bulk_import import DEFAULT_CATEGORY, import_websites, read_records
+from exporter import write_export
+from link_status import load_status, save_status
+from link_expiry import DEFAULT_WARN_SECONDS, expiry_state, needs_check
+from file_size import apply_sizes, format_size, parse_size, size_bytes
+from journal import DEFAULT_JOURNAL_FILE, Change, Journal, apply_ops
+from timetable_compiler import (DAY_NAMES, MAX_WEEK, PERIOD_COUNT, compile_timetables, course_at,
+                                current_week)
+# QtWebEngine、PyGithub 和网络相关的模块（requests）加载很慢，只在第一次用到时才导入
+
+class MetadataFetchSignals(QObject):
+    # QRunnable 不是 QObject，信号需要放在单独的对象上
+    finished = pyqtSignal(int, dict)
+    failed = pyqtSignal(int, str)
+    cancelled = pyqtSignal(int)
+
+class MetadataFetchTask(QRunnable):
+    """在线程池中获取网站描述，避免阻塞界面"""
+    def __init__(self, task_id, url, website_id=None):
+        super().__init__()
+        self.task_id = task_id
+        self.url = url
+        # 发起获取时正在编辑的网站，结果返回时表单可能已经换成其他网站
+        self.website_id = website_id
+        self.cancel_event = threading.Event()
+        self.signals = MetadataFetchSignals()
+        
+    def cancel(self):
+        self.cancel_event.set()
+        
+    def run(self):
+        if self.cancel_event.is_set():
+            self.signals.cancelled.emit(self.task_id)
+            return
+        import requests
+        from site_metadata import fetch_site_metadata, FetchCancelled
+        try:
+            metadata = fetch_site_metadata(self.url, cancel_event=self.cancel_event)
+        except FetchCancelled:
+            self.signals.cancelled.emit(self.task_id)
+        except requests.exceptions.RequestException as e:
+            self.signals.failed.emit(self.task_id, f"无法获取网站内容: {str(e)}")
+        except Exception as e:
+            self.signals.failed.emit(self.task_id, f"获取描述时发生错误: {str(e)}")
+        else:
+            if self.cancel_event.is_set():
+                self.signals.cancelled.emit(self.task_id)
+            else:
+                self.signals.finished.emit(self.task_id, metadata)
+
+class BatchTaskSignals(QObject):
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)
+    # 任务意外出错时代替 finished 发出，参数为错误信息
+    failed = pyqtSignal(str)
+
+class MetadataRefreshTask(QRunnable):
+    """批量刷新全部网站描述，网络请求在内部线程池中并发进行"""
+    def __init__(self, websites):
+        super().__init__()
+        self.websites = websites
+        self.cancel_event = threading.Event()
+        self.signals = BatchTaskSignals()
+        
+    def cancel(self):
+        self.cancel_event.set()
+        
+    def run(self):
+        from metadata_refresh import refresh_all_metadata
+        try:
+            results = refresh_all_metadata(self.websites,
+                                           progress=self.signals.progress.emit,
+                                           cancel_event=self.cancel_event)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(results)
+
+class LinkCheckTask(QRunnable):
+    """并发检查所有链接"""
+    def __init__(self, urls):
+        super().__init__()
+        self.urls = urls
+        self.cancel_event = threading.Event()
+        self.signals = BatchTaskSignals()
+        
+    def cancel(self):
+        self.cancel_event.set()
+        
+    def run(self):
+        from link_checker import check_links
+        try:
+            results = check_links(self.urls,
+                                  progress=self.signals.progress.emit,
+                                  cancel_event=self.cancel_event)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(results)
+
+class SizeProbeTask(QRunnable):
+    """并发获取文件的大小"""
+    def __init__(self, urls):
+        super().__init__()
+        self.urls = urls
+        self.cancel_event = threading.Event()
+        self.signals = BatchTaskSignals()
+        
+    def cancel(self):
+        self.cancel_event.set()
+        
+    def run(self):
+        from size_probe import probe_sizes
+        try:
+            results = probe_sizes(self.urls,
+                                  progress=self.signals.progress.emit,
+                                  cancel_event=self.cancel_event)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(results)
+
+class FaviconHarvestTask(QRunnable):
+    """并发获取所有网站的图标，生成图标雪碧图"""
+    def __init__(self, websites):
+        super().__init__()
+        self.websites = websites
+        self.cancel_event = threading.Event()
+        self.signals = BatchTaskSignals()
+        
+    def cancel(self):
+        self.cancel_event.set()
+        
+    def run(self):
+        from favicon_cache import FaviconCache, build_sprite, collect_icons
+        from favicon_fetch import harvest_favicons
+        try:
+            cache = FaviconCache()
+            stats = harvest_favicons(self.websites, cache,
+                                     progress=self.signals.progress.emit,
+                                     cancel_event=self.cancel_event)
+            cache.prune(website["url"] for website in self.websites)
+            cache.save()
+            sprite_map, _ = build_sprite(cache, collect_icons(self.websites, cache))
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit({"stats": stats, "sprite": sprite_map})
+
+# 连续修改合并为一次写入的等待时间（毫秒）
+SAVE_DEBOUNCE_MS = 500
+# 搜索框停止输入后再过滤的等待时间（毫秒）
+FILTER_DEBOUNCE_MS = 150
+# 后台检查即将过期的下载链接的间隔（毫秒），启动后等待一段时间再第一次检查，不拖慢启动
+EXPIRY_CHECK_INTERVAL_MS = 30 * 60 * 1000
+EXPIRY_CHECK_DELAY_MS = 10 * 1000
 
 class WebsiteManager(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.data_file = 'data.json'
-        self.file_data_file = 'file.json'
-        self.notification_file = 'notification.json'
+        self.data_file = DATA_FILE
+        self.file_data_file = FILE_DATA_FILE
+        self.notification_file = NOTIFICATION_FILE
+        # 随data.json一起生成的搜索索引，供移动端页面加载
+        self.search_index_file = DEFAULT_INDEX_FILE
         self.data = {"categories": []}
         self.file_data = {"files": []}
         self.notification_data = {"notifications": []}
+        # id索引，避免每次操作都遍历全部数据
+        self.index = DataIndex()
+        # 网站全文搜索索引，增删改网站时由网站模型增量更新
+        self.search_index = SearchIndex()
+        # 有未写入修改的数据文件："data"、"files"、"notifications"
+        self.dirty_stores = set()
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(SAVE_DEBOUNCE_MS)
+        self.save_timer.timeout.connect(self.flush_data)
+        # 后台获取网站描述的线程池，task_id -> MetadataFetchTask
+        self.fetch_pool = QThreadPool(self)
+        self.fetch_pool.setMaxThreadCount(4)
+        self.fetch_tasks = {}
+        self.next_fetch_task_id = 1
+        self.refresh_task = None
+        self.refresh_overwrite = False
+        # 链接检查结果，url -> 结果
+        self.link_status = load_status()
+        self.link_check_task = None
+        # 定时在后台检查即将过期的下载链接
+        self.expiry_check_task = None
+        self.expiry_timer = QTimer(self)
+        self.expiry_timer.timeout.connect(self.revalidate_expiring_links)
+        self.favicon_task = None
+        # 正在运行的获取文件大小任务
+        self.size_probe_tasks = set()
+        # 文件预览窗口，第一次预览时创建
+        self.preview_window = None
+        # 操作日志，用于撤销/重做和崩溃恢复
+        self.journal = None
         self.init_ui()
+        self.open_backend()
         self.load_data()
         self.load_file_data()
         self.load_notification_data()
+        # 重新应用上次崩溃前没来得及保存的操作
+        self.open_journal()
+        # 只设置模型的数据，视图在标签页第一次显示时才连接模型
         self.update_category_list()
+        self.update_website_list()
         self.update_file_list()
         self.update_notification_list()
+        self.on_tab_changed(self.tab_widget.currentIndex())
+        self.expiry_timer.start(EXPIRY_CHECK_DELAY_MS)
         
     def init_ui(self):
         self.setWindowTitle('网站收藏管理器')
@@ -48,17 +249,57 @@ class WebsiteManager(QMainWindow):
         self.tab_widget.addTab(self.website_tab, "网站管理")
         self.tab_widget.addTab(self.file_tab, "文件管理")  # 添加文件管理标签页
         self.tab_widget.addTab(self.notification_tab, "通知管理")  # 添加通知管理标签页
+        self.timetable_tab = QWidget()
+        self.tab_widget.addTab(self.timetable_tab, "课表")
+        
+        # 编辑菜单：撤销/重做
+        edit_menu = self.menuBar().addMenu("编辑")
+        self.undo_action = edit_menu.addAction("撤销")
+        self.undo_action.setShortcut(QKeySequence.Undo)
+        self.undo_action.triggered.connect(self.undo)
+        self.redo_action = edit_menu.addAction("重做")
+        self.redo_action.setShortcut(QKeySequence.Redo)
+        self.redo_action.triggered.connect(self.redo)
+        
+        # 标签页 -> 第一次显示时调用的加载函数
+        self.tab_loaders = {}
+        self.tab_widget.currentChanged.connect(self.on_tab_changed)
         
         self.setup_category_tab()
         self.setup_website_tab()
         self.setup_file_tab()  # 设置文件管理标签页
         self.setup_notification_tab()  # 设置通知管理标签页
-        
-    def showEvent(self, event):
-        # 窗口显示时更新列表
-        super().showEvent(event)
-        self.update_website_list()
-        
+        self.setup_timetable_tab()
+        
+    def closeEvent(self, event):
+        # 关闭窗口前取消后台获取，避免线程在窗口销毁后回调
+        self.cancel_fetches()
+        if self.link_check_task is not None:
+            self.link_check_task.cancel()
+        self.expiry_timer.stop()
+        if self.expiry_check_task is not None:
+            self.expiry_check_task.cancel()
+        if self.favicon_task is not None:
+            self.favicon_task.cancel()
+        for task in self.size_probe_tasks:
+            task.cancel()
+        self.fetch_pool.waitForDone(2000)
+        # 写入尚未保存的修改并生成JSON文件，数据已完整保存时压缩操作日志
+        if self.generate_static_files() and self.journal is not None:
+            try:
+                self.journal.compact()
+            except OSError:
+                pass
+            self.journal.close()
+        self.backend.close()
+        super().closeEvent(event)
+        
+    def on_tab_changed(self, index):
+        # 标签页第一次显示时才把模型连接到视图，启动时不为看不到的列表排版
+        loader = self.tab_loaders.pop(self.tab_widget.widget(index), None)
+        if loader is not None:
+            loader()
+
     def setup_category_tab(self):
         layout = QVBoxLayout()
         
@@ -138,6 +379,23 @@ class WebsiteManager(QMainWindow):
         fetch_desc_btn.clicked.connect(self.fetch_website_description)
         form_layout.addRow(fetch_desc_btn)
         
+        # 后台获取进度，获取过程中可以继续编辑其他网站
+        fetch_status_layout = QHBoxLayout()
+        self.fetch_progress = QProgressBar()
+        self.fetch_progress.setRange(0, 0)  # 不确定进度，显示忙碌状态
+        self.fetch_progress.setMaximumHeight(12)
+        self.fetch_progress.setTextVisible(False)
+        fetch_status_layout.addWidget(self.fetch_progress)
+        self.fetch_status_label = QLabel()
+        fetch_status_layout.addWidget(self.fetch_status_label)
+        self.cancel_fetch_btn = QPushButton("取消获取")
+        self.cancel_fetch_btn.clicked.connect(self.cancel_fetches)
+        fetch_status_layout.addWidget(self.cancel_fetch_btn)
+        self.fetch_status_widget = QWidget()
+        self.fetch_status_widget.setLayout(fetch_status_layout)
+        self.fetch_status_widget.setVisible(False)
+        form_layout.addRow(self.fetch_status_widget)
+        
         add_website_btn = QPushButton("添加网站")
         add_website_btn.setObjectName("add_website_btn")
         add_website_btn.clicked.connect(self.add_website)
@@ -150,16 +408,34 @@ class WebsiteManager(QMainWindow):
         list_group = QGroupBox("现有网站")
         list_layout = QVBoxLayout()
         
-        # 使用QTreeWidget实现风琴式分类显示
-        self.website_tree = QTreeWidget()
-        self.website_tree.setHeaderLabels(["网站名称", "URL", "描述"])
-        self.website_tree.setColumnWidth(0, 150)
-        self.website_tree.setColumnWidth(1, 200)
+        # 搜索框，按名称、URL、描述和分类过滤网站
+        self.website_filter_input = QLineEdit()
+        self.website_filter_input.setPlaceholderText("搜索网站（名称、URL、描述、分类）")
+        self.website_filter_input.setClearButtonEnabled(True)
+        list_layout.addWidget(self.website_filter_input)
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(FILTER_DEBOUNCE_MS)
+        self.filter_timer.timeout.connect(self.filter_websites)
+        self.website_filter_input.textChanged.connect(self.filter_timer.start)
+        
+        # 使用QTreeView + 自定义模型实现风琴式分类显示，增删移动只更新受影响的行
+        self.website_model = WebsiteTreeModel(self.link_status, self.search_index, self)
+        self.website_proxy = WebsiteFilterProxy(self)
+        self.website_proxy.setSourceModel(self.website_model)
+        # 搜索时增删改的网站也要重新判断是否匹配
+        self.website_model.rowsInserted.connect(self.on_website_model_changed)
+        self.website_model.rowsRemoved.connect(self.on_website_model_changed)
+        self.website_model.dataChanged.connect(self.on_website_model_changed)
+        self.website_tree = QTreeView()
+        self.website_tree.setUniformRowHeights(True)
         self.website_tree.setAlternatingRowColors(True)
+        self.tab_loaders[self.website_tab] = self.load_website_tab
         list_layout.addWidget(self.website_tree)
         
         # 按钮布局
         button_layout = QHBoxLayout()
+        button_layout.setObjectName("website_button_layout")
         
         # 上移按钮
         move_up_btn = QPushButton("上移")
@@ -181,9 +457,39 @@ class WebsiteManager(QMainWindow):
         delete_website_btn.clicked.connect(self.delete_website)
         button_layout.addWidget(delete_website_btn)
         
-        # 上传到GitHub按钮
+        # 批量导入按钮
+        import_websites_btn = QPushButton("批量导入")
+        import_websites_btn.clicked.connect(self.import_websites)
+        button_layout.addWidget(import_websites_btn)
+        
+        # 导出按钮
+        export_websites_btn = QPushButton("导出")
+        export_websites_btn.clicked.connect(self.export_websites)
+        button_layout.addWidget(export_websites_btn)
+        
+        # 批量刷新描述按钮
+        refresh_metadata_btn = QPushButton("刷新全部描述")
+        refresh_metadata_btn.clicked.connect(self.refresh_all_descriptions)
+        button_layout.addWidget(refresh_metadata_btn)
+        
+        # 链接检查按钮
+        check_links_btn = QPushButton("检查链接")
+        check_links_btn.clicked.connect(self.check_all_links)
+        button_layout.addWidget(check_links_btn)
+        
+        # 导出链接报告按钮
+        export_link_report_btn = QPushButton("导出链接报告")
+        export_link_report_btn.clicked.connect(self.export_link_report)
+        button_layout.addWidget(export_link_report_btn)
+        
+        # 获取网站图标并生成雪碧图，移动端页面只需要下载一张图片
+        harvest_favicons_btn = QPushButton("更新网站图标")
+        harvest_favicons_btn.clicked.connect(self.harvest_favicons)
+        button_layout.addWidget(harvest_favicons_btn)
+        
+        # 发布到GitHub按钮（一次提交包含所有有变化的数据文件）
         upload_github_btn = QPushButton("上传到GitHub")
-        upload_github_btn.clicked.connect(self.upload_to_github)
+        upload_github_btn.clicked.connect(self.publish_to_github)
         button_layout.addWidget(upload_github_btn)
         
         # 刷新按钮
@@ -198,63 +504,184 @@ class WebsiteManager(QMainWindow):
         
         self.website_tab.setLayout(layout)
         
+    def open_backend(self):
+        # 数据保存在存储后端中（默认 SQLite），静态页面使用的JSON文件由 generate_static_files 生成
+        try:
+            self.backend = open_backend()
+        except Exception as e:
+            QMessageBox.warning(self, "加载错误", f"无法打开数据库，改为直接读写JSON文件: {str(e)}")
+            self.backend = JsonBackend()
+            
+    def load_store(self, store, path):
+        """从存储后端读取一个存储，JSON 文件和数据库都有修改时询问保留哪一份"""
+        try:
+            return self.backend.load(store, path)
+        except StoreConflict as e:
+            reply = QMessageBox.question(self, "数据冲突",
+                                       f"{str(e)}。\n\n"
+                                       f"选择“是”导入该文件，放弃数据库中尚未生成的修改；\n"
+                                       f"选择“否”保留数据库中的内容，下次生成时覆盖该文件。",
+                                       QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+            return self.backend.load(store, path,
+                                     on_conflict="json" if reply == QMessageBox.Yes else "database")
+            
     def load_data(self):
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    self.data = json.load(f)
-            except Exception as e:
-                QMessageBox.warning(self, "加载错误", f"无法加载数据文件: {str(e)}")
-                self.data = {"categories": []}
-        else:
-            # 创建默认数据结构
+        # 文件不存在时得到默认数据结构
+        try:
+            self.data = self.load_store("data", self.data_file)
+        except Exception as e:
+            QMessageBox.warning(self, "加载错误", f"无法加载数据文件: {str(e)}")
             self.data = {"categories": []}
+        self.index.rebuild_data(self.data)
+        self.search_index.rebuild(self.data)
             
     def load_file_data(self):
-        if os.path.exists(self.file_data_file):
-            try:
-                with open(self.file_data_file, 'r', encoding='utf-8') as f:
-                    self.file_data = json.load(f)
-                # 确保文件数据结构存在
-                if "files" not in self.file_data:
-                    self.file_data["files"] = []
-            except Exception as e:
-                QMessageBox.warning(self, "加载错误", f"无法加载文件数据: {str(e)}")
-                self.file_data = {"files": []}
-        else:
-            # 创建默认文件数据结构
+        try:
+            self.file_data = self.load_store("files", self.file_data_file)
+        except Exception as e:
+            QMessageBox.warning(self, "加载错误", f"无法加载文件数据: {str(e)}")
             self.file_data = {"files": []}
+        self.index.rebuild_files(self.file_data)
             
     def load_notification_data(self):
-        if os.path.exists(self.notification_file):
-            try:
-                with open(self.notification_file, 'r', encoding='utf-8') as f:
-                    self.notification_data = json.load(f)
-                # 确保通知数据结构存在
-                if "notifications" not in self.notification_data:
-                    self.notification_data["notifications"] = []
-            except Exception as e:
-                QMessageBox.warning(self, "加载错误", f"无法加载通知数据: {str(e)}")
-                self.notification_data = {"notifications": []}
-        else:
-            # 创建默认通知数据结构
+        try:
+            self.notification_data = self.load_store("notifications", self.notification_file)
+        except Exception as e:
+            QMessageBox.warning(self, "加载错误", f"无法加载通知数据: {str(e)}")
             self.notification_data = {"notifications": []}
+        self.index.rebuild_notifications(self.notification_data)
             
-    def save_data(self):
+    def save_data(self, *stores):
+        """标记数据已修改，稍后合并写入
+
+        stores 为 "data"、"files"、"notifications" 中的若干个，不传时写入全部文件。
+        连续的修改会在 SAVE_DEBOUNCE_MS 内合并为一次写入。
+        """
+        self.dirty_stores.update(stores or ("data", "files", "notifications"))
+        self.save_timer.start()
+        
+    def store_files(self):
+        # 存储名 -> (文件路径, 数据)
+        return {
+            "data": (self.data_file, self.data),
+            "files": (self.file_data_file, self.file_data),
+            "notifications": (self.notification_file, self.notification_data),
+        }
+        
+    def flush_data(self):
+        """立即把有修改的数据写入存储后端，SQLite 后端只写入发生变化的行"""
+        self.save_timer.stop()
+        if not self.dirty_stores:
+            return True
         try:
-            # 保存主数据文件
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, ensure_ascii=False, indent=2)
-                
-            # 保存文件数据到单独的文件
-            with open(self.file_data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.file_data, f, ensure_ascii=False, indent=2)
-                
-            # 保存通知数据到单独的文件
-            with open(self.notification_file, 'w', encoding='utf-8') as f:
-                json.dump(self.notification_data, f, ensure_ascii=False, indent=2)
+            save_stores(self.store_files(), self.dirty_stores, self.search_index,
+                        self.search_index_file, self.backend)
+            if self.journal is not None:
+                # 数据已包含日志中的所有操作；日志过长时先生成JSON文件再压缩
+                self.journal.checkpoint()
+                if self.journal.needs_compaction():
+                    generate_static(self.backend, self.store_files(), self.search_index,
+                                    self.search_index_file)
+                    self.journal.compact()
         except Exception as e:
             QMessageBox.warning(self, "保存错误", f"无法保存数据: {str(e)}")
+            return False
+        return True
+        
+    def generate_static_files(self):
+        """写入尚未保存的修改，再从存储后端生成静态页面读取的JSON文件和搜索索引"""
+        if not self.flush_data():
+            return False
+        try:
+            generate_static(self.backend, self.store_files(), self.search_index,
+                            self.search_index_file)
+        except Exception as e:
+            QMessageBox.warning(self, "保存错误", f"无法生成JSON文件: {str(e)}")
+            return False
+        return True
+        
+    def data_stores(self):
+        # 存储名 -> 数据，应用操作日志时使用
+        return {"data": self.data, "files": self.file_data, "notifications": self.notification_data}
+        
+    def open_journal(self):
+        """打开操作日志，把最后一次保存之后记录的操作重新应用到刚读取的数据上"""
+        self.journal = Journal(DEFAULT_JOURNAL_FILE)
+        try:
+            pending = self.journal.open()
+            stores = set()
+            for ops in pending:
+                stores |= apply_ops(ops, self.data_stores(), self.index)
+        except Exception as e:
+            QMessageBox.warning(self, "加载错误", f"无法读取操作日志，撤销功能不可用: {str(e)}")
+            self.journal.close()
+            self.journal = None
+            self.update_undo_actions()
+            return
+        if pending:
+            self.search_index.rebuild(self.data)
+            self.save_data(*stores)
+            self.statusBar().showMessage(f"已从操作日志恢复 {len(pending)} 个未保存的操作", 10000)
+        self.update_undo_actions()
+        
+    def begin_change(self, *records):
+        """在修改数据之前记录这些记录的内容，records 为若干 (类型, id)"""
+        change = Change(self.index)
+        for kind, record_id in records:
+            change.watch(kind, record_id)
+        return change
+        
+    def commit_change(self, label, change):
+        """把一次操作写入操作日志，再标记对应的数据需要保存"""
+        ops = change.ops()
+        if not ops:
+            return
+        if self.journal is not None:
+            try:
+                self.journal.record(label, ops)
+            except OSError as e:
+                self.statusBar().showMessage(f"无法写入操作日志: {str(e)}", 5000)
+        self.save_data(*{op["store"] for op in ops})
+        self.update_undo_actions()
+        
+    def update_undo_actions(self):
+        undo_label = self.journal.undo_label() if self.journal is not None else None
+        redo_label = self.journal.redo_label() if self.journal is not None else None
+        self.undo_action.setEnabled(undo_label is not None)
+        self.undo_action.setText(f"撤销 {undo_label}" if undo_label else "撤销")
+        self.redo_action.setEnabled(redo_label is not None)
+        self.redo_action.setText(f"重做 {redo_label}" if redo_label else "重做")
+        
+    def undo(self):
+        self.replay_journal(self.journal.undo if self.journal is not None else None, "已撤销")
+        
+    def redo(self):
+        self.replay_journal(self.journal.redo if self.journal is not None else None, "已重做")
+        
+    def replay_journal(self, step, message):
+        """执行一步撤销或重做，并刷新受影响的列表"""
+        if step is None:
+            return
+        try:
+            result = step()
+            if result is None:
+                return
+            label, ops = result
+            stores = apply_ops(ops, self.data_stores(), self.index)
+        except Exception as e:
+            QMessageBox.warning(self, "错误", f"{message}失败: {str(e)}")
+            return
+        self.save_data(*stores)
+        if "data" in stores:
+            self.search_index.rebuild(self.data)
+            self.update_category_list()
+            self.update_website_list()
+        if "files" in stores:
+            self.update_file_list()
+        if "notifications" in stores:
+            self.update_notification_list()
+        self.update_undo_actions()
+        self.statusBar().showMessage(f"{message}: {label}", 3000)
             
     def update_category_list(self):
         # 更新分类列表显示
@@ -280,16 +707,17 @@ class WebsiteManager(QMainWindow):
                 return
                 
         # 生成新的分类ID
-        new_id = max([c["id"] for c in self.data["categories"]], default=0) + 1
+        new_id = self.index.next_category_id()
         
         # 添加新分类
-        self.data["categories"].append({
+        change = self.begin_change(("category", new_id))
+        self.website_model.add_category({
             "id": new_id,
             "name": name,
             "websites": []
         })
         
-        self.save_data()
+        self.commit_change("添加分类", change)
         self.update_category_list()
         
         # 清空输入框
@@ -313,10 +741,11 @@ class WebsiteManager(QMainWindow):
         
         if reply == QMessageBox.Yes:
             # 删除分类
-            self.data["categories"] = [c for c in self.data["categories"] if c["id"] != category_id]
-            self.save_data()
+            change = self.begin_change()
+            change.watch_category(category_id)
+            self.website_model.remove_category(category_id)
+            self.commit_change("删除分类", change)
             self.update_category_list()
-            self.update_website_list()
             QMessageBox.information(self, "成功", "分类删除成功")
             
     def move_category_up(self):
@@ -326,10 +755,12 @@ class WebsiteManager(QMainWindow):
             return
             
         # 交换数据中的位置
-        self.data["categories"][current_row], self.data["categories"][current_row-1] = \
-            self.data["categories"][current_row-1], self.data["categories"][current_row]
+        categories = self.data["categories"]
+        change = self.begin_change(("category", categories[current_row]["id"]),
+                                   ("category", categories[current_row-1]["id"]))
+        self.website_model.swap_categories(current_row, current_row-1)
             
-        self.save_data()
+        self.commit_change("上移分类", change)
         self.update_category_list()
         
         # 更新选中项
@@ -343,10 +774,12 @@ class WebsiteManager(QMainWindow):
             return
             
         # 交换数据中的位置
-        self.data["categories"][current_row], self.data["categories"][current_row+1] = \
-            self.data["categories"][current_row+1], self.data["categories"][current_row]
+        categories = self.data["categories"]
+        change = self.begin_change(("category", categories[current_row]["id"]),
+                                   ("category", categories[current_row+1]["id"]))
+        self.website_model.swap_categories(current_row, current_row+1)
             
-        self.save_data()
+        self.commit_change("下移分类", change)
         self.update_category_list()
         
         # 更新选中项
@@ -364,57 +797,178 @@ class WebsiteManager(QMainWindow):
             QMessageBox.warning(self, "输入错误", "URL必须以http://或https://开头")
             return
             
-        try:
-            # 发送HTTP请求获取网页内容
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            # 获取网页内容
-            content = response.text
-            
-            # 尝试提取标题
-            title = ""
-            import re
-            title_match = re.search(r'<title[^>]*>(.*?)</title>', content, re.IGNORECASE | re.DOTALL)
-            if title_match:
-                title = title_match.group(1).strip()
-            
-            # 尝试提取描述
-            description = ""
-            desc_match = re.search(r'<meta[^>]*name=["\']description["\'][^>]*content=["\']([^"\']*)["\'][^>]*>', content, re.IGNORECASE)
-            if desc_match:
-                description = desc_match.group(1).strip()
-            else:
-                # 尝试使用Open Graph描述
-                og_desc_match = re.search(r'<meta[^>]*property=["\']og:description["\'][^>]*content=["\']([^"\']*)["\'][^>]*>', content, re.IGNORECASE)
-                if og_desc_match:
-                    description = og_desc_match.group(1).strip()
-            
-            # 构建描述文本
-            desc_text = ""
-            if title:
-                desc_text += f"标题: {title}\n\n"
-            if description:
-                desc_text += f"描述: {description}\n\n"
-            if not title and not description:
-                # 如果没有找到标题和描述，尝试获取页面前200个字符
-                # 移除HTML标签
-                clean_content = re.sub(r'<[^>]+>', '', content)
-                clean_content = re.sub(r'\s+', ' ', clean_content).strip()
-                desc_text = clean_content[:200] + "..." if len(clean_content) > 200 else clean_content
-            
-            # 将获取到的描述填入描述框
+        # 同一个URL已经在获取中
+        for task in self.fetch_tasks.values():
+            if task.url == url:
+                self.statusBar().showMessage(f"正在获取 {url} 的描述，请稍候", 3000)
+                return
+                
+        # 在线程池中获取，界面不会被阻塞
+        task_id = self.next_fetch_task_id
+        self.next_fetch_task_id += 1
+        task = MetadataFetchTask(task_id, url, getattr(self, 'current_editing_website_id', None))
+        task.signals.finished.connect(self.on_fetch_finished)
+        task.signals.failed.connect(self.on_fetch_failed)
+        task.signals.cancelled.connect(self.on_fetch_cancelled)
+        self.fetch_tasks[task_id] = task
+        self.fetch_pool.start(task)
+        self.update_fetch_status()
+        
+    def cancel_fetches(self):
+        """取消所有正在进行的描述获取"""
+        for task in self.fetch_tasks.values():
+            task.cancel()
+        if self.refresh_task is not None:
+            self.refresh_task.cancel()
+        self.fetch_status_label.setText("正在取消...")
+        
+    def update_fetch_status(self):
+        count = len(self.fetch_tasks)
+        busy = count > 0 or self.refresh_task is not None
+        self.fetch_status_widget.setVisible(busy)
+        if self.refresh_task is None:
+            self.fetch_progress.setRange(0, 0)
+        if count:
+            self.fetch_status_label.setText(f"正在获取 {count} 个网站的描述")
+            
+    def refresh_all_descriptions(self):
+        """并发刷新所有网站的描述，未变化的网站通过缓存跳过下载"""
+        if self.refresh_task is not None:
+            QMessageBox.warning(self, "操作错误", "正在刷新全部描述，请稍候")
+            return
+            
+        reply = QMessageBox.question(self, "刷新全部描述",
+                                   "是否覆盖已有的网站描述？\n选择“否”只填充描述为空的网站。",
+                                   QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel)
+        if reply == QMessageBox.Cancel:
+            return
+        self.refresh_overwrite = reply == QMessageBox.Yes
+        
+        from metadata_refresh import iter_websites
+        # 传入快照，工作线程不直接读取正在编辑的数据
+        websites = [{"id": w["id"], "url": w["url"]} for w in iter_websites(self.data)]
+        if not websites:
+            QMessageBox.information(self, "提示", "没有可以刷新的网站")
+            return
+            
+        self.refresh_task = MetadataRefreshTask(websites)
+        self.refresh_task.signals.progress.connect(self.on_refresh_progress)
+        self.refresh_task.signals.finished.connect(self.on_refresh_finished)
+        self.refresh_task.signals.failed.connect(self.on_refresh_failed)
+        self.fetch_progress.setRange(0, len(websites))
+        self.fetch_progress.setValue(0)
+        self.fetch_status_label.setText(f"正在刷新 0/{len(websites)}")
+        self.fetch_pool.start(self.refresh_task)
+        self.update_fetch_status()
+        
+    def on_refresh_progress(self, done, total):
+        self.fetch_progress.setRange(0, total)
+        self.fetch_progress.setValue(done)
+        self.fetch_status_label.setText(f"正在刷新 {done}/{total}")
+        
+    def on_refresh_finished(self, results):
+        from metadata_refresh import apply_results, UPDATED, NOT_MODIFIED, CANCELLED
+        self.refresh_task = None
+        self.update_fetch_status()
+        
+        change = self.begin_change(*(("website", r["id"]) for r in results if r["metadata"] is not None))
+        changed = apply_results(self.index, results, overwrite=self.refresh_overwrite)
+        if changed:
+            self.commit_change("刷新网站描述", change)
+            for website_id in changed:
+                self.website_model.website_changed(website_id)
+            
+        updated = sum(1 for r in results if r["status"] == UPDATED)
+        not_modified = sum(1 for r in results if r["status"] == NOT_MODIFIED)
+        cancelled = sum(1 for r in results if r["status"] == CANCELLED)
+        failed = len(results) - updated - not_modified - cancelled
+        QMessageBox.information(self, "刷新完成",
+                                f"已下载: {updated}\n未变化: {not_modified}\n失败: {failed}\n"
+                                f"已取消: {cancelled}\n更新描述: {len(changed)}")
+            
+    def on_refresh_failed(self, message):
+        self.refresh_task = None
+        self.update_fetch_status()
+        QMessageBox.warning(self, "刷新错误", f"刷新网站描述时出错: {message}")
+            
+    def harvest_favicons(self):
+        """在后台获取所有网站的图标，生成 web_ico/ 中的雪碧图和 sprite.json"""
+        if self.favicon_task is not None:
+            QMessageBox.warning(self, "操作错误", "正在更新网站图标，请稍候")
+            return
+            
+        from metadata_refresh import iter_websites
+        # 传入快照，工作线程不直接读取正在编辑的数据
+        websites = [{"id": w["id"], "name": w["name"], "url": w["url"]} for w in iter_websites(self.data)]
+        if not websites:
+            QMessageBox.information(self, "提示", "没有网站")
+            return
+            
+        self.favicon_task = FaviconHarvestTask(websites)
+        self.favicon_task.signals.progress.connect(
+            lambda done, total: self.statusBar().showMessage(f"正在获取网站图标 {done}/{total}"))
+        self.favicon_task.signals.finished.connect(self.on_favicons_finished)
+        self.favicon_task.signals.failed.connect(self.on_favicons_failed)
+        self.statusBar().showMessage("正在获取网站图标...")
+        self.fetch_pool.start(self.favicon_task)
+        
+    def on_favicons_finished(self, result):
+        self.favicon_task = None
+        self.statusBar().clearMessage()
+        stats, sprite = result["stats"], result["sprite"]
+        QMessageBox.information(self, "更新完成",
+                                f"已下载: {stats['fetched']}\n未变化: {stats['unchanged']}\n"
+                                f"跳过: {stats['skipped']}\n失败: {len(stats['failed'])}\n"
+                                f"雪碧图中的网站: {len(sprite['icons'])}")
+            
+    def on_favicons_failed(self, message):
+        self.favicon_task = None
+        self.statusBar().clearMessage()
+        QMessageBox.warning(self, "错误", f"更新网站图标失败: {message}")
+            
+    def on_fetch_finished(self, task_id, metadata):
+        task = self.fetch_tasks.pop(task_id, None)
+        self.update_fetch_status()
+        if task is None:
+            return
+            
+        from site_metadata import format_description
+        desc_text = format_description(metadata)
+        
+        # 表单仍然是发起获取时的网站，直接填入描述框
+        if self.website_url_input.text().strip() == task.url:
             self.website_desc_input.setPlainText(desc_text)
+            self.statusBar().showMessage("已成功获取网站描述信息", 3000)
+            return
             
-            QMessageBox.information(self, "成功", "已成功获取网站描述信息")
+        # 表单已切换到其他网站，把描述写回发起获取时正在编辑的网站
+        website = None
+        if task.website_id is not None:
+            website, _, _ = self.index.find_website(task.website_id)
+        if website and website["url"] == task.url:
+            change = self.begin_change(("website", task.website_id))
+            website["description"] = desc_text.strip()
+            self.commit_change("获取网站描述", change)
+            self.website_model.website_changed(task.website_id)
+            self.statusBar().showMessage(f"已更新网站 '{website['name']}' 的描述", 3000)
+        else:
+            self.statusBar().showMessage(f"{task.url} 的描述已获取，但表单已变更，未填入", 5000)
             
-        except requests.exceptions.RequestException as e:
-            QMessageBox.warning(self, "网络错误", f"无法获取网站内容: {str(e)}")
-        except Exception as e:
-            QMessageBox.warning(self, "错误", f"获取描述时发生错误: {str(e)}")
+    def on_fetch_failed(self, task_id, message):
+        task = self.fetch_tasks.pop(task_id, None)
+        self.update_fetch_status()
+        if task is None:
+            return
+        if self.website_url_input.text().strip() == task.url:
+            QMessageBox.warning(self, "网络错误", message)
+        else:
+            self.statusBar().showMessage(f"{task.url}: {message}", 5000)
+            
+    def on_fetch_cancelled(self, task_id):
+        task = self.fetch_tasks.pop(task_id, None)
+        self.update_fetch_status()
+        if task is not None:
+            self.statusBar().showMessage(f"已取消获取 {task.url}", 3000)
     
     def add_website(self):
         name = self.website_name_input.text().strip()
@@ -437,18 +991,14 @@ class WebsiteManager(QMainWindow):
             return
             
         # 找到对应的分类
-        category = None
-        for cat in self.data["categories"]:
-            if cat["id"] == category_id:
-                category = cat
-                break
+        category = self.index.get_category(category_id)
                 
         if not category:
             QMessageBox.warning(self, "错误", "找不到指定的分类")
             return
             
         # 生成新的网站ID
-        new_id = max([w["id"] for c in self.data["categories"] for w in c["websites"]], default=0) + 1
+        new_id = self.index.next_website_id()
         
         # 添加新网站
         new_website = {
@@ -458,8 +1008,9 @@ class WebsiteManager(QMainWindow):
             "description": description
         }
         
-        category["websites"].append(new_website)
-        self.save_data()
+        change = self.begin_change(("website", new_id))
+        self.website_model.add_website(category, new_website)
+        self.commit_change("添加网站", change)
         
         # 清空输入框
         self.website_name_input.clear()
@@ -469,28 +1020,19 @@ class WebsiteManager(QMainWindow):
         QMessageBox.information(self, "成功", "网站添加成功")
         
     def edit_website(self):
-        current_item = self.website_tree.currentItem()
-        if not current_item:
+        current_index = self.website_proxy.mapToSource(self.website_tree.currentIndex())
+        if not current_index.isValid():
             QMessageBox.warning(self, "选择错误", "请先选择要编辑的网站")
             return
             
-        # 获取网站ID（只有网站项才有UserRole数据）
-        website_id = current_item.data(0, Qt.UserRole)
+        # 获取网站ID（分类节点返回None）
+        website_id = self.website_model.website_id(current_index)
         if website_id is None:
             QMessageBox.warning(self, "选择错误", "请选择一个具体的网站，而不是分类")
             return
         
         # 查找网站信息
-        website = None
-        category_id = None
-        for category in self.data["categories"]:
-            for w in category["websites"]:
-                if w["id"] == website_id:
-                    website = w
-                    category_id = category["id"]
-                    break
-            if website:
-                break
+        website, category, _ = self.index.find_website(website_id)
                 
         if not website:
             QMessageBox.warning(self, "错误", "找不到选中的网站")
@@ -502,7 +1044,7 @@ class WebsiteManager(QMainWindow):
         self.website_desc_input.setPlainText(website["description"])
         
         # 设置分类选择
-        index = self.website_category_combo.findData(category_id)
+        index = self.website_category_combo.findData(category["id"])
         if index >= 0:
             self.website_category_combo.setCurrentIndex(index)
             
@@ -530,7 +1072,7 @@ class WebsiteManager(QMainWindow):
             cancel_edit_btn.setObjectName("cancel_edit_btn")
             cancel_edit_btn.clicked.connect(self.cancel_edit)
             # 找到正确的按钮布局
-            button_layout = self.website_tab.findChild(QHBoxLayout)
+            button_layout = self.website_tab.findChild(QHBoxLayout, "website_button_layout")
             if button_layout:
                 button_layout.addWidget(cancel_edit_btn)
             
@@ -592,45 +1134,29 @@ class WebsiteManager(QMainWindow):
         website_id = self.current_editing_website_id
             
         # 找到对应的分类和网站
-        category = None
-        website = None
-        for cat in self.data["categories"]:
-            if cat["id"] == category_id:
-                category = cat
-                # 如果网站原本就在这个分类中，找到它
-                for w in cat["websites"]:
-                    if w["id"] == website_id:
-                        website = w
-                        break
-                break
+        category = self.index.get_category(category_id)
                 
         if not category:
             QMessageBox.warning(self, "错误", "找不到指定的分类")
             return
             
-        # 如果网站原本不在这个分类中，需要从原分类中移除并添加到新分类
+        website, old_category, _ = self.index.find_website(website_id)
         if not website:
-            # 从原分类中移除
-            for cat in self.data["categories"]:
-                cat["websites"] = [w for w in cat["websites"] if w["id"] != website_id]
-                
-            # 创建更新后的网站对象
-            updated_website = {
-                "id": website_id,
-                "name": name,
-                "url": url,
-                "description": description
-            }
-            
-            # 添加到新分类
-            category["websites"].append(updated_website)
-        else:
-            # 直接更新网站信息
-            website["name"] = name
-            website["url"] = url
-            website["description"] = description
+            QMessageBox.warning(self, "错误", "找不到选中的网站")
+            return
             
-        self.save_data()
+        change = self.begin_change(("website", website_id))
+        # 如果网站原本不在这个分类中，需要从原分类中移除并添加到新分类
+        if old_category is not category:
+            self.website_model.move_website(website_id, category)
+            
+        # 更新网站信息
+        website["name"] = name
+        website["url"] = url
+        website["description"] = description
+        self.website_model.website_changed(website_id)
+            
+        self.commit_change("修改网站", change)
         
         # 恢复按钮功能
         self.restore_add_button()
@@ -640,9 +1166,6 @@ class WebsiteManager(QMainWindow):
         self.website_url_input.clear()
         self.website_desc_input.clear()
         
-        # 更新列表
-        self.update_website_list()
-        
         # 删除编辑状态标记
         if hasattr(self, 'current_editing_website_id'):
             delattr(self, 'current_editing_website_id')
@@ -651,9 +1174,8 @@ class WebsiteManager(QMainWindow):
         
     def restore_add_button(self):
         # 恢复添加按钮的功能和文本
-        buttons = self.website_tab.findChildren(QPushButton)
-        if buttons:
-            add_btn = buttons[0]  # 添加按钮应该是第一个
+        add_btn = self.website_tab.findChild(QPushButton, "add_website_btn")
+        if add_btn:
             add_btn.setText("添加网站")
             try:
                 add_btn.clicked.disconnect()  # 断开所有连接
@@ -672,19 +1194,19 @@ class WebsiteManager(QMainWindow):
             cancel_edit_btn.deleteLater()
             
     def delete_website(self):
-        current_item = self.website_tree.currentItem()
-        if not current_item:
+        current_index = self.website_proxy.mapToSource(self.website_tree.currentIndex())
+        if not current_index.isValid():
             QMessageBox.warning(self, "选择错误", "请先选择要删除的网站")
             return
             
-        # 获取网站ID（只有网站项才有UserRole数据）
-        website_id = current_item.data(0, Qt.UserRole)
+        # 获取网站ID（分类节点返回None）
+        website_id = self.website_model.website_id(current_index)
         if website_id is None:
             QMessageBox.warning(self, "选择错误", "请选择一个具体的网站，而不是分类")
             return
             
         # 获取网站名称
-        website_name = current_item.text(0)
+        website_name = current_index.sibling(current_index.row(), 0).data()
         
         # 确认删除
         reply = QMessageBox.question(self, "确认删除", 
@@ -692,38 +1214,27 @@ class WebsiteManager(QMainWindow):
                                    QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            # 在所有分类中查找并删除该网站
-            for category in self.data["categories"]:
-                category["websites"] = [w for w in category["websites"] if w["id"] != website_id]
+            # 通过模型删除该网站，只移除这一行
+            change = self.begin_change(("website", website_id))
+            self.website_model.remove_website(website_id)
                 
-            self.save_data()
-            self.update_website_list()
+            self.commit_change("删除网站", change)
             QMessageBox.information(self, "成功", "网站删除成功")
         
     def move_website_up(self):
-        current_item = self.website_tree.currentItem()
-        if not current_item:
+        current_index = self.website_proxy.mapToSource(self.website_tree.currentIndex())
+        if not current_index.isValid():
             QMessageBox.warning(self, "选择错误", "请先选择要移动的网站")
             return
             
-        # 获取网站ID（只有网站项才有UserRole数据）
-        website_id = current_item.data(0, Qt.UserRole)
+        # 获取网站ID（分类节点返回None）
+        website_id = self.website_model.website_id(current_index)
         if website_id is None:
             QMessageBox.warning(self, "选择错误", "请选择一个具体的网站，而不是分类")
             return
             
         # 查找网站所在的分类和位置
-        found_category = None
-        found_website_index = -1
-        
-        for category in self.data["categories"]:
-            for i, website in enumerate(category["websites"]):
-                if website["id"] == website_id:
-                    found_category = category
-                    found_website_index = i
-                    break
-            if found_category:
-                break
+        _, found_category, found_website_index = self.index.find_website(website_id)
                 
         if not found_category or found_website_index == -1:
             QMessageBox.warning(self, "错误", "找不到选中的网站")
@@ -735,46 +1246,28 @@ class WebsiteManager(QMainWindow):
             return
             
         # 交换位置
-        found_category["websites"][found_website_index], found_category["websites"][found_website_index-1] = \
-            found_category["websites"][found_website_index-1], found_category["websites"][found_website_index]
+        # 模型只移动这两行，视图的选中项会跟随被移动的网站
+        websites = found_category["websites"]
+        change = self.begin_change(("website", websites[found_website_index]["id"]),
+                                   ("website", websites[found_website_index-1]["id"]))
+        self.website_model.swap_websites(found_category, found_website_index, found_website_index-1)
             
-        self.save_data()
-        self.update_website_list()
-        
-        # 更新选中项
-        # 需要重新找到该网站项并选中
-        for i in range(self.website_tree.topLevelItemCount()):
-            category_item = self.website_tree.topLevelItem(i)
-            if category_item.data(0, Qt.UserRole) == found_category["id"]:
-                website_item = category_item.child(found_website_index-1)
-                if website_item:
-                    self.website_tree.setCurrentItem(website_item)
-                break
+        self.commit_change("上移网站", change)
                 
     def move_website_down(self):
-        current_item = self.website_tree.currentItem()
-        if not current_item:
+        current_index = self.website_proxy.mapToSource(self.website_tree.currentIndex())
+        if not current_index.isValid():
             QMessageBox.warning(self, "选择错误", "请先选择要移动的网站")
             return
             
-        # 获取网站ID（只有网站项才有UserRole数据）
-        website_id = current_item.data(0, Qt.UserRole)
+        # 获取网站ID（分类节点返回None）
+        website_id = self.website_model.website_id(current_index)
         if website_id is None:
             QMessageBox.warning(self, "选择错误", "请选择一个具体的网站，而不是分类")
             return
             
         # 查找网站所在的分类和位置
-        found_category = None
-        found_website_index = -1
-        
-        for category in self.data["categories"]:
-            for i, website in enumerate(category["websites"]):
-                if website["id"] == website_id:
-                    found_category = category
-                    found_website_index = i
-                    break
-            if found_category:
-                break
+        _, found_category, found_website_index = self.index.find_website(website_id)
                 
         if not found_category or found_website_index == -1:
             QMessageBox.warning(self, "错误", "找不到选中的网站")
@@ -786,150 +1279,151 @@ class WebsiteManager(QMainWindow):
             return
             
         # 交换位置
-        found_category["websites"][found_website_index], found_category["websites"][found_website_index+1] = \
-            found_category["websites"][found_website_index+1], found_category["websites"][found_website_index]
+        # 模型只移动这两行，视图的选中项会跟随被移动的网站
+        websites = found_category["websites"]
+        change = self.begin_change(("website", websites[found_website_index]["id"]),
+                                   ("website", websites[found_website_index+1]["id"]))
+        self.website_model.swap_websites(found_category, found_website_index, found_website_index+1)
             
-        self.save_data()
-        self.update_website_list()
-        
-        # 更新选中项
-        # 需要重新找到该网站项并选中
-        for i in range(self.website_tree.topLevelItemCount()):
-            category_item = self.website_tree.topLevelItem(i)
-            if category_item.data(0, Qt.UserRole) == found_category["id"]:
-                website_item = category_item.child(found_website_index+1)
-                if website_item:
-                    self.website_tree.setCurrentItem(website_item)
-                break
-                
-    def update_website_list(self):
-        # 更新网站列表显示（风琴式分类显示）
-        self.website_tree.clear()
-        
-        # 为每个分类创建一个顶级项
-        for category in self.data["categories"]:
-            category_item = QTreeWidgetItem(self.website_tree, [category["name"]])
-            category_item.setExpanded(True)  # 默认展开分类
-            category_item.setData(0, Qt.UserRole, category["id"])  # 存储分类ID
-            
-            # 为每个网站创建子项
-            for website in category["websites"]:
-                website_item = QTreeWidgetItem(category_item, [
-                    website["name"],
-                    website["url"],
-                    website["description"]
-                ])
-                website_item.setData(0, Qt.UserRole, website["id"])  # 存储网站ID
-        
-        # 展开所有分类
-        self.website_tree.expandAll()
+        self.commit_change("下移网站", change)
                 
-    def upload_to_github(self):
-        # 获取GitHub访问令牌
-        token, ok = QInputDialog.getText(self, "GitHub访问令牌", "请输入您的GitHub个人访问令牌:")
-        if not ok or not token:
+    def import_websites(self):
+        """从书签HTML、CSV或websites_export.txt批量导入网站，整个导入只保存和刷新一次"""
+        path, _ = QFileDialog.getOpenFileName(self, "批量导入网站", "",
+                                              "书签或网站列表 (*.html *.htm *.csv *.txt *.json *.jsonl);;所有文件 (*)")
+        if not path:
             return
             
-        try:
-            # 连接到GitHub
-            g = Github(token)
-            user = g.get_user()
-            
-            # 获取仓库信息
-            repo_name, ok = QInputDialog.getText(self, "仓库信息", "请输入仓库名称 (格式: username/repo_name):")
-            if not ok or not repo_name:
-                return
-                
-            # 获取仓库
-            repo = g.get_repo(repo_name)
-            
-            # 读取data.json文件内容
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                content = f.read()
+        # 书签文件夹和CSV中的分类会自动创建，没有分类信息的网站导入到这里选择的分类
+        categories = [category["name"] for category in self.data["categories"]]
+        default_category, ok = QInputDialog.getItem(self, "批量导入网站", "没有分类信息的网站导入到:",
+                                                    [DEFAULT_CATEGORY] + categories, 0, True)
+        if not ok or not default_category.strip():
+            return
             
-            # 获取文件SHA值（如果文件已存在）
-            sha = None
-            try:
-                contents = repo.get_contents(self.data_file)
-                sha = contents.sha
-            except:
-                pass  # 文件不存在
-            
-            # 上传文件
-            if sha:
-                # 更新现有文件
-                repo.update_file(
-                    path=self.data_file,
-                    message="Update website data",
-                    content=content,
-                    sha=sha
-                )
-            else:
-                # 创建新文件
-                repo.create_file(
-                    path=self.data_file,
-                    message="Add website data",
-                    content=content
-                )
+        # 导入只会新建分类和网站，记录导入前的最大id，之后的都是新记录
+        first_category_id = self.index.next_category_id()
+        first_website_id = self.index.next_website_id()
+        try:
+            stats = import_websites(self.data, self.index, read_records(path), default_category.strip())
+        except Exception as e:
+            # 出错之前已经导入的网站仍然保留
+            stats = None
+            QMessageBox.warning(self, "导入错误", f"导入过程中出错: {str(e)}")
             
-            QMessageBox.information(self, "成功", "数据已成功上传到GitHub仓库")
+        if stats is not None and not stats["added"]:
+            QMessageBox.information(self, "提示", f"没有新的网站，跳过 {stats['duplicates']} 个重复的链接")
+            return
             
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"上传失败: {str(e)}")
-
-    def upload_file_to_github(self):
-        # 获取GitHub访问令牌
-        token, ok = QInputDialog.getText(self, "GitHub访问令牌", "请输入您的GitHub个人访问令牌:")
-        if not ok or not token:
+        change = self.begin_change()
+        change.watch_new("category", range(first_category_id, self.index.next_category_id()))
+        change.watch_new("website", range(first_website_id, self.index.next_website_id()))
+        self.search_index.rebuild(self.data)
+        self.commit_change("批量导入网站", change)
+        self.update_category_list()
+        self.update_website_list()
+        
+        if stats is not None:
+            message = f"已导入 {stats['added']} 个网站，跳过 {stats['duplicates']} 个重复的链接"
+            if stats["new_categories"]:
+                message += f"\n新建分类: {', '.join(stats['new_categories'])}"
+            QMessageBox.information(self, "导入完成", message)
+            
+    def export_websites(self):
+        """导出全部网站，格式由文件扩展名决定"""
+        path, _ = QFileDialog.getSaveFileName(self, "导出网站", "websites_export.txt",
+                                              "网站列表 (*.txt);;CSV 文件 (*.csv);;浏览器书签 (*.html);;"
+                                              "JSON Lines (*.jsonl);;JSON 文件 (*.json)")
+        if not path:
             return
             
         try:
-            # 连接到GitHub
-            g = Github(token)
-            user = g.get_user()
+            count = write_export(self.data, path)
+            QMessageBox.information(self, "成功", f"已导出 {count} 个网站")
+        except Exception as e:
+            QMessageBox.warning(self, "导出错误", f"无法导出网站: {str(e)}")
             
-            # 获取仓库信息
-            repo_name, ok = QInputDialog.getText(self, "仓库信息", "请输入仓库名称 (格式: username/repo_name):")
-            if not ok or not repo_name:
-                return
+    def load_website_tab(self):
+        self.website_tree.setModel(self.website_proxy)
+        self.website_tree.setColumnWidth(0, 150)
+        self.website_tree.setColumnWidth(1, 200)
+        self.filter_websites()
+        
+    def update_website_list(self):
+        # 重新加载全部网站（风琴式分类显示），仅在从磁盘重新读取数据时使用
+        self.website_model.set_source(self.data, self.index)
+        
+        # 重新应用搜索条件，并展开所有分类
+        self.filter_websites()
+        
+    def filter_websites(self):
+        """按搜索框的内容过滤网站树"""
+        self.filter_timer.stop()
+        query = self.website_filter_input.text().strip()
+        if not query:
+            self.website_proxy.set_matches(None)
+        else:
+            matches = self.search_index.search(query)
+            if matches is None:
+                # 只有标点等无法索引的内容时逐条匹配名称和描述
+                matches = scan_websites(self.data, query)
+            # 匹配的网站可能还没有懒加载到视图中
+            self.website_model.load_websites(matches)
+            self.website_proxy.set_matches(matches)
+        self.website_tree.expandAll()
+        
+    def on_website_model_changed(self, *args):
+        if self.website_filter_input.text().strip():
+            self.filter_timer.start()
                 
-            # 获取仓库
-            repo = g.get_repo(repo_name)
-            
-            # 读取file.json文件内容
-            with open(self.file_data_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # 获取文件SHA值（如果文件已存在）
-            sha = None
-            try:
-                contents = repo.get_contents(self.file_data_file)
-                sha = contents.sha
-            except:
-                pass  # 文件不存在
-            
-            # 上传文件
-            if sha:
-                # 更新现有文件
-                repo.update_file(
-                    path=self.file_data_file,
-                    message="Update file data",
-                    content=content,
-                    sha=sha
-                )
-            else:
-                # 创建新文件
-                repo.create_file(
-                    path=self.file_data_file,
-                    message="Add file data",
-                    content=content
-                )
+    def publish_to_github(self):
+        """把网站、文件、通知三个数据文件、搜索索引及其发布版本作为一次提交发布到GitHub，内容未变的文件自动跳过"""
+        # 获取GitHub访问令牌
+        token, ok = QInputDialog.getText(self, "GitHub访问令牌", "请输入您的GitHub个人访问令牌:",
+                                         QLineEdit.Password)
+        if not ok or not token:
+            return
             
-            QMessageBox.information(self, "成功", "文件数据已成功上传到GitHub仓库")
+        # 获取仓库信息
+        repo_name, ok = QInputDialog.getText(self, "仓库信息", "请输入仓库名称 (格式: username/repo_name):",
+                                             QLineEdit.Normal, getattr(self, 'github_repo_name', ''))
+        if not ok or not repo_name:
+            return
+        self.github_repo_name = repo_name
+        
+        # 先写入尚未保存的修改并生成JSON文件，发布的内容与存储中的数据一致
+        if not self.generate_static_files():
+            return
             
+        try:
+            from favicon_cache import SPRITE_PREFIX, sprite_paths
+            from github_publish import publish_files
+            from notification_feed import FEED_DIR, feed_paths
+            from publish_artifacts import ARTIFACT_DIR, artifact_paths, build_artifacts
+            paths = [path for path, _ in self.store_files().values()]
+            if os.path.exists(self.search_index_file):
+                paths.append(self.search_index_file)
+            # 同时发布通知分页、dist/ 中压缩、带内容哈希的版本和图标雪碧图，远端不再使用的旧文件一并删除
+            build_artifacts(paths)
+            files = {}
+            for path in paths + feed_paths(self.notification_file) + artifact_paths() + sprite_paths():
+                with open(path, 'rb') as f:
+                    files[os.path.relpath(path).replace(os.sep, '/')] = f.read()
+                    
+            result = publish_files(token, repo_name, files,
+                                   prune=(ARTIFACT_DIR + "/", FEED_DIR + "/", SPRITE_PREFIX))
         except Exception as e:
             QMessageBox.critical(self, "错误", f"上传失败: {str(e)}")
-
+            return
+            
+        if result["commit"] is None:
+            QMessageBox.information(self, "提示", "远端数据已是最新，无需上传")
+        else:
+            deleted = f"\n已删除: {', '.join(result['deleted'])}" if result["deleted"] else ""
+            QMessageBox.information(self, "成功",
+                                    f"已上传: {', '.join(result['changed'])}{deleted}\n"
+                                    f"提交: {result['commit'][:7]}")
+            
     def setup_file_tab(self):
         layout = QVBoxLayout()
         
@@ -941,6 +1435,7 @@ class WebsiteManager(QMainWindow):
         form_layout.addRow("文件名:", self.file_name_input)
         
         self.file_size_input = QLineEdit()
+        self.file_size_input.setPlaceholderText("例如 258 KB，留空时根据下载链接自动获取")
         form_layout.addRow("文件大小:", self.file_size_input)
         
         self.file_preview_url_input = QLineEdit()
@@ -960,11 +1455,26 @@ class WebsiteManager(QMainWindow):
         list_group = QGroupBox("现有文件")
         list_layout = QVBoxLayout()
         
-        self.file_table = QTableWidget()
-        self.file_table.setColumnCount(7)
-        self.file_table.setHorizontalHeaderLabels(["文件名", "大小", "时间", "预览链接", "下载链接", "编辑", "删除"])
+        # 使用QTableView + 模型，操作按钮由委托直接绘制，不再为每行创建按钮控件
+        # 模型按文件顺序保存文件，排序代理按大小（字节数）或时间排序
+        self.file_model = FileTableModel(self.link_status, self)
+        self.file_proxy = QSortFilterProxyModel(self)
+        self.file_proxy.setSourceModel(self.file_model)
+        self.file_proxy.setSortRole(FileTableModel.SORT_ROLE)
+        self.file_proxy.setDynamicSortFilter(True)
+        self.file_table = QTableView()
+        self.tab_loaders[self.file_tab] = self.load_file_tab
         self.file_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.file_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.file_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.file_table.setSelectionBehavior(QTableView.SelectRows)
+        self.file_table.setSelectionMode(QTableView.SingleSelection)
+        self.file_button_delegate = ButtonDelegate(self.file_model.buttons, {
+            "edit": ("#ffc107", "black"),
+            "delete": ("#dc3545", "white"),
+        }, self.file_table)
+        self.file_button_delegate.clicked.connect(self.on_file_button_clicked)
+        for column in FileTableModel.BUTTON_COLUMNS:
+            self.file_table.setItemDelegateForColumn(column, self.file_button_delegate)
         list_layout.addWidget(self.file_table)
         
         # 按钮布局
@@ -972,12 +1482,12 @@ class WebsiteManager(QMainWindow):
         
         # 编辑文件按钮
         edit_file_btn = QPushButton("编辑选中文件")
-        edit_file_btn.clicked.connect(self.edit_file)
+        edit_file_btn.clicked.connect(lambda: self.edit_file())
         button_layout.addWidget(edit_file_btn)
         
         # 删除文件按钮
         delete_file_btn = QPushButton("删除选中文件")
-        delete_file_btn.clicked.connect(self.delete_file)
+        delete_file_btn.clicked.connect(lambda: self.delete_file())
         button_layout.addWidget(delete_file_btn)
         
         # 刷新按钮
@@ -985,9 +1495,24 @@ class WebsiteManager(QMainWindow):
         refresh_file_btn.clicked.connect(self.refresh_files)
         button_layout.addWidget(refresh_file_btn)
         
-        # 上传到GitHub按钮
+        # 重新获取所有文件的大小
+        probe_sizes_btn = QPushButton("获取文件大小")
+        probe_sizes_btn.clicked.connect(lambda: self.probe_file_sizes())
+        button_layout.addWidget(probe_sizes_btn)
+        
+        # 链接检查按钮
+        check_file_links_btn = QPushButton("检查链接")
+        check_file_links_btn.clicked.connect(self.check_all_links)
+        button_layout.addWidget(check_file_links_btn)
+        
+        # 已过期、即将过期或检查失败，需要在网盘中重新生成下载链接的文件
+        refresh_queue_btn = QPushButton("待更新链接")
+        refresh_queue_btn.clicked.connect(self.show_refresh_queue)
+        button_layout.addWidget(refresh_queue_btn)
+        
+        # 发布到GitHub按钮（一次提交包含所有有变化的数据文件）
         upload_file_github_btn = QPushButton("上传到GitHub")
-        upload_file_github_btn.clicked.connect(self.upload_file_to_github)
+        upload_file_github_btn.clicked.connect(self.publish_to_github)
         button_layout.addWidget(upload_file_github_btn)
         
         list_layout.addLayout(button_layout)
@@ -1028,11 +1553,26 @@ class WebsiteManager(QMainWindow):
         list_group = QGroupBox("现有通知")
         list_layout = QVBoxLayout()
         
-        self.notification_table = QTableWidget()
-        self.notification_table.setColumnCount(6)
-        self.notification_table.setHorizontalHeaderLabels(["标题", "内容", "时间", "附件", "链接", "操作"])
+        # 模型按文件顺序保存通知，排序代理负责置顶优先和按时间排序
+        self.notification_model = NotificationTableModel(self.link_status, self)
+        self.notification_proxy = NotificationSortProxy(self)
+        self.notification_proxy.setSourceModel(self.notification_model)
+        self.notification_proxy.setDynamicSortFilter(True)
+        self.notification_table = QTableView()
+        self.tab_loaders[self.notification_tab] = self.load_notification_tab
         self.notification_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.notification_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.notification_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.notification_table.setSelectionBehavior(QTableView.SelectRows)
+        self.notification_table.setSelectionMode(QTableView.SingleSelection)
+        # 置顶/编辑/删除按钮由委托绘制
+        self.notification_button_delegate = ButtonDelegate(NotificationTableModel.buttons, {
+            "pin": ("#007bff", "white"),
+            "edit": ("#ffc107", "black"),
+            "delete": ("#dc3545", "white"),
+        }, self.notification_table)
+        self.notification_button_delegate.clicked.connect(self.on_notification_button_clicked)
+        self.notification_table.setItemDelegateForColumn(NotificationTableModel.ACTION_COLUMN,
+                                                         self.notification_button_delegate)
         list_layout.addWidget(self.notification_table)
         
         # 按钮布局
@@ -1053,6 +1593,16 @@ class WebsiteManager(QMainWindow):
         refresh_notification_btn.clicked.connect(self.refresh_notifications)
         button_layout.addWidget(refresh_notification_btn)
         
+        # 链接检查按钮
+        check_notification_links_btn = QPushButton("检查链接")
+        check_notification_links_btn.clicked.connect(self.check_all_links)
+        button_layout.addWidget(check_notification_links_btn)
+        
+        # 发布到GitHub按钮
+        upload_notification_github_btn = QPushButton("上传到GitHub")
+        upload_notification_github_btn.clicked.connect(self.publish_to_github)
+        button_layout.addWidget(upload_notification_github_btn)
+        
         list_layout.addLayout(button_layout)
         
         list_group.setLayout(list_layout)
@@ -1060,14 +1610,62 @@ class WebsiteManager(QMainWindow):
         
         self.notification_tab.setLayout(layout)
         
+    def setup_timetable_tab(self):
+        layout = QVBoxLayout()
+        
+        # 选择课表和周次
+        control_layout = QHBoxLayout()
+        control_layout.addWidget(QLabel("课表:"))
+        self.timetable_user_combo = QComboBox()
+        self.timetable_user_combo.currentIndexChanged.connect(self.update_timetable_view)
+        control_layout.addWidget(self.timetable_user_combo)
+        
+        control_layout.addWidget(QLabel("周次:"))
+        self.timetable_week_spin = QSpinBox()
+        self.timetable_week_spin.setRange(1, MAX_WEEK)
+        self.timetable_week_spin.setPrefix("第")
+        self.timetable_week_spin.setSuffix("周")
+        self.timetable_week_spin.setValue(current_week())
+        self.timetable_week_spin.valueChanged.connect(self.update_timetable_view)
+        control_layout.addWidget(self.timetable_week_spin)
+        control_layout.addStretch()
+        
+        # 重新编译按钮（只重新解析有变化的课表文件）
+        compile_timetable_btn = QPushButton("重新编译")
+        compile_timetable_btn.clicked.connect(self.compile_timetable)
+        control_layout.addWidget(compile_timetable_btn)
+        layout.addLayout(control_layout)
+        
+        # 节次 x 星期的课表，数据来自 timetable/timetable.json
+        self.timetable_table = QTableWidget(PERIOD_COUNT, len(DAY_NAMES))
+        self.timetable_table.setHorizontalHeaderLabels(DAY_NAMES)
+        self.timetable_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.timetable_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.timetable_table)
+        
+        self.timetable_status_label = QLabel()
+        layout.addWidget(self.timetable_status_label)
+        
+        # 编译好的课表，标签页第一次显示时才编译/读取
+        self.timetable = None
+        self.tab_loaders[self.timetable_tab] = self.compile_timetable
+        
+        self.timetable_tab.setLayout(layout)
+        
     def add_file(self):
         name = self.file_name_input.text().strip()
-        size = self.file_size_input.text().strip()
+        size_text = self.file_size_input.text().strip()
         preview_url = self.file_preview_url_input.text().strip()
         download_url = self.file_download_url_input.text().strip()
         
-        if not name or not size or not preview_url or not download_url:
-            QMessageBox.warning(self, "输入错误", "请填写所有字段")
+        if not name or not preview_url or not download_url:
+            QMessageBox.warning(self, "输入错误", "请填写文件名、预览链接和下载链接")
+            return
+            
+        # 大小保存为字节数，留空时添加后自动获取
+        size = parse_size(size_text) if size_text else None
+        if size_text and size is None:
+            QMessageBox.warning(self, "输入错误", "无法识别文件大小，请填写如 258 KB、2.4 MB，或者留空自动获取")
             return
             
         # 获取当前时间
@@ -1075,7 +1673,7 @@ class WebsiteManager(QMainWindow):
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M")
         
         # 生成新的文件ID
-        new_id = max([f["id"] for f in self.file_data["files"]], default=0) + 1
+        new_id = self.index.next_file_id()
         
         # 添加新文件，包含时间字段
         new_file = {
@@ -1087,9 +1685,11 @@ class WebsiteManager(QMainWindow):
             "time": current_time
         }
         
-        self.file_data["files"].append(new_file)
-        self.save_data()
-        self.update_file_list()
+        change = self.begin_change(("file", new_id))
+        self.file_model.add_file(new_file)
+        self.commit_change("添加文件", change)
+        if size is None:
+            self.probe_file_sizes([new_id])
         
         # 清空输入框
         self.file_name_input.clear()
@@ -1107,15 +1707,10 @@ class WebsiteManager(QMainWindow):
                 QMessageBox.warning(self, "选择错误", "请先选择要编辑的文件")
                 return
                 
-            row = selected_rows[0].row()
-            file_id = int(self.file_table.item(row, 0).data(Qt.UserRole))
+            file_id = selected_rows[0].data(Qt.UserRole)
         
         # 查找文件信息
-        file = None
-        for f in self.file_data["files"]:
-            if f["id"] == file_id:
-                file = f
-                break
+        file = self.index.find_file(file_id)
                 
         if not file:
             QMessageBox.warning(self, "错误", "找不到选中的文件")
@@ -1123,7 +1718,7 @@ class WebsiteManager(QMainWindow):
             
         # 填充表单数据
         self.file_name_input.setText(file["name"])
-        self.file_size_input.setText(file["size"])
+        self.file_size_input.setText(format_size(file.get("size")))
         self.file_preview_url_input.setText(file["previewUrl"])
         self.file_download_url_input.setText(file["downloadUrl"])
         
@@ -1150,13 +1745,18 @@ class WebsiteManager(QMainWindow):
         
         # 获取表单数据
         name = self.file_name_input.text().strip()
-        size = self.file_size_input.text().strip()
+        size_text = self.file_size_input.text().strip()
         preview_url = self.file_preview_url_input.text().strip()
         download_url = self.file_download_url_input.text().strip()
         
         # 验证数据
-        if not name or not size or not preview_url or not download_url:
-            QMessageBox.warning(self, "输入错误", "请填写所有字段")
+        if not name or not preview_url or not download_url:
+            QMessageBox.warning(self, "输入错误", "请填写文件名、预览链接和下载链接")
+            return
+            
+        size = parse_size(size_text) if size_text else None
+        if size_text and size is None:
+            QMessageBox.warning(self, "输入错误", "无法识别文件大小，请填写如 258 KB、2.4 MB，或者留空自动获取")
             return
             
         # 获取当前时间
@@ -1164,24 +1764,29 @@ class WebsiteManager(QMainWindow):
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M")
             
         # 查找并更新文件信息
-        for file_info in self.file_data["files"]:
-            if file_info["id"] == file_id:
-                file_info["name"] = name
-                file_info["size"] = size
-                file_info["previewUrl"] = preview_url
-                file_info["downloadUrl"] = download_url
-                # 更新时间信息
-                file_info["time"] = current_time
-                break
-        else:
+        file_info = self.index.find_file(file_id)
+        if not file_info:
             QMessageBox.warning(self, "错误", "未找到指定的文件")
             return
+            
+        # 显示的大小文字没有改动时保留原来精确的字节数（旧的文字格式换成字节数）
+        if size_text == format_size(file_info.get("size")):
+            size = size_bytes(file_info.get("size"))
+        change = self.begin_change(("file", file_id))
+        file_info["name"] = name
+        file_info["size"] = size
+        file_info["previewUrl"] = preview_url
+        file_info["downloadUrl"] = download_url
+        # 更新时间信息
+        file_info["time"] = current_time
         
         # 保存数据
-        self.save_data()
+        self.commit_change("修改文件", change)
         
-        # 更新显示
-        self.update_file_list()
+        # 更新显示，只刷新这一行
+        self.file_model.file_changed(file_id)
+        if size is None:
+            self.probe_file_sizes([file_id])
         
         # 恢复添加按钮
         self.restore_add_file_button()
@@ -1219,15 +1824,11 @@ class WebsiteManager(QMainWindow):
                 QMessageBox.warning(self, "选择错误", "请先选择要删除的文件")
                 return
                 
-            row = selected_rows[0].row()
-            file_id = int(self.file_table.item(row, 0).data(Qt.UserRole))
+            file_id = selected_rows[0].data(Qt.UserRole)
         
         # 查找文件名
-        file_name = ""
-        for f in self.file_data["files"]:
-            if f["id"] == file_id:
-                file_name = f["name"]
-                break
+        file = self.index.find_file(file_id)
+        file_name = file["name"] if file else ""
         
         # 确认删除
         reply = QMessageBox.question(self, "确认删除", 
@@ -1236,65 +1837,98 @@ class WebsiteManager(QMainWindow):
         
         if reply == QMessageBox.Yes:
             # 删除文件
-            self.file_data["files"] = [f for f in self.file_data["files"] if f["id"] != file_id]
+            change = self.begin_change(("file", file_id))
+            self.file_model.remove_file(file_id)
                 
-            self.save_data()
-            self.update_file_list()
+            self.commit_change("删除文件", change)
             QMessageBox.information(self, "成功", "文件删除成功")
         
+    def load_file_tab(self):
+        # 连接视图后才开始排序，默认按时间从新到旧
+        self.file_table.setModel(self.file_proxy)
+        self.file_table.setSortingEnabled(True)
+        self.file_table.sortByColumn(FileTableModel.TIME_COLUMN, Qt.DescendingOrder)
+        
     def update_file_list(self):
-        # 清空表格
-        self.file_table.setRowCount(0)
-        
-        # 从文件数据中加载文件信息
-        files = self.file_data.get("files", [])
-        for file_info in files:
-            row_position = self.file_table.rowCount()
-            self.file_table.insertRow(row_position)
-            
-            # 添加文件信息
-            self.file_table.setItem(row_position, 0, QTableWidgetItem(file_info["name"]))
-            self.file_table.setItem(row_position, 1, QTableWidgetItem(file_info["size"]))
-            # 添加时间信息
-            time_str = file_info.get("time", "")
-            self.file_table.setItem(row_position, 2, QTableWidgetItem(time_str))
-            
-            # 预览按钮
-            preview_btn = QPushButton("预览")
-            preview_btn.clicked.connect(lambda checked, url=file_info["previewUrl"]: self.open_url(url))
-            self.file_table.setCellWidget(row_position, 3, preview_btn)
-            
-            # 下载按钮
-            download_btn = QPushButton("下载")
-            download_btn.clicked.connect(lambda checked, url=file_info["downloadUrl"]: self.download_file(url))
-            self.file_table.setCellWidget(row_position, 4, download_btn)
-            
-            # 编辑按钮
-            edit_btn = QPushButton("编辑")
-            edit_btn.setStyleSheet("background-color: #ffc107; color: black;")
-            edit_btn.clicked.connect(lambda checked, fid=file_info["id"]: self.edit_file(file_id=fid))
-            self.file_table.setCellWidget(row_position, 5, edit_btn)
+        # 重新加载全部文件，仅在从磁盘重新读取数据时使用
+        self.file_model.set_source(self.file_data, self.index)
+        
+    def on_file_button_clicked(self, index, key):
+        """处理文件表格中委托绘制的按钮点击，index 为排序代理的索引"""
+        file_info = self.index.find_file(index.data(Qt.UserRole))
+        if file_info is None:
+            return
+        if key == "preview":
+            # 顺便预加载表格中上下相邻文件的预览页面
+            rows = [row for row in (index.row() + 1, index.row() - 1)
+                    if 0 <= row < self.file_proxy.rowCount()]
+            neighbours = [self.index.find_file(self.file_proxy.index(row, 0).data(Qt.UserRole))
+                          for row in rows]
+            self.open_url(file_info["previewUrl"], [f["previewUrl"] for f in neighbours if f])
+        elif key == "download":
+            self.download_file(file_info["downloadUrl"], file_info)
+        elif key == "edit":
+            self.edit_file(file_id=file_info["id"])
+        elif key == "delete":
+            self.delete_file(file_id=file_info["id"])
+            
+    def probe_file_sizes(self, file_ids=None):
+        """在后台获取文件的大小（默认所有文件），完成后写入 file.json"""
+        if file_ids is None:
+            files = self.file_data["files"]
+        else:
+            files = [f for f in (self.index.find_file(file_id) for file_id in file_ids) if f]
+        urls = [f["downloadUrl"] for f in files if f.get("downloadUrl")]
+        if not urls:
+            if file_ids is None:
+                QMessageBox.information(self, "提示", "没有需要获取大小的文件")
+            return
             
-            # 删除按钮
-            delete_btn = QPushButton("删除")
-            delete_btn.setStyleSheet("background-color: #dc3545; color: white;")
-            delete_btn.clicked.connect(lambda checked, fid=file_info["id"]: self.delete_file(file_id=fid))
-            self.file_table.setCellWidget(row_position, 6, delete_btn)
+        task = SizeProbeTask(urls)
+        task.signals.progress.connect(
+            lambda done, total: self.statusBar().showMessage(f"正在获取文件大小 {done}/{total}"))
+        task.signals.finished.connect(lambda results: self.on_size_probe_finished(task, results))
+        task.signals.failed.connect(lambda message: self.on_size_probe_failed(task, message))
+        self.size_probe_tasks.add(task)
+        self.statusBar().showMessage("正在获取文件大小...")
+        self.fetch_pool.start(task)
+        
+    def on_size_probe_finished(self, task, results):
+        self.size_probe_tasks.discard(task)
+        # 获取期间文件可能被删除或改了下载链接，只更新链接仍然一致的文件，所有修改作为一次操作
+        files = [f for f in self.file_data["files"] if results.get(f.get("downloadUrl")) is not None]
+        change = self.begin_change(*(("file", f["id"]) for f in files))
+        changed = apply_sizes(files, results)
+        self.commit_change("获取文件大小", change)
+        for file_id in changed:
+            self.file_model.file_changed(file_id)
+            
+        failed = sum(1 for size in results.values() if size is None)
+        self.statusBar().showMessage(f"文件大小获取完成: 更新 {len(changed)} 个，失败 {failed} 个", 10000)
+        
+    def on_size_probe_failed(self, task, message):
+        self.size_probe_tasks.discard(task)
+        self.statusBar().clearMessage()
+        QMessageBox.warning(self, "获取错误", f"获取文件大小时出错: {message}")
             
     def refresh_categories(self):
         """刷新分类信息"""
+        self.flush_data()
         self.load_data()
         self.update_category_list()
+        self.update_website_list()
         QMessageBox.information(self, "刷新成功", "分类信息已刷新")
         
     def refresh_websites(self):
         """刷新网站信息"""
+        self.flush_data()
         self.load_data()
         self.update_website_list()
         QMessageBox.information(self, "刷新成功", "网站信息已刷新")
         
     def refresh_files(self):
         """刷新文件信息"""
+        self.flush_data()
         self.load_file_data()
         self.update_file_list()
         QMessageBox.information(self, "刷新成功", "文件信息已刷新")
@@ -1314,7 +1948,7 @@ class WebsiteManager(QMainWindow):
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M")
         
         # 生成新的通知ID
-        new_id = max([n["id"] for n in self.notification_data["notifications"]], default=0) + 1
+        new_id = self.index.next_notification_id()
         
         # 添加新通知，默认不置顶
         new_notification = {
@@ -1327,9 +1961,9 @@ class WebsiteManager(QMainWindow):
             "pinned": False  # 默认不置顶
         }
         
-        self.notification_data["notifications"].append(new_notification)
-        self.save_data()
-        self.update_notification_list()
+        change = self.begin_change(("notification", new_id))
+        self.notification_model.add_notification(new_notification)
+        self.commit_change("添加通知", change)
         
         # 清空输入框
         self.notification_title_input.clear()
@@ -1345,15 +1979,10 @@ class WebsiteManager(QMainWindow):
             QMessageBox.warning(self, "选择错误", "请先选择要编辑的通知")
             return
             
-        row = selected_rows[0].row()
-        notification_id = int(self.notification_table.item(row, 0).data(Qt.UserRole))
+        notification_id = selected_rows[0].data(Qt.UserRole)
         
         # 查找通知信息
-        notification = None
-        for n in self.notification_data["notifications"]:
-            if n["id"] == notification_id:
-                notification = n
-                break
+        notification = self.index.find_notification(notification_id)
                 
         if not notification:
             QMessageBox.warning(self, "错误", "找不到选中的通知")
@@ -1402,27 +2031,27 @@ class WebsiteManager(QMainWindow):
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M")
             
         # 查找并更新通知信息
-        for notification in self.notification_data["notifications"]:
-            if notification["id"] == notification_id:
-                # 保存原始的置顶状态
-                pinned = notification.get("pinned", False)
-                
-                notification["title"] = title
-                notification["content"] = content
-                notification["time"] = current_time
-                notification["attachment"] = attachment
-                notification["link"] = link
-                notification["pinned"] = pinned  # 保持置顶状态
-                break
-        else:
+        notification = self.index.find_notification(notification_id)
+        if not notification:
             QMessageBox.warning(self, "错误", "未找到指定的通知")
             return
+            
+        change = self.begin_change(("notification", notification_id))
+        # 保存原始的置顶状态
+        pinned = notification.get("pinned", False)
+        
+        notification["title"] = title
+        notification["content"] = content
+        notification["time"] = current_time
+        notification["attachment"] = attachment
+        notification["link"] = link
+        notification["pinned"] = pinned  # 保持置顶状态
         
         # 保存数据
-        self.save_data()
+        self.commit_change("修改通知", change)
         
-        # 更新显示
-        self.update_notification_list()
+        # 更新显示，只刷新这一行
+        self.notification_model.notification_changed(notification_id)
         
         # 恢复添加按钮
         self.restore_add_notification_button()
@@ -1458,15 +2087,11 @@ class WebsiteManager(QMainWindow):
             QMessageBox.warning(self, "选择错误", "请先选择要删除的通知")
             return
             
-        row = selected_rows[0].row()
-        notification_id = int(self.notification_table.item(row, 0).data(Qt.UserRole))
+        notification_id = selected_rows[0].data(Qt.UserRole)
         
         # 查找通知标题
-        notification_title = ""
-        for n in self.notification_data["notifications"]:
-            if n["id"] == notification_id:
-                notification_title = n["title"]
-                break
+        notification = self.index.find_notification(notification_id)
+        notification_title = notification["title"] if notification else ""
         
         # 确认删除
         reply = QMessageBox.question(self, "确认删除", 
@@ -1475,95 +2100,36 @@ class WebsiteManager(QMainWindow):
         
         if reply == QMessageBox.Yes:
             # 删除通知
-            self.notification_data["notifications"] = [n for n in self.notification_data["notifications"] if n["id"] != notification_id]
+            change = self.begin_change(("notification", notification_id))
+            self.notification_model.remove_notification(notification_id)
                 
-            self.save_data()
-            self.update_notification_list()
+            self.commit_change("删除通知", change)
             QMessageBox.information(self, "成功", "通知删除成功")
             
+    def load_notification_tab(self):
+        # 连接视图后才开始排序
+        self.notification_table.setModel(self.notification_proxy)
+        self.notification_table.setSortingEnabled(True)
+        self.notification_table.sortByColumn(NotificationTableModel.TIME_COLUMN, Qt.DescendingOrder)
+        
     def update_notification_list(self):
-        # 清空表格
-        self.notification_table.setRowCount(0)
-        
-        # 从通知数据中加载通知信息
-        notifications = self.notification_data.get("notifications", [])
-        
-        # 按置顶状态排序，置顶的通知显示在前面
-        pinned_notifications = [n for n in notifications if n.get("pinned", False)]
-        unpinned_notifications = [n for n in notifications if not n.get("pinned", False)]
-        sorted_notifications = pinned_notifications + unpinned_notifications
-        
-        for notification in sorted_notifications:
-            row_position = self.notification_table.rowCount()
-            self.notification_table.insertRow(row_position)
-            
-            # 添加通知信息，置顶的通知在标题前添加标记
-            title_text = notification["title"]
-            if notification.get("pinned", False):
-                title_text = "📌 " + title_text  # 添加置顶标记
-            
-            title_item = QTableWidgetItem(title_text)
-            title_item.setData(Qt.UserRole, notification["id"])  # 存储ID用于操作
-            self.notification_table.setItem(row_position, 0, title_item)
-            
-            content_item = QTableWidgetItem(notification["content"])
-            content_item.setData(Qt.UserRole, notification["id"])
-            self.notification_table.setItem(row_position, 1, content_item)
-            
-            # 添加时间信息
-            time_str = notification.get("time", "")
-            time_item = QTableWidgetItem(time_str)
-            time_item.setData(Qt.UserRole, notification["id"])
-            self.notification_table.setItem(row_position, 2, time_item)
-            
-            # 添加附件信息
-            attachment_item = QTableWidgetItem(notification.get("attachment", ""))
-            attachment_item.setData(Qt.UserRole, notification["id"])
-            self.notification_table.setItem(row_position, 3, attachment_item)
-            
-            # 添加链接信息
-            link_item = QTableWidgetItem(notification.get("link", ""))
-            link_item.setData(Qt.UserRole, notification["id"])
-            self.notification_table.setItem(row_position, 4, link_item)
-            
-            # 操作按钮布局
-            button_layout = QHBoxLayout()
-            button_layout.setContentsMargins(0, 0, 0, 0)
-            button_layout.setSpacing(2)
-            
-            # 置顶/取消置顶按钮
-            pinned = notification.get("pinned", False)
-            pin_btn_text = "取消置顶" if pinned else "置顶"
-            pin_btn = QPushButton(pin_btn_text)
-            pin_btn.setStyleSheet("background-color: #007bff; color: white; padding: 2px;")
-            pin_btn.clicked.connect(lambda checked, nid=notification["id"]: self.toggle_notification_pin(nid))
-            button_layout.addWidget(pin_btn)
-            
-            # 编辑按钮
-            edit_btn = QPushButton("编辑")
-            edit_btn.setStyleSheet("background-color: #ffc107; color: black; padding: 2px;")
-            edit_btn.clicked.connect(lambda checked, nid=notification["id"]: self.edit_notification_by_id(nid))
-            button_layout.addWidget(edit_btn)
-            
-            # 删除按钮
-            delete_btn = QPushButton("删除")
-            delete_btn.setStyleSheet("background-color: #dc3545; color: white; padding: 2px;")
-            delete_btn.clicked.connect(lambda checked, nid=notification["id"]: self.delete_notification_by_id(nid))
-            button_layout.addWidget(delete_btn)
-            
-            # 创建一个widget来包含按钮布局
-            button_widget = QWidget()
-            button_widget.setLayout(button_layout)
-            self.notification_table.setCellWidget(row_position, 5, button_widget)
+        # 重新加载全部通知，仅在从磁盘重新读取数据时使用；排序由代理模型完成
+        self.notification_model.set_source(self.notification_data, self.index)
+        
+    def on_notification_button_clicked(self, index, key):
+        """处理通知表格中委托绘制的按钮点击"""
+        notification_id = index.data(Qt.UserRole)
+        if key == "pin":
+            self.toggle_notification_pin(notification_id)
+        elif key == "edit":
+            self.edit_notification_by_id(notification_id)
+        elif key == "delete":
+            self.delete_notification_by_id(notification_id)
             
     def edit_notification_by_id(self, notification_id):
         """通过ID编辑通知"""
         # 查找通知信息
-        notification = None
-        for n in self.notification_data["notifications"]:
-            if n["id"] == notification_id:
-                notification = n
-                break
+        notification = self.index.find_notification(notification_id)
                 
         if not notification:
             QMessageBox.warning(self, "错误", "找不到选中的通知")
@@ -1594,11 +2160,8 @@ class WebsiteManager(QMainWindow):
     def delete_notification_by_id(self, notification_id):
         """通过ID删除通知"""
         # 查找通知标题
-        notification_title = ""
-        for n in self.notification_data["notifications"]:
-            if n["id"] == notification_id:
-                notification_title = n["title"]
-                break
+        notification = self.index.find_notification(notification_id)
+        notification_title = notification["title"] if notification else ""
         
         # 确认删除
         reply = QMessageBox.question(self, "确认删除", 
@@ -1607,14 +2170,15 @@ class WebsiteManager(QMainWindow):
         
         if reply == QMessageBox.Yes:
             # 删除通知
-            self.notification_data["notifications"] = [n for n in self.notification_data["notifications"] if n["id"] != notification_id]
+            change = self.begin_change(("notification", notification_id))
+            self.notification_model.remove_notification(notification_id)
                 
-            self.save_data()
-            self.update_notification_list()
+            self.commit_change("删除通知", change)
             QMessageBox.information(self, "成功", "通知删除成功")
             
     def refresh_notifications(self):
         """刷新通知信息"""
+        self.flush_data()
         self.load_notification_data()
         self.update_notification_list()
         QMessageBox.information(self, "刷新成功", "通知信息已刷新")
@@ -1622,73 +2186,224 @@ class WebsiteManager(QMainWindow):
     def toggle_notification_pin(self, notification_id):
         """切换通知的置顶状态"""
         # 查找通知
-        notification = None
-        for n in self.notification_data["notifications"]:
-            if n["id"] == notification_id:
-                notification = n
-                break
+        notification = self.index.find_notification(notification_id)
                 
         if not notification:
             QMessageBox.warning(self, "错误", "找不到指定的通知")
             return
             
         # 切换置顶状态
+        change = self.begin_change(("notification", notification_id))
         notification["pinned"] = not notification.get("pinned", False)
         
         # 保存数据
-        self.save_data()
+        self.commit_change("置顶通知" if notification["pinned"] else "取消置顶通知", change)
         
-        # 更新显示
-        self.update_notification_list()
+        # 更新显示，代理模型只重新排序这一行
+        self.notification_model.notification_changed(notification_id)
         
-        # 显示成功消息
+        # 在状态栏显示结果，不打断连续操作
         status = "已置顶" if notification["pinned"] else "已取消置顶"
-        QMessageBox.information(self, "成功", f"通知{status}")
-        
-    def open_url(self, url):
-        # 创建模态对话框
-        dialog = QDialog(self)
-        dialog.setWindowTitle("预览")
-        dialog.setGeometry(100, 100, 1000, 700)
-        
-        # 创建布局
-        layout = QVBoxLayout()
-        
-        # 创建WebView组件
-        web_view = QWebEngineView()
-        from PyQt5.QtCore import QUrl
-        web_view.load(QUrl(url))  # 加载URL
+        self.statusBar().showMessage(f"通知{status}", 3000)
         
-        # 添加WebView到布局
-        layout.addWidget(web_view)
-        
-        # 创建关闭按钮
-        close_btn = QPushButton("关闭")
-        close_btn.clicked.connect(dialog.close)
-        
-        # 添加按钮到布局
-        button_layout = QHBoxLayout()
-        button_layout.addStretch()
-        button_layout.addWidget(close_btn)
-        layout.addLayout(button_layout)
+    def compile_timetable(self):
+        try:
+            self.timetable, stats = compile_timetables()
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "错误", f"编译课表失败: {str(e)}")
+            return
         
-        # 设置对话框布局
-        dialog.setLayout(layout)
+        # 节次的行标题带上作息时间
+        periods = self.timetable["periods"]
+        self.timetable_table.setVerticalHeaderLabels([
+            f"{n + 1}\n{periods[n]['start']}-{periods[n]['end']}" if n < len(periods) else str(n + 1)
+            for n in range(PERIOD_COUNT)
+        ])
+        
+        current = self.timetable_user_combo.currentData()
+        self.timetable_user_combo.blockSignals(True)
+        self.timetable_user_combo.clear()
+        for key, entry in self.timetable["users"].items():
+            self.timetable_user_combo.addItem(f"{entry['source']} ({key})", key)
+        index = self.timetable_user_combo.findData(current)
+        self.timetable_user_combo.setCurrentIndex(max(index, 0))
+        self.timetable_user_combo.blockSignals(False)
+        self.update_timetable_view()
+        
+        if stats["compiled"] or stats["removed"]:
+            self.timetable_status_label.setText(
+                f"已重新编译: {', '.join(stats['compiled']) or '无'}，"
+                f"未变化: {', '.join(stats['unchanged']) or '无'}")
+        else:
+            self.timetable_status_label.setText("课表文件没有变化，使用已编译的结果")
         
-        # 显示模态对话框
-        dialog.exec_()
+    def update_timetable_view(self):
+        self.timetable_table.clearContents()
+        key = self.timetable_user_combo.currentData()
+        if self.timetable is None or key not in self.timetable["users"]:
+            return
+        entry = self.timetable["users"][key]
+        week = self.timetable_week_spin.value()
+        for day in range(len(DAY_NAMES)):
+            for period in range(1, PERIOD_COUNT + 1):
+                course = course_at(entry, week, day, period)
+                if course is not None:
+                    item = QTableWidgetItem(f"{course['title']}\n{course['classroom']}")
+                    item.setToolTip(f"{course['title']}\n教室: {course['classroom']}\n"
+                                    f"节次: {course['period']}\n周次: {course['weeks']}")
+                    self.timetable_table.setItem(period - 1, day, item)
+        
+    def check_all_links(self):
+        """并发检查网站、文件和通知中的所有链接"""
+        if self.link_check_task is not None:
+            QMessageBox.warning(self, "操作错误", "正在检查链接，请稍候")
+            return
+            
+        from link_checker import collect_links
+        links = collect_links(self.data, self.file_data, self.notification_data)
+        if not links:
+            QMessageBox.information(self, "提示", "没有需要检查的链接")
+            return
+            
+        self.link_check_task = LinkCheckTask([link["url"] for link in links])
+        self.link_check_task.signals.progress.connect(
+            lambda done, total: self.statusBar().showMessage(f"正在检查链接 {done}/{total}"))
+        self.link_check_task.signals.finished.connect(self.on_link_check_finished)
+        self.link_check_task.signals.failed.connect(self.on_link_check_failed)
+        self.statusBar().showMessage("正在检查链接...")
+        self.fetch_pool.start(self.link_check_task)
+        
+    def on_link_check_finished(self, results):
+        self.link_check_task = None
+        self.link_status.update(results)
+        try:
+            save_status(self.link_status)
+        except Exception as e:
+            QMessageBox.warning(self, "保存错误", f"无法保存链接检查结果: {str(e)}")
+            
+        self.website_model.status_changed()
+        self.file_model.status_changed()
+        self.notification_model.status_changed()
+        
+        broken = sum(1 for r in results.values() if not r["ok"])
+        self.statusBar().showMessage(f"链接检查完成: 共 {len(results)} 个，失效 {broken} 个", 10000)
+        
+    def on_link_check_failed(self, message):
+        self.link_check_task = None
+        self.statusBar().clearMessage()
+        QMessageBox.warning(self, "检查错误", f"检查链接时出错: {message}")
+        
+    def revalidate_expiring_links(self):
+        """定时任务：在后台并发检查即将过期或已过期的下载链接，结果标记在文件表格中"""
+        self.expiry_timer.start(EXPIRY_CHECK_INTERVAL_MS)
+        # 即使不需要检查，剩余时间的显示也要随时间更新
+        self.file_model.status_changed()
+        if self.expiry_check_task is not None or self.link_check_task is not None:
+            return
+            
+        now = time.time()
+        urls = []
+        for file_id in self.file_model.expiry_index.expiring(now + DEFAULT_WARN_SECONDS):
+            file_info = self.index.find_file(file_id)
+            url = file_info.get("downloadUrl") if file_info else None
+            if url and needs_check(self.file_model.expiry_index.get(file_id),
+                                   self.link_status.get(url), now):
+                urls.append(url)
+        if not urls:
+            self.show_refresh_summary()
+            return
+            
+        self.expiry_check_task = LinkCheckTask(urls)
+        self.expiry_check_task.signals.finished.connect(self.on_expiry_check_finished)
+        self.expiry_check_task.signals.failed.connect(self.on_expiry_check_failed)
+        self.fetch_pool.start(self.expiry_check_task)
         
-    def download_file(self, url):
+    def on_expiry_check_finished(self, results):
+        self.expiry_check_task = None
+        self.link_status.update(results)
+        try:
+            save_status(self.link_status)
+        except Exception as e:
+            self.statusBar().showMessage(f"无法保存链接检查结果: {str(e)}", 5000)
+        self.file_model.status_changed()
+        self.show_refresh_summary()
+        
+    def on_expiry_check_failed(self, message):
+        # 后台任务不弹窗，下次定时检查时重试
+        self.expiry_check_task = None
+        self.statusBar().showMessage(f"检查即将过期的下载链接时出错: {message}", 5000)
+        
+    def show_refresh_summary(self):
+        count = len(self.file_model.refresh_queue())
+        if count:
+            self.statusBar().showMessage(f"有 {count} 个文件的下载链接已过期、即将过期或失效，需要重新生成", 10000)
+            
+    def show_refresh_queue(self):
+        """列出需要重新生成下载链接的文件"""
+        queue = self.file_model.refresh_queue()
+        if not queue:
+            QMessageBox.information(self, "提示", "没有需要更新的下载链接")
+            return
+        lines = [f"{file_info['name']}（{reason}）" for file_info, reason in queue]
+        QMessageBox.information(self, "待更新链接",
+                                f"以下 {len(queue)} 个文件需要在网盘中重新生成下载链接，"
+                                f"生成后编辑文件填入新链接:\n\n" + "\n".join(lines))
+        
+    def export_link_report(self):
+        """导出最近一次的链接检查报告"""
+        if not self.link_status:
+            QMessageBox.warning(self, "导出错误", "还没有链接检查结果，请先检查链接")
+            return
+            
+        path, _ = QFileDialog.getSaveFileName(self, "导出链接报告", "link_report.csv",
+                                              "CSV 文件 (*.csv);;JSON 文件 (*.json)")
+        if not path:
+            return
+            
+        from link_checker import collect_links, export_report
+        try:
+            links = collect_links(self.data, self.file_data, self.notification_data)
+            count = export_report(links, self.link_status, path)
+            QMessageBox.information(self, "成功", f"已导出 {count} 条链接记录")
+        except Exception as e:
+            QMessageBox.warning(self, "导出错误", f"无法导出报告: {str(e)}")
+            
+    def open_url(self, url, prefetch_urls=()):
+        # 预览窗口只创建一次，关闭后再次预览时直接复用（QtWebEngine 第一次预览时才加载）
+        if self.preview_window is None:
+            from preview_window import PreviewWindow
+            self.preview_window = PreviewWindow(parent=self)
+        self.preview_window.show_url(url)
+        self.preview_window.prefetch(prefetch_urls)
+        
+    def download_file(self, url, file_info=None):
+        # 只根据链接中的有效期提醒，不在点击时发起网络请求
+        if file_info is not None:
+            expires_at = self.file_model.expiry_index.get(file_info["id"])
+            if expiry_state(expires_at) == "expired":
+                reply = QMessageBox.question(self, "链接已过期",
+                                             time.strftime("该文件的下载链接已于 %Y-%m-%d %H:%M 过期，"
+                                                           "可能无法下载，需要在网盘中重新生成。\n\n仍然打开吗？",
+                                                           time.localtime(expires_at)),
+                                             QMessageBox.Yes | QMessageBox.No)
+                if reply != QMessageBox.Yes:
+                    return
         # 使用系统默认浏览器直接打开下载链接
         import webbrowser
         webbrowser.open(url)
 
-def main():
-    app = QApplication(sys.argv)
+def create_application(argv):
+    # QtWebEngine 在窗口显示之后才导入，需要在创建 QApplication 之前设置共享 OpenGL 上下文
+    QApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+    app = QApplication(argv)
     # 设置全局字体为微软雅黑
     font = QFont("微软雅黑")
     font.setPointSize(9)  # 设置默认字体大小
     app.setFont(font)
+    return app
+
+def main():
+    app = create_application(sys.argv)
     manager = WebsiteManager()
     manager.show()
     sys.exit(app.exec_())